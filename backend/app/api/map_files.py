@@ -0,0 +1,162 @@
+import json
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.http_cache import PayloadCache, choose_media_type, payload_response
+from app.core.static_assets import IMMUTABLE, REVALIDATE, StaticAssets
+from app.geo.formats import (
+    GEOJSON_MEDIA_TYPE,
+    NEGOTIABLE_MEDIA_TYPES,
+    encode_features,
+    media_type_of,
+)
+from app.geo.geojson import as_features
+from app.geo.labels import layer_labels
+from app.geo.topojson import features_to_topology
+
+router = APIRouter(prefix="/maps", tags=["maps"])
+
+TOPOJSON_MEDIA_TYPE = "application/json"
+
+# Файлы из MAPS_DIR: готовые .br/.gz рядом с исходником, адреса с хэшем содержимого, Range.
+map_assets = StaticAssets(settings.MAPS_DIR)
+
+# Производные форматы статических слоёв; версия - (mtime, size) исходного файла.
+map_files_cache = PayloadCache()
+
+
+def resolve_map_file(path: str, suffix: str = ".geojson") -> tuple[Path, bool]:
+    """(source file, hashed URL) for a request path without extension, or 404.
+
+    ``66/districts.<hash>`` resolves too while the hash matches the current file,
+    so derived formats share the immutable URLs of the manifest.
+    """
+    try:
+        return map_assets.resolve(f"{path}{suffix}")
+    except HTTPException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Слой карты не найден") from None
+
+
+def file_version(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def read_features(path: Path) -> list[dict]:
+    with path.open("r", encoding="utf-8") as f:
+        return as_features(json.load(f))
+
+
+def render_topojson_file(path: Path) -> bytes:
+    topology = features_to_topology({path.stem: read_features(path)})
+    return json.dumps(topology, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def render_labels_file(path: Path) -> bytes:
+    """Точки подписей районов: полюс недоступности, центр масс - в свойствах."""
+    features = read_features(path)
+    points = []
+    for feature, point in zip(features, layer_labels(features, workers=settings.LABEL_WORKERS)):
+        if point["label"] is None:
+            continue
+        props = dict(feature.get("properties") or {})
+        props["centroid"] = list(point["centroid"]) if point["centroid"] else None
+        points.append({
+            "type": "Feature",
+            "properties": props,
+            "geometry": {"type": "Point", "coordinates": list(point["label"])},
+        })
+    collection = {"type": "FeatureCollection", "features": points}
+    return json.dumps(collection, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def derived_cache_key(source: Path, fmt: str) -> tuple[str, str]:
+    return source.relative_to(map_assets.root).as_posix(), fmt
+
+
+def cache_control(hashed: bool) -> str:
+    return IMMUTABLE if hashed else REVALIDATE
+
+
+@router.get("/manifest.json")
+def maps_manifest(request: Request):
+    """Имя слоя -> адрес с хэшем содержимого; такие адреса кэшируются навсегда.
+
+    Хэш подходит и для производных форматов: /maps/66/districts.<hash>.topojson.
+    """
+    files = map_assets.files()
+    manifest = map_files_cache.get(
+        ("manifest", "json"),
+        tuple((p, file_version(p)) for p in files),
+        lambda: json.dumps(
+            {name: f"{router.prefix}/{hashed}" for name, hashed in map_assets.manifest().items()},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8"),
+    )
+    return payload_response(request, manifest, "application/json")
+
+
+@router.get("/{code}/labels.geojson")
+def map_labels(code: str, request: Request):
+    """Точки подписей для /maps/{code}/districts.geojson; пересчёт только при смене файла."""
+    source, _ = resolve_map_file(f"{code}/districts")
+    payload = map_files_cache.get(
+        derived_cache_key(source, "labels"),
+        file_version(source),
+        lambda: render_labels_file(source),
+    )
+    return payload_response(request, payload, GEOJSON_MEDIA_TYPE)
+
+
+@router.get("/{path:path}.topojson")
+def map_file_topojson(path: str, request: Request):
+    """TopoJSON-версия любого GeoJSON-слоя из /maps (например /maps/66/districts.topojson)."""
+    source, hashed = resolve_map_file(path)
+    payload = map_files_cache.get(
+        derived_cache_key(source, "topojson"),
+        file_version(source),
+        lambda: render_topojson_file(source),
+    )
+    return payload_response(request, payload, TOPOJSON_MEDIA_TYPE, cache_control=cache_control(hashed))
+
+
+def map_file_binary(path: str, fmt: str, request: Request, vary: str = "Accept-Encoding"):
+    source, hashed = resolve_map_file(path)
+    payload = map_files_cache.get(
+        derived_cache_key(source, fmt),
+        file_version(source),
+        lambda: encode_features(read_features(source), fmt, name=source.stem),
+    )
+    return payload_response(request, payload, media_type_of(fmt), cache_control=cache_control(hashed), vary=vary)
+
+
+@router.get("/{path:path}.fgb")
+def map_file_flatgeobuf(path: str, request: Request):
+    """FlatGeobuf-версия GeoJSON-слоя из /maps."""
+    return map_file_binary(path, "fgb", request)
+
+
+@router.get("/{path:path}.pbf")
+def map_file_geobuf(path: str, request: Request):
+    """Geobuf-версия GeoJSON-слоя из /maps."""
+    return map_file_binary(path, "geobuf", request)
+
+
+@router.api_route("/{path:path}.geojson", methods=["GET", "HEAD"])
+def map_file_geojson(path: str, request: Request):
+    """Сам GeoJSON-слой (готовые .br/.gz, Range) либо его бинарная версия, если её просят в Accept."""
+    fmt = NEGOTIABLE_MEDIA_TYPES[choose_media_type(request, NEGOTIABLE_MEDIA_TYPES)]
+    if fmt != "geojson":
+        return map_file_binary(path, fmt, request, vary="Accept, Accept-Encoding")
+    return map_assets.response(
+        request, f"{path}.geojson", media_type=GEOJSON_MEDIA_TYPE, vary="Accept, Accept-Encoding"
+    )
+
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"])
+def map_file(path: str, request: Request):
+    """Остальные файлы из MAPS_DIR."""
+    return map_assets.response(request, path)
@@ -1,28 +1,169 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import text
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.http_cache import (
+    choose_encoding,
+    choose_media_type,
+    dynamic_response,
+    etag_matches,
+    gzip_chunks,
+    payload_response,
+)
 from app.db.session import get_db  # ВАЖНО: app., не backend.app.
+from app.geo.formats import GEOJSON_MEDIA_TYPE, NEGOTIABLE_MEDIA_TYPES, media_type_of
+from app.services.region_lod import LodLevel, pick_level
+from app.services.region_service import (
+    Bbox,
+    get_regions_binary_payload,
+    get_regions_payload,
+    get_regions_topojson_payload,
+    get_regions_version,
+    iter_regions_geojson,
+    regions_cache,
+    render_regions_geojson,
+)
+from app.services.tile_service import MVT_MEDIA_TYPE, get_regions_tile, is_valid_tile
+from app.services.zone_service import render_zones_geojson
 
 router = APIRouter(prefix="/maps/ru", tags=["maps"])
 
+TOPOJSON_MEDIA_TYPE = "application/json"
 
-@router.get("/regions.geojson")
-def regions_geojson(db: Session = Depends(get_db)):
-    q = text("""
-    SELECT jsonb_build_object(
-      'type','FeatureCollection',
-      'features', COALESCE(jsonb_agg(
-        jsonb_build_object(
-          'type','Feature',
-          'properties', jsonb_build_object(
-            'id', id,
-            'name', name
-          ),
-          'geometry', ST_AsGeoJSON(COALESCE(geom_simplified, geom))::jsonb
+
+def parse_bbox(
+    bbox: Optional[str] = Query(
+        None,
+        description="Окно просмотра minx,miny,maxx,maxy (градусы WGS84)",
+        examples=["56.0,54.5,66.0,62.0"],
+    ),
+) -> Optional[Bbox]:
+    if bbox is None:
+        return None
+    try:
+        minx, miny, maxx, maxy = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox должен иметь вид minx,miny,maxx,maxy",
+        ) from None
+    if minx > maxx or miny > maxy:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox: min больше max",
         )
-      ), '[]'::jsonb)
-    ) AS fc
-    FROM regions;
-    """)
-    return db.execute(q).scalar_one()
+    return minx, miny, maxx, maxy
+
+
+@router.get("/regions.geojson")
+def regions_geojson(
+    request: Request,
+    zoom: Optional[int] = Query(None, ge=0, le=24, description="Зум карты, по нему выбирается уровень детализации"),
+    tolerance: Optional[float] = Query(None, gt=0, description="Допустимая погрешность в градусах (приоритетнее zoom)"),
+    stream: bool = Query(False, description="Отдавать по мере чтения из БД, не собирая документ целиком"),
+    bbox: Optional[Bbox] = Depends(parse_bbox),
+    db: Session = Depends(get_db),
+):
+    # Документ собирается один раз на версию таблицы regions и уровень детализации
+    # и хранится уже сжатым (gzip/br); повторные запросы отдаются из памяти или 304.
+    level = pick_level(zoom=zoom, tolerance=tolerance)
+
+    if bbox is not None:
+        # Окна просмотра бесконечно разнообразны - их не кэшируем, а фильтруем по индексу.
+        if stream:
+            db.close()
+            return regions_stream_response(request, iter_regions_geojson(level, bbox))
+        return dynamic_response(request, render_regions_geojson(db, level, bbox), GEOJSON_MEDIA_TYPE)
+
+    if stream:
+        # Если готовый документ уже в кэше, он всё равно дешевле потока.
+        cached = regions_cache.peek(("geojson", level.column), get_regions_version(db))
+        if cached is None:
+            # Поток читает через собственное соединение; сессию запроса отпускаем сразу.
+            db.close()
+            return regions_stream_response(request, iter_regions_geojson(level))
+        return payload_response(request, cached, GEOJSON_MEDIA_TYPE)
+
+    # Клиент может попросить FlatGeobuf/Geobuf через Accept; по умолчанию - GeoJSON.
+    fmt = NEGOTIABLE_MEDIA_TYPES[choose_media_type(request, NEGOTIABLE_MEDIA_TYPES)]
+    if fmt != "geojson":
+        return regions_binary_response(request, fmt, level, db, vary="Accept, Accept-Encoding")
+    return payload_response(
+        request, get_regions_payload(db, level), GEOJSON_MEDIA_TYPE, vary="Accept, Accept-Encoding"
+    )
+
+
+@router.get("/regions.fgb")
+def regions_flatgeobuf(
+    request: Request,
+    zoom: Optional[int] = Query(None, ge=0, le=24),
+    tolerance: Optional[float] = Query(None, gt=0),
+    db: Session = Depends(get_db),
+):
+    """Регионы в FlatGeobuf: с пространственным индексом, читаются по мере загрузки."""
+    return regions_binary_response(request, "fgb", pick_level(zoom=zoom, tolerance=tolerance), db)
+
+
+@router.get("/regions.pbf")
+def regions_geobuf(
+    request: Request,
+    zoom: Optional[int] = Query(None, ge=0, le=24),
+    tolerance: Optional[float] = Query(None, gt=0),
+    db: Session = Depends(get_db),
+):
+    """Регионы в Geobuf (protobuf), самый компактный вариант для полной выгрузки."""
+    return regions_binary_response(request, "geobuf", pick_level(zoom=zoom, tolerance=tolerance), db)
+
+
+def regions_binary_response(
+    request: Request, fmt: str, level: LodLevel, db: Session, vary: str = "Accept-Encoding"
+):
+    payload = get_regions_binary_payload(db, fmt, level)
+    return payload_response(request, payload, media_type_of(fmt), vary=vary)
+
+
+@router.get("/regions.topojson")
+def regions_topojson(
+    request: Request,
+    zoom: Optional[int] = Query(None, ge=0, le=24),
+    tolerance: Optional[float] = Query(None, gt=0),
+    db: Session = Depends(get_db),
+):
+    """Те же регионы в TopoJSON: общие границы хранятся один раз, координаты квантованы."""
+    level = pick_level(zoom=zoom, tolerance=tolerance)
+    return payload_response(request, get_regions_topojson_payload(db, level), TOPOJSON_MEDIA_TYPE)
+
+
+@router.get("/zones.geojson")
+def zones_geojson(
+    request: Request,
+    map_id: Optional[int] = Query(None),
+    bbox: Optional[Bbox] = Depends(parse_bbox),
+    db: Session = Depends(get_db),
+):
+    """Зоны в виде FeatureCollection, с фильтром по карте и окну просмотра (окно - только с PostGIS)."""
+    return dynamic_response(request, render_zones_geojson(db, bbox, map_id), GEOJSON_MEDIA_TYPE)
+
+
+def regions_stream_response(request: Request, chunks) -> StreamingResponse:
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if choose_encoding(request, ("gzip",)) == "gzip":
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=GEOJSON_MEDIA_TYPE, headers=headers)
+
+
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+def regions_tile(z: int, x: int, y: int, request: Request, db: Session = Depends(get_db)):
+    if not is_valid_tile(z, x, y):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Тайл вне допустимого диапазона")
+
+    tile = get_regions_tile(db, z, x, y)
+    headers = {"ETag": f'"{tile.digest}"', "Cache-Control": "no-cache"}
+    if etag_matches(request, tile.digest):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if not tile.data:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+    return Response(content=tile.data, media_type=MVT_MEDIA_TYPE, headers=headers)
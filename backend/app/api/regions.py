@@ -1,13 +1,79 @@
-﻿from fastapi import APIRouter, Depends
+﻿import json
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.db.session import get_db  # <-- ВАЖНО: путь должен быть таким же, как в maps.py
+from app.services.region_index import REGIONS_LAYER, assign_points, locate_point
 
 router = APIRouter(prefix="/api", tags=["regions"])
 
+# Предел на один пакет: 8 млн точек = 128 МБ float64.
+MAX_BATCH_POINTS = 8_000_000
+
 
 @router.get("/regions")
 def list_regions(db: Session = Depends(get_db)):
     rows = db.execute(text("SELECT id, name FROM regions ORDER BY name")).all()
     return [{"id": r.id, "name": r.name} for r in rows]
+
+
+@router.get("/regions/locate")
+def locate(
+    lon: float = Query(..., ge=-180, le=180),
+    lat: float = Query(..., ge=-90, le=90),
+):
+    """В какой регион (и район, если для него есть слой) попадает точка.
+
+    Только память: версию регионов в БД проверяет фоновая задача.
+    """
+    return locate_point(lon, lat)
+
+
+def parse_points(body: bytes, content_type: str) -> np.ndarray:
+    """JSON ``{"points": [[lon, lat], ...]}`` / ``[[lon, lat], ...]`` or raw little-endian float64 pairs."""
+    if content_type.startswith("application/octet-stream"):
+        if len(body) % 16:
+            raise ValueError("binary payload must be a sequence of float64 lon/lat pairs")
+        points = np.frombuffer(body, dtype="<f8").reshape(-1, 2)
+    else:
+        data = json.loads(body or b"null")
+        if isinstance(data, dict):
+            data = data.get("points")
+        if not isinstance(data, list):
+            raise ValueError("expected a list of [lon, lat] pairs")
+        try:
+            points = np.asarray(data, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("expected a list of [lon, lat] pairs") from None
+        if points.size == 0:
+            points = points.reshape(0, 2)
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError("expected a list of [lon, lat] pairs")
+    if len(points) > MAX_BATCH_POINTS:
+        raise ValueError(f"too many points, max {MAX_BATCH_POINTS}")
+    return points
+
+
+@router.post("/regions/locate/batch")
+async def locate_batch(
+    request: Request,
+    layer: str = Query(REGIONS_LAYER, description="regions или слой из MAPS_DIR, например 66/districts"),
+):
+    """Пакетная привязка точек к регионам/районам.
+
+    В ответе ``assignments[i]`` - номер объекта в ``features`` для i-й точки или -1.
+    """
+    body = await request.body()
+    try:
+        points = parse_points(body, request.headers.get("content-type", ""))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from None
+
+    result = await run_in_threadpool(assign_points, layer, points)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Слой не найден")
+    return result
@@ -0,0 +1,222 @@
+import logging
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core import fast_json
+from app.core.config import settings
+from app.core.http_cache import etag_matches
+from app.core.security import get_current_user, require_roles
+from app.db.session import SessionLocal, get_db
+from app.models.user import User
+from app.services.attachment_service import (
+    AttachmentKind,
+    add_attachment,
+    attachment_out,
+    event_exists,
+    get_attachment,
+    list_attachments,
+)
+from app.services.content_store import UploadTooLarge, get_content_store, request_chunks
+from app.services.thumbnails import (
+    DEFAULT_SIZE,
+    MEDIA_TYPES,
+    SIZES,
+    ThumbnailFormat,
+    thumbnail_jobs,
+    thumbnails_available,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["attachments"])
+
+# Файл по адресу содержимого не меняется никогда
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+
+class AttachmentOut(BaseModel):
+    id: int
+    event_id: int
+    name: str
+    sha256: Optional[str]
+    size: Optional[int]
+    content_type: Optional[str]
+    created_at: datetime
+    url: str
+    thumbnail_url: Optional[str] = None
+
+
+class EventAttachmentsOut(BaseModel):
+    images: List[AttachmentOut]
+    documents: List[AttachmentOut]
+
+
+def content_disposition(name: str, disposition: str) -> str:
+    return f"{disposition}; filename*=utf-8''{quote(name)}"
+
+
+def _check_event(event_id: int) -> bool:
+    with SessionLocal() as db:
+        return event_exists(db, event_id)
+
+
+def _save_row(kind: AttachmentKind, event_id: int, name: str, blob, content_type: Optional[str]) -> dict:
+    with SessionLocal() as db:
+        return attachment_out(kind, add_attachment(db, kind, event_id, name, blob, content_type))
+
+
+@router.post(
+    "/events/{event_id}/{kind}",
+    response_model=AttachmentOut,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+async def upload_attachment(
+    event_id: int,
+    kind: AttachmentKind,
+    request: Request,
+    name: str = Query(..., min_length=1, max_length=255, description="Имя файла, как его показать пользователю"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("admin", "editor")),
+):
+    """Загрузка фото или документа события: тело запроса - сам файл (не multipart).
+
+    Файл пишется на диск кусками по мере приёма и хэшируется; одинаковые файлы хранятся один раз.
+    """
+    # соединение из пула не держим, пока идёт загрузка
+    db.close()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip() or None
+    if kind == "images" and not (content_type or "").startswith("image/"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Ожидается изображение (Content-Type: image/...)",
+        )
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > settings.ATTACHMENT_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Файл больше {settings.ATTACHMENT_MAX_BYTES} байт",
+        )
+    if not await run_in_threadpool(_check_event, event_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Событие не найдено")
+
+    try:
+        blob = await get_content_store().save(request_chunks(request.stream()), settings.ATTACHMENT_MAX_BYTES)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Файл больше {settings.ATTACHMENT_MAX_BYTES} байт",
+        ) from None
+    row = await run_in_threadpool(_save_row, kind, event_id, name, blob, content_type)
+    if kind == "images":
+        # миниатюры рисуются в фоне, ответ их не ждёт
+        thumbnail_jobs.submit(blob.path)
+    return Response(
+        content=fast_json.dumps(row),
+        status_code=status.HTTP_201_CREATED,
+        media_type="application/json",
+    )
+
+
+@router.get("/events/{event_id}/attachments", response_model=EventAttachmentsOut)
+def event_attachments(
+    event_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    return {
+        kind: [attachment_out(kind, row) for row in list_attachments(db, kind, event_id)]
+        for kind in ("images", "documents")
+    }
+
+
+@router.get("/attachments/{kind}/{attachment_id}")
+def download_attachment(
+    kind: AttachmentKind,
+    attachment_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Файл вложения; поддерживает Range (докачка, перемотка видео) и If-Range."""
+    row = get_attachment(db, kind, attachment_id)
+    if row is None or not row.sha256:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл не найден")
+    media_type = row.content_type or "application/octet-stream"
+    disposition = "inline" if kind == "images" else "attachment"
+    headers = {"ETag": f'"{row.sha256}"', "Cache-Control": IMMUTABLE}
+    if etag_matches(request, row.sha256):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.ATTACHMENT_ACCEL_REDIRECT:
+        # байты, диапазоны и sendfile - на nginx (internal location с alias на ATTACHMENTS_DIR)
+        headers["X-Accel-Redirect"] = settings.ATTACHMENT_ACCEL_REDIRECT.rstrip("/") + "/" + row.file_path
+        headers["Content-Disposition"] = content_disposition(row.name, disposition)
+        return Response(media_type=media_type, headers=headers)
+
+    path = get_content_store().path_for(row.sha256)
+    if not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл не найден")
+    # FileResponse сам разбирает Range/If-Range и отдаёт через http.response.pathsend, если сервер умеет
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=row.name,
+        content_disposition_type=disposition,
+        headers=headers,
+    )
+
+
+def _image_row(attachment_id: int):
+    with SessionLocal() as db:
+        return get_attachment(db, "images", attachment_id)
+
+
+@router.get("/attachments/images/{attachment_id}/thumbnail")
+async def image_thumbnail(
+    attachment_id: int,
+    request: Request,
+    size: int = Query(DEFAULT_SIZE, description="Длинная сторона: 160, 480 или 1280"),
+    format: Optional[ThumbnailFormat] = Query(None, description="По умолчанию webp, если браузер его принимает"),
+    current_user: User = Depends(get_current_user),
+):
+    """Уменьшенная копия фото; если её ещё нет, рисуется сейчас (в пуле процессов)."""
+    if size not in SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"size должен быть одним из {', '.join(map(str, SIZES))}",
+        )
+    fmt = format or ("webp" if "image/webp" in request.headers.get("accept", "") else "jpeg")
+    row = await run_in_threadpool(_image_row, attachment_id)
+    if row is None or not row.sha256:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл не найден")
+    original = get_content_store().path_for(row.sha256)
+    if not original.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл не найден")
+    if not thumbnails_available():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Миниатюры недоступны: не установлен Pillow")
+
+    etag = f"{row.sha256}.{size}.{fmt}"
+    headers = {"ETag": f'"{etag}"', "Cache-Control": IMMUTABLE}
+    if format is None:
+        headers["Vary"] = "Accept"
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    try:
+        path = await thumbnail_jobs.ensure(original, size, fmt)
+    except Exception as exc:  # noqa: BLE001 - битый или неподдерживаемый файл
+        logger.warning("thumbnail of image %s failed: %s", attachment_id, exc)
+        raise HTTPException(status_code=422, detail="Не удалось построить миниатюру") from None
+    return FileResponse(path, media_type=MEDIA_TYPES[fmt], headers=headers)
@@ -1,57 +1,378 @@
-from typing import List
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import HTTPConnection
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.core.security import get_current_user
-from app.db.session import get_db
+from app.core import fast_json
+from app.core.security import get_current_user, require_roles
+from app.db.session import SessionLocal, get_db
 from app.models.user import User
-from app.models.event import Event
+from app.schemas.event import EventBatchResult, EventIn
+from app.services.event_export import MEDIA_TYPES as EXPORT_MEDIA_TYPES
+from app.services.event_export import ExportFormat, export_events, parquet_available
+from app.services.event_search import (
+    DEFAULT_SEARCH_LIMIT,
+    MAX_QUERY_LENGTH,
+    MAX_SEARCH_LIMIT,
+    SearchOrder,
+    decode_search_cursor,
+    search_events,
+)
+from app.services.event_rollup_service import StatsGroupBy, StatsInterval, StatsQuery, event_stats
+from app.services.event_stream import SlowConsumer, event_broadcaster
+from app.services.event_service import (
+    DEFAULT_PAGE_SIZE,
+    MAX_BATCH_BYTES,
+    MAX_BATCH_EVENTS,
+    MAX_PAGE_SIZE,
+    EventBatchError,
+    EventFilters,
+    as_utc,
+    decode_cursor,
+    insert_event_batch,
+    list_events_page,
+    parse_event_batch,
+)
 
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Окно статистики по умолчанию, если since не задан
+DEFAULT_STATS_WINDOW = {"hour": timedelta(days=1), "day": timedelta(days=30)}
+# Пустые сообщения, чтобы прокси не закрывали простаивающий поток
+STREAM_HEARTBEAT_SECONDS = 15
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/jsonl", "application/jsonlines"}
+
 
 class EventOut(BaseModel):
     id: int
+    map_id: int
+    zone_id: int
     map_name: str
     zone_name: str
     status: str
     title: str
     description: str
-    created_at: str
+    created_at: datetime
+
 
-    class Config:
-        from_attributes = True
+class EventSearchOut(EventOut):
+    rank: float
+    # HTML: текст экранирован, совпадения в <mark>
+    title_highlight: str
+    snippet: str
 
 
 @router.get("/", response_model=List[EventOut])
 def list_events(
+    cursor: Optional[str] = Query(None, description="Значение X-Next-Cursor предыдущей страницы"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    map_id: Optional[int] = Query(None),
+    zone_id: Optional[int] = Query(None),
+    status_: Optional[List[str]] = Query(None, alias="status", description="Можно несколько: ?status=warning&status=alert"),
+    since: Optional[datetime] = Query(None, description="Не раньше (включительно)"),
+    until: Optional[datetime] = Query(None, description="Раньше (не включительно)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    events = (
-        db.query(Event)
-        .join(Event.map)
-        .join(Event.zone)
-        .order_by(Event.created_at.desc())
-        .limit(100)
-        .all()
+    """Лента событий, новые сверху; следующая страница - по курсору из заголовка X-Next-Cursor.
+
+    created_at - ISO 8601 с часовым поясом.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор") from None
+
+    filters = EventFilters(
+        map_id=map_id,
+        zone_id=zone_id,
+        statuses=tuple(status_ or ()),
+        since=since,
+        until=until,
     )
+    rows, next_cursor = list_events_page(db, filters, after, limit)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    # строки уже в нужной форме: сразу в байты, без второго прохода через response_model
+    return Response(content=fast_json.dumps(rows), media_type="application/json", headers=headers)
 
-    result: List[EventOut] = []
-    for ev in events:
-        result.append(
-            EventOut(
-                id=ev.id,
-                map_name=ev.map.name if ev.map else "",
-                zone_name=ev.zone.name if ev.zone else "",
-                status=ev.status,
-                title=ev.title,
-                description=ev.description or "",
-                created_at=ev.created_at.strftime("%Y-%m-%d %H:%M"),
+
+async def read_body_limited(request: Request, limit: int) -> bytes:
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Тело запроса больше {limit} байт",
             )
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@router.post(
+    "/batch",
+    response_model=EventBatchResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": EventIn.model_json_schema(), "maxItems": MAX_BATCH_EVENTS},
+                },
+                "application/x-ndjson": {
+                    "schema": {"type": "string", "description": f"До {MAX_BATCH_EVENTS} строк, по событию в строке"},
+                },
+            },
+        }
+    },
+)
+async def create_events_batch(
+    request: Request,
+    current_user: User = Depends(require_roles("admin", "editor")),
+    db: Session = Depends(get_db),
+):
+    """Пакетная запись событий: JSON-массив или NDJSON (по объекту на строку).
+
+    Пакет проверяется целиком и пишется одной транзакцией; при ошибке не
+    пишется ничего. События с уже известным idempotency_key не дублируются -
+    в ids для них возвращается id ранее созданного события.
+    """
+    body = await read_body_limited(request, MAX_BATCH_BYTES)
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    def ingest() -> EventBatchResult:
+        events = parse_event_batch(body, ndjson=media_type in NDJSON_MEDIA_TYPES)
+        return insert_event_batch(db, events)
+
+    try:
+        result = await run_in_threadpool(ingest)
+    except EventBatchError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors) from None
+    return Response(content=fast_json.dumps(result.model_dump()), media_type="application/json")
+
+
+@router.get("/stats")
+def events_stats(
+    interval: StatsInterval = Query("hour", description="Размер корзины"),
+    since: Optional[datetime] = Query(None, description="Начало окна (округляется до часа); по умолчанию сутки/30 дней назад"),
+    until: Optional[datetime] = Query(None, description="Конец окна, не включительно; по умолчанию сейчас"),
+    group_by: StatsGroupBy = Query("none", description="Разбивка корзин по карте или зоне"),
+    map_id: Optional[int] = Query(None),
+    zone_id: Optional[int] = Query(None),
+    tz: str = Query("UTC", description="Часовой пояс границ дней, например Asia/Yekaterinburg"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Число событий ok/warning/alert по часам или дням.
+
+    Считается по свёрнутым итогам и ещё не свёрнутому хвосту: стоимость
+    зависит от числа корзин, а не событий.
+    """
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Неизвестный часовой пояс") from None
+    # время без смещения считается UTC, иначе сравнение с now() падает
+    until = as_utc(until) or datetime.now(timezone.utc)
+    since = as_utc(since) or until - DEFAULT_STATS_WINDOW[interval]
+    if since >= until:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since должен быть раньше until")
+
+    stats = event_stats(db, StatsQuery(
+        since=since,
+        until=until,
+        interval=interval,
+        group_by=group_by,
+        map_id=map_id,
+        zone_id=zone_id,
+        tz=tz,
+    ))
+    return Response(content=fast_json.dumps(stats), media_type="application/json")
+
+
+@router.get("/search", response_model=List[EventSearchOut])
+def search(
+    q: str = Query(..., min_length=1, max_length=MAX_QUERY_LENGTH, description="Как в поисковике: слова, \"фраза\", -исключить, or"),
+    order: SearchOrder = Query("rank", description="rank - по релевантности, recent - новые сверху"),
+    cursor: Optional[str] = Query(None, description="Значение X-Next-Cursor предыдущей страницы"),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    map_id: Optional[int] = Query(None),
+    zone_id: Optional[int] = Query(None),
+    status_: Optional[List[str]] = Query(None, alias="status"),
+    since: Optional[datetime] = Query(None, description="Не раньше (включительно)"),
+    until: Optional[datetime] = Query(None, description="Раньше (не включительно)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Полнотекстовый поиск по заголовкам, описаниям и текстам событий.
+
+    Русская и английская морфология; совпадения подсвечены в title_highlight и snippet.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_search_cursor(cursor, order)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор") from None
+
+    filters = EventFilters(
+        map_id=map_id,
+        zone_id=zone_id,
+        statuses=tuple(status_ or ()),
+        since=since,
+        until=until,
+    )
+    rows, next_cursor = search_events(db, q, filters, order, after, limit)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=fast_json.dumps(rows), media_type="application/json", headers=headers)
+
+
+@router.get("/export")
+def export(
+    format: ExportFormat = Query("csv", description="csv или parquet"),
+    map_id: Optional[int] = Query(None),
+    zone_id: Optional[int] = Query(None),
+    status_: Optional[List[str]] = Query(None, alias="status"),
+    since: Optional[datetime] = Query(None, description="Не раньше (включительно)"),
+    until: Optional[datetime] = Query(None, description="Раньше (не включительно); по умолчанию - момент запроса"),
+    current_user: User = Depends(get_current_user),
+):
+    """Выгрузка событий с названиями карт и зон, от старых к новым, без ограничения числа строк.
+
+    Ответ идёт потоком (chunked), пачками в коротких транзакциях; Content-Length нет.
+    """
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Parquet недоступен: не установлен pyarrow")
+    since = as_utc(since)
+    until = as_utc(until) or datetime.now(timezone.utc)
+    if since is not None and since >= until:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since должен быть раньше until")
+
+    filters = EventFilters(
+        map_id=map_id,
+        zone_id=zone_id,
+        statuses=tuple(status_ or ()),
+        since=since,
+        until=until,
+    )
+    filename = f"events_{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.{format}"
+    return StreamingResponse(
+        export_events(filters, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def stream_user(conn: HTTPConnection, token: Optional[str]) -> User:
+    """Пользователь потока: Bearer-заголовок или ?token= (EventSource и WebSocket заголовки не задают).
+
+    Сессия БД закрывается сразу - поток держит соединение часами.
+    """
+    header = conn.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        token = header[7:]
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Не удалось проверить учетные данные",
+            headers={"WWW-Authenticate": "Bearer"},
         )
+    with SessionLocal() as db:
+        return get_current_user(token, db)
+
+
+@router.get("/stream")
+async def events_stream(
+    request: Request,
+    token: Optional[str] = Query(None),
+    map_id: Optional[int] = Query(None),
+    zone_id: Optional[int] = Query(None),
+    status_: Optional[List[str]] = Query(None, alias="status"),
+):
+    """Новые события через Server-Sent Events (event: event, data: строка ленты).
+
+    Если клиент не успевает читать, приходит event: dropped и поток
+    закрывается: пропущенное дочитывается через GET /events/.
+    """
+    await run_in_threadpool(stream_user, request, token)
+    sub = event_broadcaster.subscribe(map_id=map_id, zone_id=zone_id, statuses=status_ or ())
+
+    async def body():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    message = await sub.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                except SlowConsumer:
+                    yield b"event: dropped\ndata: {}\n\n"
+                    return
+                if message is None:
+                    if await request.is_disconnected():
+                        return
+                    yield b": ping\n\n"
+                    continue
+                event, data = message
+                yield b"id: %d\nevent: event\ndata: %s\n\n" % (event["id"], data)
+        finally:
+            event_broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def events_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    map_id: Optional[int] = Query(None),
+    zone_id: Optional[int] = Query(None),
+    status_: Optional[List[str]] = Query(None, alias="status"),
+):
+    """Новые события через WebSocket: по текстовому сообщению на событие.
+
+    Отстающий клиент получает {"type": "dropped"} и закрытие с кодом 1013.
+    """
+    try:
+        await run_in_threadpool(stream_user, websocket, token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    sub = event_broadcaster.subscribe(map_id=map_id, zone_id=zone_id, statuses=status_ or ())
+
+    async def pump() -> None:
+        while True:
+            try:
+                message = await sub.get(timeout=STREAM_HEARTBEAT_SECONDS)
+            except SlowConsumer:
+                await websocket.send_text('{"type":"dropped"}')
+                await websocket.close(code=1013)
+                return
+            if message is None:
+                await websocket.send_text('{"type":"ping"}')
+                continue
+            await websocket.send_text(message[1].decode("utf-8"))
 
-    return result
+    # отправка идёт отдельной задачей, а здесь ждём отключения клиента
+    sender = asyncio.create_task(pump())
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        event_broadcaster.unsubscribe(sub)
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
 
-from app.core.security import require_roles
+from app.core.security import get_current_user, require_roles
+from app.db.session import get_db
 from app.schemas.map import Map
+from app.services.content_store import UploadTooLarge
 from app.services.map_service import MapService
 
 router = APIRouter()
@@ -13,11 +16,20 @@ service = MapService()
     response_model=Map,
     dependencies=[Depends(require_roles("admin"))],
 )
-def upload_map(file: UploadFile):
-    # TODO: Persist file storage and metadata
-    return service.upload_map(file)
+async def upload_map(file: UploadFile, db: Session = Depends(get_db)):
+    try:
+        return await service.upload_map(db, file)
+    except UploadTooLarge as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Файл больше {exc.limit} байт",
+        ) from None
 
 
-@router.get("/maps/current", response_model=Map | None)
-def get_current_map():
-    return service.get_current_map()
+@router.get(
+    "/maps/current",
+    response_model=Map | None,
+    dependencies=[Depends(get_current_user)],
+)
+def get_current_map(db: Session = Depends(get_db)):
+    return service.get_current_map(db)
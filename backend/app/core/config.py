@@ -1,4 +1,5 @@
 from functools import lru_cache
+from pathlib import Path
 from typing import List
 
 from pydantic import AnyHttpUrl, Field
@@ -18,6 +19,51 @@ class Settings(BaseSettings):
         description="SQLAlchemy-style database URL",
     )
 
+    MAPS_DIR: str = Field(
+        default=str(Path(__file__).resolve().parents[2] / "maps"),
+        description="Directory with static GeoJSON map layers served under /maps",
+    )
+
+    # Слои районов (пути внутри MAPS_DIR без .geojson) для /api/regions/locate
+    DISTRICT_LAYERS: List[str] = Field(default_factory=lambda: ["66/districts"])
+
+    # Как часто проверять версию регионов в БД для индекса /api/regions/locate (секунды)
+    REGION_INDEX_REFRESH_SECONDS: int = 5
+
+    # Векторные тайлы регионов (/maps/ru/tiles/{z}/{x}/{y}.mvt)
+    TILE_CACHE_DIR: str = Field(
+        default=str(Path(__file__).resolve().parents[2] / "tile_cache"),
+        description="Content-addressed on-disk cache of rendered MVT tiles",
+    )
+    TILE_MIN_ZOOM: int = 0
+    TILE_MAX_ZOOM: int = 12
+
+    # Процессы для расчёта точек подписей (/maps/{code}/labels.geojson); 0 - в том же процессе
+    LABEL_WORKERS: int = 0
+
+    # Как часто сворачивать дельты событий в часовые итоги (секунды); 0 - не сворачивать в приложении
+    EVENT_ROLLUP_FOLD_SECONDS: int = 60
+
+    # На сколько месяцев вперёд держать секции events; 0 - не создавать из приложения
+    EVENT_PARTITION_MONTHS_AHEAD: int = 3
+
+    # Живой поток событий: postgres (LISTEN/NOTIFY) или memory (без БД, для тестов)
+    EVENT_STREAM_BACKEND: str = "postgres"
+    # Сколько событий может ждать отправки одному клиенту, прежде чем его отключат
+    EVENT_STREAM_QUEUE_SIZE: int = 256
+
+    # Вложения событий и загруженные карты: хранилище по SHA-256 содержимого
+    ATTACHMENTS_DIR: str = Field(
+        default=str(Path(__file__).resolve().parents[2] / "attachments"),
+        description="Content-addressed storage of uploaded files",
+    )
+    ATTACHMENT_MAX_BYTES: int = 100 * 1024 * 1024
+    # internal-location nginx для X-Accel-Redirect (например /_attachments/); пусто - отдаёт приложение
+    ATTACHMENT_ACCEL_REDIRECT: str = ""
+
+    # Процессы для миниатюр фото событий; 0 - в потоках того же процесса
+    THUMBNAIL_WORKERS: int = 2
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
@@ -0,0 +1,195 @@
+"""Helpers for serving pre-rendered, pre-compressed documents with ETag revalidation."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterable, Iterator, Optional
+
+from fastapi import Request, Response
+
+try:  # brotli is optional: without it we simply serve gzip
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    """Rendered document kept in memory in every encoding we are able to serve."""
+
+    body: bytes
+    gzip: bytes
+    br: Optional[bytes]
+    etag: str
+
+    @classmethod
+    def from_bytes(cls, body: bytes) -> "CachedPayload":
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        return cls(
+            body=body,
+            gzip=gzip.compress(body, compresslevel=9, mtime=0),
+            br=brotli.compress(body, quality=11) if brotli is not None else None,
+            etag=digest,
+        )
+
+
+class PayloadCache:
+    """Thread-safe map ``key -> (version, CachedPayload)``.
+
+    An entry is rebuilt only when the caller-supplied version changes; concurrent
+    requests for a stale key wait for a single rebuild instead of all rendering it.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[Hashable, tuple[Any, CachedPayload]] = {}
+        self._locks: dict[Hashable, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key: Hashable) -> threading.Lock:
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def peek(self, key: Hashable, version: Any) -> Optional[CachedPayload]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        return None
+
+    def get(self, key: Hashable, version: Any, build: Callable[[], bytes]) -> CachedPayload:
+        payload = self.peek(key, version)
+        if payload is not None:
+            return payload
+        with self._lock_for(key):
+            payload = self.peek(key, version)
+            if payload is None:
+                payload = CachedPayload.from_bytes(build())
+                self._entries[key] = (version, payload)
+            return payload
+
+    def clear(self) -> None:
+        with self._guard:
+            self._entries.clear()
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """'gzip, br;q=0.8' -> {'gzip': 1.0, 'br': 0.8}; also parses Accept."""
+    result: dict[str, float] = {}
+    for part in header.split(","):
+        token, *params = part.strip().split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        result[token] = q
+    return result
+
+
+def choose_media_type(request: Request, offered: Iterable[str]) -> str:
+    """Best of the offered media types by the Accept header; the first one is the default.
+
+    An exact type beats ``type/*`` which beats ``*/*``; equal q keeps the server order.
+    """
+    offered = list(offered)
+    accepted = parse_accept_encoding(request.headers.get("accept", ""))
+    best, best_q = offered[0], 0.0
+    for media_type in offered:
+        major = media_type.split("/", 1)[0]
+        q = accepted.get(media_type, accepted.get(f"{major}/*", accepted.get("*/*", 0.0)))
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def choose_encoding(request: Request, available: tuple[str, ...] = ("br", "gzip")) -> Optional[str]:
+    accepted = parse_accept_encoding(request.headers.get("accept-encoding", ""))
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Strong comparison of If-None-Match against the base ETag of a payload.
+
+    Encoded representations carry a ``-gz``/``-br`` suffix, so any of them
+    revalidates the same document.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        if candidate.split("-", 1)[0] == etag:
+            return True
+    return False
+
+
+def payload_response(
+    request: Request,
+    payload: CachedPayload,
+    media_type: str,
+    cache_control: str = "no-cache",
+    vary: str = "Accept-Encoding",
+) -> Response:
+    """304 if the client already has this version, otherwise the best encoding it accepts."""
+    headers = {"Cache-Control": cache_control, "Vary": vary}
+
+    if etag_matches(request, payload.etag):
+        headers["ETag"] = f'"{payload.etag}"'
+        return Response(status_code=304, headers=headers)
+
+    available = ("br", "gzip") if payload.br is not None else ("gzip",)
+    encoding = choose_encoding(request, available)
+    if encoding == "br":
+        content, suffix = payload.br, "-br"
+        headers["Content-Encoding"] = "br"
+    elif encoding == "gzip":
+        content, suffix = payload.gzip, "-gz"
+        headers["Content-Encoding"] = "gzip"
+    else:
+        content, suffix = payload.body, ""
+
+    headers["ETag"] = f'"{payload.etag}{suffix}"'
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+def dynamic_response(request: Request, body: bytes, media_type: str) -> Response:
+    """Like payload_response for a body rendered per request: ETag + cheap gzip, no caching."""
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding", "ETag": f'"{etag}"'}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if choose_encoding(request, ("gzip",)) == "gzip":
+        body = gzip.compress(body, compresslevel=6, mtime=0)
+        headers["Content-Encoding"] = "gzip"
+        headers["ETag"] = f'"{etag}-gz"'
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Incrementally gzip a stream of chunks without buffering the whole body."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
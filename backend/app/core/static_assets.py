@@ -0,0 +1,208 @@
+"""Static file serving with precompressed sidecars, content-hashed URLs and ranges.
+
+For ``layer.geojson`` the server looks for ``layer.geojson.br`` and
+``layer.geojson.gz`` next to it (written by ``tools/precompress_maps.py``) and
+sends the best one the client accepts, so nothing is compressed per request.
+A sidecar older than its source is ignored.
+
+Every file is also reachable as ``layer.<hash>.geojson`` where ``<hash>`` is
+the start of the SHA-256 of its content. Such URLs never change meaning, so
+they are served with ``Cache-Control: immutable``; the manifest maps plain
+names to the current hashed ones.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Iterator, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.core.http_cache import choose_encoding, etag_matches
+
+HASH_LENGTH = 12
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+CHUNK_SIZE = 64 * 1024
+
+SIDECARS = {"br": ".br", "gzip": ".gz"}
+_HASHED_NAME = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<suffix>\.[^./]+)$" % HASH_LENGTH)
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Single ``bytes=`` range -> inclusive (start, end); None means the whole file.
+
+    Multi-range requests are answered with the whole file, which RFC 9110 allows.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first == "":
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _file_chunks(path: Path, start: int, length: int) -> Iterator[bytes]:
+    with path.open("rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+class StaticAssets:
+    def __init__(self, root: Path | str) -> None:
+        self.root = Path(root).resolve()
+        # путь -> ((mtime_ns, size), sha256) - хэш пересчитывается только после изменения файла
+        self._digests: dict[Path, tuple[tuple[int, int], str]] = {}
+        self._lock = threading.Lock()
+
+    def _inside(self, relative: str) -> Optional[Path]:
+        candidate = (self.root / relative).resolve()
+        if self.root not in candidate.parents:
+            return None
+        return candidate
+
+    def resolve(self, relative: str) -> tuple[Path, bool]:
+        """(file, requested by hashed name) for a path relative to the root, or 404.
+
+        A hashed name whose hash is not the current content hash is a 404 too:
+        an immutable URL must never serve other bytes.
+        """
+        candidate = self._inside(relative)
+        if candidate is not None and candidate.is_file():
+            return candidate, False
+        head, _, name = relative.rpartition("/")
+        match = _HASHED_NAME.match(name)
+        if match:
+            plain = f"{head}/{match['stem']}{match['suffix']}" if head else f"{match['stem']}{match['suffix']}"
+            source = self._inside(plain)
+            if source is not None and source.is_file() and self.digest(source).startswith(match["hash"]):
+                return source, True
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл не найден")
+
+    def digest(self, path: Path) -> str:
+        st = path.stat()
+        version = (st.st_mtime_ns, st.st_size)
+        cached = self._digests.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        with self._lock:
+            self._digests[path] = (version, h.hexdigest())
+        return h.hexdigest()
+
+    def hashed_name(self, path: Path) -> str:
+        relative = path.relative_to(self.root).as_posix()
+        stem, dot, suffix = relative.rpartition(".")
+        if not dot or "/" in suffix:
+            return f"{relative}.{self.digest(path)[:HASH_LENGTH]}"
+        return f"{stem}.{self.digest(path)[:HASH_LENGTH]}.{suffix}"
+
+    def files(self) -> list[Path]:
+        """Servable files: everything except sidecars and dotfiles."""
+        out = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in sorted(filenames):
+                if name.startswith(".") or any(name.endswith(s) for s in SIDECARS.values()):
+                    continue
+                out.append(Path(dirpath) / name)
+        return out
+
+    def manifest(self) -> dict[str, str]:
+        return {p.relative_to(self.root).as_posix(): self.hashed_name(p) for p in self.files()}
+
+    def sidecar(self, path: Path, encoding: str) -> Optional[Path]:
+        candidate = path.with_name(path.name + SIDECARS[encoding])
+        try:
+            if candidate.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+                return candidate
+        except FileNotFoundError:
+            pass
+        return None
+
+    def response(
+        self,
+        request: Request,
+        relative: str,
+        media_type: Optional[str] = None,
+        vary: str = "Accept-Encoding",
+    ) -> Response:
+        source, hashed = self.resolve(relative)
+        etag = self.digest(source)[:32]
+        headers = {"Cache-Control": IMMUTABLE if hashed else REVALIDATE, "Vary": vary}
+
+        if etag_matches(request, etag):
+            headers["ETag"] = f'"{etag}"'
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        path, suffix = source, ""
+        encoding = None
+        # Диапазоны отдаём только по несжатому файлу: смещения в нём (например, в
+        # индексе FlatGeobuf) клиент считает по исходным байтам.
+        if "range" not in request.headers:
+            available = tuple(enc for enc in SIDECARS if self.sidecar(source, enc) is not None)
+            encoding = choose_encoding(request, available) if available else None
+        if encoding is not None:
+            path = self.sidecar(source, encoding)
+            suffix = "-br" if encoding == "br" else "-gz"
+            headers["Content-Encoding"] = encoding
+        headers["ETag"] = f'"{etag}{suffix}"'
+        headers["Accept-Ranges"] = "bytes"
+
+        if media_type is None:
+            media_type = mimetypes.guess_type(source.name)[0] or "application/octet-stream"
+
+        size = path.stat().st_size
+        byte_range = None
+        if_range = request.headers.get("if-range")
+        if if_range is None or if_range.strip('"') == f"{etag}{suffix}":
+            try:
+                byte_range = parse_range(request.headers.get("range"), size)
+            except RangeNotSatisfiable:
+                headers["Content-Range"] = f"bytes */{size}"
+                return Response(status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE, headers=headers)
+
+        if byte_range is None:
+            start, length, code = 0, size, status.HTTP_200_OK
+        else:
+            start, end = byte_range
+            length, code = end - start + 1, status.HTTP_206_PARTIAL_CONTENT
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(length)
+
+        if request.method == "HEAD":
+            return Response(status_code=code, headers=headers, media_type=media_type)
+        return StreamingResponse(
+            _file_chunks(path, start, length), status_code=code, headers=headers, media_type=media_type
+        )
@@ -0,0 +1,573 @@
+"""FlatGeobuf writer and reader (format version 3).
+
+File layout::
+
+    magic "fgb\\x03fgb\\x00"
+    uint32 size + Header flatbuffer
+    packed Hilbert R-tree (40-byte nodes, node size 16)
+    uint32 size + Feature flatbuffer, repeated
+
+Features are written in Hilbert order of their bbox centres, so a client can
+use the index to fetch only the features of a viewport with HTTP range
+requests, and every feature can be decoded as soon as its bytes arrive.
+
+FlatBuffers have no Python dependency here: ``_Builder`` lays tables out
+front-to-back (vtable, table, then children at higher addresses) which is all
+the schema of this format needs.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, Iterator, Optional
+
+import numpy as np
+
+from app.geo.topojson import compute_bbox
+
+MAGIC = b"fgb\x03fgb\x00"
+NODE_SIZE = 16
+NODE_ITEM = struct.Struct("<ddddQ")
+
+# GeometryType
+GEOMETRY_TYPES = {
+    "Point": 1,
+    "LineString": 2,
+    "Polygon": 3,
+    "MultiPoint": 4,
+    "MultiLineString": 5,
+    "MultiPolygon": 6,
+    "GeometryCollection": 7,
+}
+_GEOMETRY_NAMES = {v: k for k, v in GEOMETRY_TYPES.items()}
+
+# ColumnType
+COL_BOOL, COL_LONG, COL_DOUBLE, COL_STRING, COL_JSON = 2, 7, 10, 11, 12
+
+
+# --- flatbuffers writer ------------------------------------------------------
+
+class _Scalar:
+    __slots__ = ("fmt", "value")
+
+    def __init__(self, fmt: str, value: Any) -> None:
+        self.fmt = fmt
+        self.value = value
+
+
+class _String:
+    __slots__ = ("value",)
+
+    def __init__(self, value: str) -> None:
+        self.value = value.encode("utf-8")
+
+
+class _Vector:
+    """Vector of scalars given as a ready little-endian byte string."""
+
+    __slots__ = ("data", "count", "elem_size")
+
+    def __init__(self, data: bytes, count: int, elem_size: int) -> None:
+        self.data = data
+        self.count = count
+        self.elem_size = elem_size
+
+
+class _Table:
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: dict[int, Any]) -> None:
+        # слот -> _Scalar | _String | _Vector | _Table | list[_Table]
+        self.fields = {k: v for k, v in fields.items() if v is not None}
+
+
+class _Builder:
+    def __init__(self) -> None:
+        self.buf = bytearray()
+
+    def _pad_to(self, alignment: int, offset: int = 0) -> None:
+        while (len(self.buf) + offset) % alignment:
+            self.buf.append(0)
+
+    def _patch_uoffset(self, at: int, target: int) -> None:
+        struct.pack_into("<I", self.buf, at, target - at)
+
+    def finish(self, root: _Table) -> bytes:
+        self.buf += b"\0" * 4
+        self._patch_uoffset(0, self._write_table(root))
+        self._pad_to(4)
+        return bytes(self.buf)
+
+    def _write_child(self, value: Any) -> int:
+        if isinstance(value, _String):
+            self._pad_to(4)
+            pos = len(self.buf)
+            self.buf += struct.pack("<I", len(value.value)) + value.value + b"\0"
+            return pos
+        if isinstance(value, _Vector):
+            # данные вектора выравниваются по размеру элемента, длина - по 4
+            self._pad_to(max(4, value.elem_size), offset=4)
+            pos = len(self.buf)
+            self.buf += struct.pack("<I", value.count) + value.data
+            return pos
+        if isinstance(value, list):
+            self._pad_to(4)
+            pos = len(self.buf)
+            self.buf += struct.pack("<I", len(value)) + b"\0" * (4 * len(value))
+            for i, table in enumerate(value):
+                self._patch_uoffset(pos + 4 + 4 * i, self._write_table(table))
+            return pos
+        if isinstance(value, _Table):
+            return self._write_table(value)
+        raise TypeError(type(value))
+
+    def _write_table(self, table: _Table) -> int:
+        slots = max(table.fields) + 1 if table.fields else 0
+        # раскладка полей: сначала крупные скаляры, ссылки - по 4 байта
+        layout: list[tuple[int, int, Any]] = []
+        for slot, value in table.fields.items():
+            size = struct.calcsize("<" + value.fmt) if isinstance(value, _Scalar) else 4
+            layout.append((size, slot, value))
+        layout.sort(key=lambda item: -item[0])
+
+        offsets: dict[int, int] = {}
+        cursor = 4  # soffset на vtable
+        for size, slot, _ in layout:
+            cursor = (cursor + size - 1) // size * size
+            offsets[slot] = cursor
+            cursor += size
+        table_size = cursor
+
+        self._pad_to(2)
+        vtable_pos = len(self.buf)
+        vtable = [4 + 2 * slots, table_size] + [offsets.get(i, 0) for i in range(slots)]
+        self.buf += struct.pack(f"<{len(vtable)}H", *vtable)
+
+        self._pad_to(8)
+        table_pos = len(self.buf)
+        self.buf += b"\0" * table_size
+        struct.pack_into("<i", self.buf, table_pos, table_pos - vtable_pos)
+
+        children = []
+        for _, slot, value in layout:
+            at = table_pos + offsets[slot]
+            if isinstance(value, _Scalar):
+                struct.pack_into("<" + value.fmt, self.buf, at, value.value)
+            else:
+                children.append((at, value))
+        for at, value in children:
+            self._patch_uoffset(at, self._write_child(value))
+        return table_pos
+
+
+def _doubles(values: np.ndarray) -> _Vector:
+    values = np.ascontiguousarray(values, dtype="<f8").reshape(-1)
+    return _Vector(values.tobytes(), len(values), 8)
+
+
+def _uints(values: list[int]) -> _Vector:
+    return _Vector(struct.pack(f"<{len(values)}I", *values), len(values), 4)
+
+
+# --- geometry ----------------------------------------------------------------
+
+def _xy_with_ends(lines: list) -> tuple[np.ndarray, list[int]]:
+    arrays = [np.asarray(line, dtype=np.float64).reshape(-1, 2)[:, :2] for line in lines]
+    ends, total = [], 0
+    for arr in arrays:
+        total += len(arr)
+        ends.append(total)
+    xy = np.concatenate(arrays) if arrays else np.empty((0, 2))
+    return xy, ends
+
+
+def _geometry_table(geometry: dict, nested: bool = False) -> _Table:
+    gtype = geometry["type"]
+    coords = geometry.get("coordinates")
+    fields: dict[int, Any] = {}
+    # тип обязателен для частей составных геометрий, для корня берётся из заголовка
+    fields[6] = _Scalar("B", GEOMETRY_TYPES[gtype])
+
+    if gtype == "Point":
+        fields[1] = _doubles(np.asarray(coords[:2], dtype=np.float64))
+    elif gtype in ("MultiPoint", "LineString"):
+        fields[1] = _doubles(np.asarray(coords, dtype=np.float64).reshape(-1, 2)[:, :2])
+    elif gtype in ("MultiLineString", "Polygon"):
+        xy, ends = _xy_with_ends(coords)
+        fields[1] = _doubles(xy)
+        if len(ends) > 1:
+            fields[0] = _uints(ends)
+    elif gtype == "MultiPolygon":
+        fields[7] = [_geometry_table({"type": "Polygon", "coordinates": poly}, True) for poly in coords]
+    elif gtype == "GeometryCollection":
+        fields[7] = [_geometry_table(g, True) for g in geometry.get("geometries") or []]
+    return _Table(fields)
+
+
+def _bbox(geometry: Optional[dict]) -> tuple[float, float, float, float]:
+    return compute_bbox([{"geometry": geometry}]) or (0.0, 0.0, 0.0, 0.0)
+
+
+# --- properties --------------------------------------------------------------
+
+def _column_type(values: list[Any]) -> int:
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds:
+        return COL_STRING
+    if kinds == {bool}:
+        return COL_BOOL
+    if kinds <= {int}:
+        return COL_LONG
+    if kinds <= {int, float}:
+        return COL_DOUBLE
+    if kinds == {str}:
+        return COL_STRING
+    return COL_JSON
+
+
+def _encode_properties(props: dict, columns: list[tuple[str, int]]) -> bytes:
+    out = bytearray()
+    for i, (name, ctype) in enumerate(columns):
+        value = props.get(name)
+        if value is None:
+            continue
+        out += struct.pack("<H", i)
+        if ctype == COL_BOOL:
+            out += struct.pack("<B", int(bool(value)))
+        elif ctype == COL_LONG:
+            out += struct.pack("<q", int(value))
+        elif ctype == COL_DOUBLE:
+            out += struct.pack("<d", float(value))
+        else:
+            text = value if ctype == COL_STRING else json.dumps(value, ensure_ascii=False, default=str)
+            raw = str(text).encode("utf-8")
+            out += struct.pack("<I", len(raw)) + raw
+    return bytes(out)
+
+
+# --- Hilbert R-tree ----------------------------------------------------------
+
+def _hilbert(x: int, y: int) -> int:
+    a = x ^ y
+    b = 0xFFFF ^ a
+    c = 0xFFFF ^ (x | y)
+    d = x & (y ^ 0xFFFF)
+
+    A = a | (b >> 1)
+    B = (a >> 1) ^ a
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 2)) ^ (b & (b >> 2))
+    B = (a & (b >> 2)) ^ (b & ((a ^ b) >> 2))
+    C ^= (a & (c >> 2)) ^ (b & (d >> 2))
+    D ^= (b & (c >> 2)) ^ ((a ^ b) & (d >> 2))
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 4)) ^ (b & (b >> 4))
+    B = (a & (b >> 4)) ^ (b & ((a ^ b) >> 4))
+    C ^= (a & (c >> 4)) ^ (b & (d >> 4))
+    D ^= (b & (c >> 4)) ^ ((a ^ b) & (d >> 4))
+
+    a, b, c, d = A, B, C, D
+    C ^= (a & (c >> 8)) ^ (b & (d >> 8))
+    D ^= (b & (c >> 8)) ^ ((a ^ b) & (d >> 8))
+
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+
+    i0 = x ^ y
+    i1 = b | (0xFFFF ^ (i0 | a))
+
+    i0 = (i0 | (i0 << 8)) & 0x00FF00FF
+    i0 = (i0 | (i0 << 4)) & 0x0F0F0F0F
+    i0 = (i0 | (i0 << 2)) & 0x33333333
+    i0 = (i0 | (i0 << 1)) & 0x55555555
+
+    i1 = (i1 | (i1 << 8)) & 0x00FF00FF
+    i1 = (i1 | (i1 << 4)) & 0x0F0F0F0F
+    i1 = (i1 | (i1 << 2)) & 0x33333333
+    i1 = (i1 | (i1 << 1)) & 0x55555555
+
+    return ((i1 << 1) | i0) & 0xFFFFFFFF
+
+
+def _level_bounds(num_items: int, node_size: int) -> list[tuple[int, int]]:
+    n = num_items
+    num_nodes = n
+    level_num_nodes = [n]
+    while True:
+        n = (n + node_size - 1) // node_size
+        num_nodes += n
+        level_num_nodes.append(n)
+        if n == 1:
+            break
+    bounds = []
+    n = num_nodes
+    for size in level_num_nodes:
+        bounds.append((n - size, n))
+        n -= size
+    return bounds
+
+
+def _build_index(boxes: list[tuple[float, float, float, float]], offsets: list[int]) -> bytes:
+    """Packed R-tree over features already sorted in Hilbert order."""
+    bounds = _level_bounds(len(boxes), NODE_SIZE)
+    num_nodes = bounds[0][1]
+    nodes: list[Optional[tuple[float, float, float, float, int]]] = [None] * num_nodes
+    leaf_start = bounds[0][0]
+    for i, (box, off) in enumerate(zip(boxes, offsets)):
+        nodes[leaf_start + i] = (*box, off)
+
+    for level in range(len(bounds) - 1):
+        pos, end = bounds[level]
+        newpos = bounds[level + 1][0]
+        while pos < end:
+            first = pos
+            x0 = y0 = float("inf")
+            x1 = y1 = float("-inf")
+            for _ in range(NODE_SIZE):
+                if pos >= end:
+                    break
+                nx0, ny0, nx1, ny1, _off = nodes[pos]
+                x0, y0, x1, y1 = min(x0, nx0), min(y0, ny0), max(x1, nx1), max(y1, ny1)
+                pos += 1
+            nodes[newpos] = (x0, y0, x1, y1, first)
+            newpos += 1
+
+    return b"".join(NODE_ITEM.pack(*node) for node in nodes)
+
+
+# --- public API --------------------------------------------------------------
+
+def encode(features: list[dict], name: str = "", crs_code: int = 4326) -> bytes:
+    """Encode GeoJSON Features as an indexed FlatGeobuf file."""
+    features = [f for f in features if f.get("geometry")]
+
+    column_names: list[str] = []
+    for f in features:
+        for k in f.get("properties") or {}:
+            if k not in column_names:
+                column_names.append(k)
+    columns = [
+        (col, _column_type([(f.get("properties") or {}).get(col) for f in features]))
+        for col in column_names
+    ]
+
+    types = {f["geometry"]["type"] for f in features}
+    geometry_type = GEOMETRY_TYPES[types.pop()] if len(types) == 1 else 0
+
+    boxes = [_bbox(f["geometry"]) for f in features]
+    if boxes:
+        ext = (
+            min(b[0] for b in boxes),
+            min(b[1] for b in boxes),
+            max(b[2] for b in boxes),
+            max(b[3] for b in boxes),
+        )
+    else:
+        ext = (0.0, 0.0, 0.0, 0.0)
+
+    # порядок Гильберта по центрам рамок, как в эталонной реализации (по убыванию)
+    w = (ext[2] - ext[0]) or 1.0
+    h = (ext[3] - ext[1]) or 1.0
+    hmax = (1 << 16) - 1
+
+    def hilbert_key(i: int) -> int:
+        x0, y0, x1, y1 = boxes[i]
+        hx = int(hmax * ((x0 + x1) / 2 - ext[0]) / w)
+        hy = int(hmax * ((y0 + y1) / 2 - ext[1]) / h)
+        return _hilbert(hx, hy)
+
+    order = sorted(range(len(features)), key=hilbert_key, reverse=True)
+
+    column_tables = [_Table({0: _String(col), 1: _Scalar("B", ctype)}) for col, ctype in columns]
+    header = _Table({
+        0: _String(name) if name else None,
+        1: _doubles(np.asarray(ext)),
+        2: _Scalar("B", geometry_type) if geometry_type else None,
+        7: column_tables or None,
+        8: _Scalar("Q", len(features)),
+        10: _Table({0: _String("EPSG"), 1: _Scalar("i", crs_code)}),
+    })
+    header_bytes = _Builder().finish(header)
+
+    feature_blobs = []
+    offsets = []
+    offset = 0
+    for i in order:
+        f = features[i]
+        geom = _geometry_table(f["geometry"])
+        props = _encode_properties(f.get("properties") or {}, columns)
+        table = _Table({
+            0: geom,
+            1: _Vector(props, len(props), 1) if props else None,
+        })
+        blob = _Builder().finish(table)
+        offsets.append(offset)
+        feature_blobs.append(struct.pack("<I", len(blob)) + blob)
+        offset += 4 + len(blob)
+
+    index = _build_index([boxes[i] for i in order], offsets) if features else b""
+    return b"".join(
+        [MAGIC, struct.pack("<I", len(header_bytes)), header_bytes, index, *feature_blobs]
+    )
+
+
+# --- reader ------------------------------------------------------------------
+
+class _Reader:
+    """Minimal FlatBuffers table accessor over a memoryview."""
+
+    __slots__ = ("buf", "pos", "vtable", "vsize")
+
+    def __init__(self, buf: memoryview, pos: int) -> None:
+        self.buf = buf
+        self.pos = pos
+        self.vtable = pos - struct.unpack_from("<i", buf, pos)[0]
+        self.vsize = struct.unpack_from("<H", buf, self.vtable)[0]
+
+    @classmethod
+    def root(cls, buf: memoryview) -> "_Reader":
+        return cls(buf, struct.unpack_from("<I", buf, 0)[0])
+
+    def _field(self, slot: int) -> int:
+        vo = 4 + 2 * slot
+        if vo >= self.vsize:
+            return 0
+        return struct.unpack_from("<H", self.buf, self.vtable + vo)[0]
+
+    def scalar(self, slot: int, fmt: str, default: Any = 0) -> Any:
+        off = self._field(slot)
+        return struct.unpack_from("<" + fmt, self.buf, self.pos + off)[0] if off else default
+
+    def _target(self, slot: int) -> Optional[int]:
+        off = self._field(slot)
+        if not off:
+            return None
+        at = self.pos + off
+        return at + struct.unpack_from("<I", self.buf, at)[0]
+
+    def string(self, slot: int) -> Optional[str]:
+        at = self._target(slot)
+        if at is None:
+            return None
+        n = struct.unpack_from("<I", self.buf, at)[0]
+        return bytes(self.buf[at + 4 : at + 4 + n]).decode("utf-8")
+
+    def array(self, slot: int, dtype: str) -> Optional[np.ndarray]:
+        at = self._target(slot)
+        if at is None:
+            return None
+        n = struct.unpack_from("<I", self.buf, at)[0]
+        return np.frombuffer(self.buf, dtype=dtype, count=n, offset=at + 4)
+
+    def table(self, slot: int) -> Optional["_Reader"]:
+        at = self._target(slot)
+        return None if at is None else _Reader(self.buf, at)
+
+    def tables(self, slot: int) -> list["_Reader"]:
+        at = self._target(slot)
+        if at is None:
+            return []
+        n = struct.unpack_from("<I", self.buf, at)[0]
+        out = []
+        for i in range(n):
+            el = at + 4 + 4 * i
+            out.append(_Reader(self.buf, el + struct.unpack_from("<I", self.buf, el)[0]))
+        return out
+
+
+def _split(xy: np.ndarray, ends: Optional[np.ndarray]) -> list:
+    pts = xy.reshape(-1, 2)
+    if ends is None or len(ends) == 0:
+        return [pts.tolist()]
+    out, start = [], 0
+    for end in ends.tolist():
+        out.append(pts[start:end].tolist())
+        start = end
+    return out
+
+
+def _read_geometry(g: _Reader, gtype: int) -> dict:
+    gtype = g.scalar(6, "B", gtype) or gtype
+    name = _GEOMETRY_NAMES.get(gtype)
+    if name == "MultiPolygon":
+        return {"type": name, "coordinates": [_read_geometry(p, 3)["coordinates"] for p in g.tables(7)]}
+    if name == "GeometryCollection":
+        return {"type": name, "geometries": [_read_geometry(p, 0) for p in g.tables(7)]}
+    xy = g.array(1, "<f8")
+    xy = np.empty(0) if xy is None else xy
+    if name == "Point":
+        return {"type": name, "coordinates": xy[:2].tolist()}
+    if name in ("MultiPoint", "LineString"):
+        return {"type": name, "coordinates": xy.reshape(-1, 2).tolist()}
+    lines = _split(xy, g.array(0, "<u4"))
+    if name == "MultiLineString":
+        return {"type": name, "coordinates": lines}
+    if name == "Polygon":
+        return {"type": name, "coordinates": lines}
+    raise ValueError(f"unsupported geometry type {gtype}")
+
+
+def _read_properties(raw: np.ndarray, columns: list[tuple[str, int]]) -> dict:
+    data = raw.tobytes()
+    props: dict[str, Any] = {}
+    pos = 0
+    while pos < len(data):
+        (i,) = struct.unpack_from("<H", data, pos)
+        pos += 2
+        name, ctype = columns[i]
+        if ctype == COL_BOOL:
+            props[name] = bool(data[pos])
+            pos += 1
+        elif ctype == COL_LONG:
+            props[name] = struct.unpack_from("<q", data, pos)[0]
+            pos += 8
+        elif ctype == COL_DOUBLE:
+            props[name] = struct.unpack_from("<d", data, pos)[0]
+            pos += 8
+        else:
+            (n,) = struct.unpack_from("<I", data, pos)
+            text = data[pos + 4 : pos + 4 + n].decode("utf-8")
+            props[name] = text if ctype == COL_STRING else json.loads(text)
+            pos += 4 + n
+    return props
+
+
+def iter_features(data: bytes) -> Iterator[dict]:
+    """Decode features one by one - usable on a partially received file."""
+    if data[:3] != MAGIC[:3]:
+        raise ValueError("not a FlatGeobuf file")
+    buf = memoryview(data)
+    pos = 8
+    (header_size,) = struct.unpack_from("<I", buf, pos)
+    header = _Reader.root(buf[pos + 4 : pos + 4 + header_size])
+    pos += 4 + header_size
+
+    geometry_type = header.scalar(2, "B", 0)
+    count = header.scalar(8, "Q", 0)
+    node_size = header.scalar(9, "H", NODE_SIZE)
+    columns = [(c.string(0), c.scalar(1, "B", 0)) for c in header.tables(7)]
+
+    if node_size > 0 and count > 0:
+        bounds = _level_bounds(count, node_size)
+        pos += bounds[0][1] * NODE_ITEM.size
+
+    while pos + 4 <= len(buf):
+        (size,) = struct.unpack_from("<I", buf, pos)
+        feature = _Reader.root(buf[pos + 4 : pos + 4 + size])
+        pos += 4 + size
+        geom = feature.table(0)
+        props_raw = feature.array(1, "u1")
+        yield {
+            "type": "Feature",
+            "properties": _read_properties(props_raw, columns) if props_raw is not None else {},
+            "geometry": _read_geometry(geom, geometry_type) if geom is not None else None,
+        }
+
+
+def decode(data: bytes) -> dict:
+    return {"type": "FeatureCollection", "features": list(iter_features(data))}
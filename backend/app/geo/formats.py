@@ -0,0 +1,35 @@
+"""Binary encodings of feature layers that the map endpoints can negotiate."""
+
+from __future__ import annotations
+
+from typing import Callable
+
+from app.geo import flatgeobuf, geobuf
+
+GEOJSON_MEDIA_TYPE = "application/geo+json"
+FLATGEOBUF_MEDIA_TYPE = "application/flatgeobuf"
+GEOBUF_MEDIA_TYPE = "application/x-protobuf"
+
+# формат -> (media type, кодировщик списка Feature)
+BINARY_FORMATS: dict[str, tuple[str, Callable[[list[dict], str], bytes]]] = {
+    "fgb": (FLATGEOBUF_MEDIA_TYPE, lambda features, name: flatgeobuf.encode(features, name=name)),
+    "geobuf": (GEOBUF_MEDIA_TYPE, lambda features, name: geobuf.encode(features)),
+}
+
+# Что понимаем в Accept; первый вариант - ответ по умолчанию.
+NEGOTIABLE_MEDIA_TYPES = {
+    GEOJSON_MEDIA_TYPE: "geojson",
+    "application/json": "geojson",
+    FLATGEOBUF_MEDIA_TYPE: "fgb",
+    GEOBUF_MEDIA_TYPE: "geobuf",
+    "application/geobuf": "geobuf",
+}
+
+
+def encode_features(features: list[dict], fmt: str, name: str = "") -> bytes:
+    _, encoder = BINARY_FORMATS[fmt]
+    return encoder(features, name)
+
+
+def media_type_of(fmt: str) -> str:
+    return BINARY_FORMATS[fmt][0] if fmt in BINARY_FORMATS else GEOJSON_MEDIA_TYPE
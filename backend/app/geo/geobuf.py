@@ -0,0 +1,369 @@
+"""Geobuf (protobuf-encoded GeoJSON) writer and reader.
+
+Wire format of https://github.com/mapbox/geobuf (``geobuf.proto``): property
+keys are stored once per document, coordinates as zigzag varints scaled by
+``10**precision`` and delta-encoded within every line/ring, with closing ring
+points omitted. Output is byte-compatible with the reference JS encoder for
+the same precision.
+
+The reader decodes packed varint arrays with NumPy, which keeps decoding of
+large polygon layers fast even in pure Python.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+GEOMETRY_TYPES = (
+    "Point",
+    "MultiPoint",
+    "LineString",
+    "MultiLineString",
+    "Polygon",
+    "MultiPolygon",
+    "GeometryCollection",
+)
+_TYPE_CODE = {name: i for i, name in enumerate(GEOMETRY_TYPES)}
+
+DEFAULT_PRECISION = 6
+
+_VARINT, _FIXED64, _BYTES = 0, 1, 2
+
+
+# --- protobuf primitives -----------------------------------------------------
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes_field(field: int, payload: bytes) -> bytes:
+    return _key(field, _BYTES) + _varint(len(payload)) + payload
+
+
+def _varint_field(field: int, value: int) -> bytes:
+    return _key(field, _VARINT) + _varint(value)
+
+
+def _packed_varints(field: int, values: Iterable[int]) -> bytes:
+    return _bytes_field(field, b"".join(_varint(v) for v in values))
+
+
+def _packed_sint64(field: int, values: np.ndarray) -> bytes:
+    return _bytes_field(field, _encode_varints(_zigzag_np(values)))
+
+
+def _zigzag_np(values: np.ndarray) -> np.ndarray:
+    v = values.astype(np.int64)
+    return ((v << 1) ^ (v >> 63)).astype(np.uint64)
+
+
+def _encode_varints(values: np.ndarray) -> bytes:
+    """Vectorized LEB128 encoding of an array of uint64."""
+    if len(values) == 0:
+        return b""
+    values = values.astype(np.uint64)
+    # число 7-битных групп на значение
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += values >= (np.uint64(1) << np.uint64(7 * k))
+
+    total = int(nbytes.sum())
+    out = np.empty(total, dtype=np.uint8)
+    starts = np.concatenate(([0], np.cumsum(nbytes)[:-1]))
+    max_len = int(nbytes.max())
+    for k in range(max_len):
+        has = nbytes > k
+        group = (values[has] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        cont = (nbytes[has] > k + 1).astype(np.uint8) << 7
+        out[starts[has] + k] = group.astype(np.uint8) | cont
+    return out.tobytes()
+
+
+# --- encoder -----------------------------------------------------------------
+
+def _encode_value(value: Any) -> bytes:
+    if isinstance(value, bool):
+        return _varint_field(5, int(value))
+    if isinstance(value, str):
+        return _bytes_field(1, value.encode("utf-8"))
+    if isinstance(value, int):
+        if value >= 0:
+            return _varint_field(3, value)
+        return _varint_field(4, -value)
+    if isinstance(value, float) and math.isfinite(value):
+        if value.is_integer() and abs(value) < 2**53:
+            return _encode_value(int(value))
+        return _key(2, _FIXED64) + struct.pack("<d", value)
+    return _bytes_field(6, json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _scaled(line: Iterable[Iterable[float]], e: float, closed: bool) -> np.ndarray:
+    arr = np.asarray(line, dtype=np.float64).reshape(-1, 2) if line else np.empty((0, 2))
+    if closed and len(arr):
+        arr = arr[:-1]
+    return np.round(arr * e).astype(np.int64)
+
+
+def _delta(points: np.ndarray) -> np.ndarray:
+    if len(points) == 0:
+        return points.reshape(-1)
+    d = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    return d.reshape(-1)
+
+
+def _encode_geometry(geometry: dict, e: float) -> bytes:
+    gtype = geometry["type"]
+    out = [_varint_field(1, _TYPE_CODE[gtype])]
+    coords = geometry.get("coordinates")
+
+    if gtype == "GeometryCollection":
+        for g in geometry.get("geometries") or []:
+            out.append(_bytes_field(4, _encode_geometry(g, e)))
+    elif gtype == "Point":
+        out.append(_packed_sint64(3, _scaled([coords], e, False).reshape(-1)))
+    elif gtype in ("MultiPoint", "LineString"):
+        out.append(_packed_sint64(3, _delta(_scaled(coords, e, False))))
+    elif gtype in ("MultiLineString", "Polygon"):
+        closed = gtype == "Polygon"
+        lines = [_scaled(line, e, closed) for line in coords]
+        if len(lines) != 1:
+            out.append(_packed_varints(2, (len(line) for line in lines)))
+        out.append(_packed_sint64(3, np.concatenate([_delta(l) for l in lines]) if lines else np.empty(0)))
+    elif gtype == "MultiPolygon":
+        rings = []
+        if len(coords) != 1 or len(coords[0]) != 1:
+            lengths = [len(coords)]
+            for poly in coords:
+                lengths.append(len(poly))
+                lengths.extend(max(len(ring) - 1, 0) for ring in poly)
+            out.append(_packed_varints(2, lengths))
+        for poly in coords:
+            rings.extend(_delta(_scaled(ring, e, True)) for ring in poly)
+        out.append(_packed_sint64(3, np.concatenate(rings) if rings else np.empty(0)))
+    return b"".join(out)
+
+
+def _encode_feature(feature: dict, keys: dict[str, int], e: float) -> bytes:
+    out = []
+    geometry = feature.get("geometry")
+    if geometry:
+        out.append(_bytes_field(1, _encode_geometry(geometry, e)))
+
+    fid = feature.get("id")
+    if isinstance(fid, int) and not isinstance(fid, bool):
+        out.append(_varint_field(12, _zigzag(fid)))
+    elif fid is not None:
+        out.append(_bytes_field(11, str(fid).encode("utf-8")))
+
+    pairs = []
+    for i, (k, v) in enumerate((feature.get("properties") or {}).items()):
+        out.append(_bytes_field(13, _encode_value(v)))
+        pairs.extend((keys[k], i))
+    if pairs:
+        out.append(_packed_varints(14, pairs))
+    return b"".join(out)
+
+
+def encode(features: list[dict], precision: int = DEFAULT_PRECISION) -> bytes:
+    """Encode a list of GeoJSON Features as a Geobuf FeatureCollection."""
+    keys: dict[str, int] = {}
+    for feature in features:
+        for k in feature.get("properties") or {}:
+            keys.setdefault(k, len(keys))
+
+    e = float(10**precision)
+    out = [_bytes_field(1, k.encode("utf-8")) for k in keys]
+    if precision != DEFAULT_PRECISION:
+        out.append(_varint_field(3, precision))
+    fc = b"".join(_bytes_field(1, _encode_feature(f, keys, e)) for f in features)
+    out.append(_bytes_field(4, fc))
+    return b"".join(out)
+
+
+# --- decoder -----------------------------------------------------------------
+
+def _read_varint(buf: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _fields(buf: bytes, start: int = 0, end: Optional[int] = None):
+    pos, end = start, len(buf) if end is None else end
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        field, wire = key >> 3, key & 7
+        if wire == _VARINT:
+            value, pos = _read_varint(buf, pos)
+            yield field, wire, value
+        elif wire == _FIXED64:
+            yield field, wire, buf[pos : pos + 8]
+            pos += 8
+        elif wire == _BYTES:
+            length, pos = _read_varint(buf, pos)
+            yield field, wire, (pos, pos + length)
+            pos += length
+        elif wire == 5:
+            yield field, wire, buf[pos : pos + 4]
+            pos += 4
+        else:
+            raise ValueError(f"unsupported wire type {wire}")
+
+
+def _decode_varints(data: bytes) -> np.ndarray:
+    """Vectorized LEB128 decoding of a packed field into uint64."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return np.empty(0, dtype=np.uint64)
+    ends = np.nonzero(raw < 0x80)[0]
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+    values = np.zeros(len(ends), dtype=np.uint64)
+    payload = (raw & 0x7F).astype(np.uint64)
+    for k in range(int(lengths.max())):
+        has = lengths > k
+        values[has] |= payload[starts[has] + k] << np.uint64(7 * k)
+    return values
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    v = values.astype(np.uint64)
+    return (v >> np.uint64(1)).astype(np.int64) ^ -(v & np.uint64(1)).astype(np.int64)
+
+
+def _line(deltas: np.ndarray, e: float, closed: bool) -> list:
+    pts = np.cumsum(deltas.reshape(-1, 2), axis=0) / e
+    out = pts.tolist()
+    if closed and out:
+        out.append(out[0])
+    return out
+
+
+def _decode_geometry(buf: bytes, start: int, end: int, e: float) -> dict:
+    gtype = 0
+    lengths: Optional[list[int]] = None
+    coords = np.empty(0, dtype=np.int64)
+    parts = []
+    for field, _, value in _fields(buf, start, end):
+        if field == 1:
+            gtype = value
+        elif field == 2:
+            lengths = _decode_varints(buf[value[0] : value[1]]).astype(np.int64).tolist()
+        elif field == 3:
+            coords = _unzigzag(_decode_varints(buf[value[0] : value[1]]))
+        elif field == 4:
+            parts.append(_decode_geometry(buf, value[0], value[1], e))
+
+    name = GEOMETRY_TYPES[gtype]
+    if name == "GeometryCollection":
+        return {"type": name, "geometries": parts}
+    if name == "Point":
+        return {"type": name, "coordinates": (coords / e).tolist()}
+    if name in ("MultiPoint", "LineString"):
+        return {"type": name, "coordinates": _line(coords, e, False)}
+
+    closed = name in ("Polygon", "MultiPolygon")
+    if name in ("MultiLineString", "Polygon"):
+        if lengths is None:
+            return {"type": name, "coordinates": [_line(coords, e, closed)]}
+        lines, pos = [], 0
+        for n in lengths:
+            lines.append(_line(coords[pos : pos + 2 * n], e, closed))
+            pos += 2 * n
+        return {"type": name, "coordinates": lines}
+
+    # MultiPolygon
+    if lengths is None:
+        return {"type": name, "coordinates": [[_line(coords, e, True)]]}
+    polys, pos, li = [], 0, 1
+    for _ in range(lengths[0]):
+        rings = []
+        ring_count = lengths[li]
+        li += 1
+        for _ in range(ring_count):
+            n = lengths[li]
+            li += 1
+            rings.append(_line(coords[pos : pos + 2 * n], e, True))
+            pos += 2 * n
+        polys.append(rings)
+    return {"type": name, "coordinates": polys}
+
+
+def _decode_value(buf: bytes, start: int, end: int) -> Any:
+    for field, _, value in _fields(buf, start, end):
+        if field in (1, 6):
+            text = buf[value[0] : value[1]].decode("utf-8")
+            return text if field == 1 else json.loads(text)
+        if field == 2:
+            return struct.unpack("<d", value)[0]
+        if field == 3:
+            return value
+        if field == 4:
+            return -value
+        if field == 5:
+            return bool(value)
+    return None
+
+
+def _decode_feature(buf: bytes, start: int, end: int, keys: list[str], e: float) -> dict:
+    feature: dict[str, Any] = {"type": "Feature", "properties": {}, "geometry": None}
+    values: list[Any] = []
+    pairs: list[int] = []
+    for field, _, value in _fields(buf, start, end):
+        if field == 1:
+            feature["geometry"] = _decode_geometry(buf, value[0], value[1], e)
+        elif field == 11:
+            feature["id"] = buf[value[0] : value[1]].decode("utf-8")
+        elif field == 12:
+            feature["id"] = (value >> 1) ^ -(value & 1)
+        elif field == 13:
+            values.append(_decode_value(buf, value[0], value[1]))
+        elif field == 14:
+            pairs = _decode_varints(buf[value[0] : value[1]]).astype(np.int64).tolist()
+    for i in range(0, len(pairs), 2):
+        feature["properties"][keys[pairs[i]]] = values[pairs[i + 1]]
+    return feature
+
+
+def decode(buf: bytes) -> dict:
+    """Decode a Geobuf FeatureCollection back to a GeoJSON dict."""
+    keys: list[str] = []
+    precision = DEFAULT_PRECISION
+    fc_range = None
+    for field, _, value in _fields(buf):
+        if field == 1:
+            keys.append(buf[value[0] : value[1]].decode("utf-8"))
+        elif field == 3:
+            precision = value
+        elif field == 4:
+            fc_range = value
+    e = float(10**precision)
+    features = []
+    if fc_range is not None:
+        for field, _, value in _fields(buf, *fc_range):
+            if field == 1:
+                features.append(_decode_feature(buf, value[0], value[1], keys, e))
+    return {"type": "FeatureCollection", "features": features}
@@ -0,0 +1,29 @@
+"""Small helpers for GeoJSON documents of any of the shapes found under ``maps/``."""
+
+from __future__ import annotations
+
+from typing import Any
+
+GEOMETRY_TYPES = {
+    "Point",
+    "MultiPoint",
+    "LineString",
+    "MultiLineString",
+    "Polygon",
+    "MultiPolygon",
+    "GeometryCollection",
+}
+
+
+def as_features(data: Any) -> list[dict]:
+    """FeatureCollection, single Feature or bare geometry -> list of Features."""
+    if not isinstance(data, dict):
+        raise ValueError("GeoJSON must be an object")
+    gtype = data.get("type")
+    if gtype == "FeatureCollection":
+        return [f for f in data.get("features") or [] if isinstance(f, dict)]
+    if gtype == "Feature":
+        return [data]
+    if gtype in GEOMETRY_TYPES:
+        return [{"type": "Feature", "properties": {}, "geometry": data}]
+    raise ValueError(f"Unsupported GeoJSON type: {gtype}")
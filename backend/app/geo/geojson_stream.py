@@ -0,0 +1,187 @@
+"""Constant-memory GeoJSON reading and writing.
+
+``FeatureReader`` walks a FeatureCollection in a byte stream and yields its
+features one at a time: only the feature being decoded is held in memory,
+whatever the size of the file. Other top-level members (``name``, ``crs``...)
+are collected into ``reader.members``. A single Feature or a bare geometry is
+accepted too and yields one feature.
+
+``FeatureCollectionWriter`` writes features as they come into a temp file next
+to the target and moves it into place on close, so a tool may rewrite the very
+file it is reading and an interrupted run leaves the old file intact.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, Union
+
+from app.geo.geojson import as_features
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\n\r"
+
+
+class FeatureReader:
+    def __init__(self, fp: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.members: dict[str, Any] = {}
+
+    # --- buffer ---
+
+    def _fill(self, size: int) -> bool:
+        if self._eof:
+            return False
+        data = self._fp.read(size)
+        if not data:
+            self._eof = True
+            self._buf = self._buf[self._pos :] + self._decoder.decode(b"", final=True)
+        else:
+            self._buf = self._buf[self._pos :] + self._decoder.decode(data)
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at the end)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(self._chunk_size):
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        ch = self._peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"GeoJSON: expected one of {chars!r}, got {ch or 'end of input'!r}")
+        self._pos += 1
+        return ch
+
+    def _value(self) -> Any:
+        """Decode the next JSON value, reading more input until it is complete.
+
+        Every failed attempt reads at least as much again as is buffered, so a
+        huge single feature costs O(n) parsing, not O(n^2).
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(max(self._chunk_size, len(self._buf) - self._pos)):
+                    raise
+                continue
+            if end == len(self._buf) and not self._eof:
+                # число на границе чанка могло быть обрезано - дочитываем и повторяем
+                if self._fill(self._chunk_size):
+                    continue
+            self._pos = end
+            return value
+
+    # --- document ---
+
+    def __iter__(self) -> Iterator[dict]:
+        self._expect("{")
+        seen_features = False
+        if self._peek() == "}":
+            self._pos += 1
+        else:
+            while True:
+                key = self._value()
+                if not isinstance(key, str):
+                    raise ValueError("GeoJSON: object key must be a string")
+                self._expect(":")
+                if key == "features":
+                    seen_features = True
+                    yield from self._features()
+                else:
+                    self.members[key] = self._value()
+                if self._expect(",}") == "}":
+                    break
+
+        if not seen_features:
+            yield from as_features(self.members)
+            self.members = {}
+
+    def _features(self) -> Iterator[dict]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            feature = self._value()
+            if isinstance(feature, dict):
+                yield feature
+            if self._expect(",]") == "]":
+                return
+
+
+def iter_features(path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    with open(path, "rb") as f:
+        yield from FeatureReader(f, chunk_size)
+
+
+class FeatureCollectionWriter:
+    """Streaming ``FeatureCollection`` writer with an atomic replace on close."""
+
+    def __init__(self, path: Union[str, Path], members: Optional[dict[str, Any]] = None) -> None:
+        self.path = Path(path)
+        self.count = 0
+        fd, self._tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        self._f = os.fdopen(fd, "w", encoding="utf-8", newline="\n")
+        self._f.write('{"type":"FeatureCollection",')
+        for key, value in (members or {}).items():
+            self._write_member(key, value)
+        self._f.write('"features":[\n')
+
+    def _write_member(self, key: str, value: Any) -> None:
+        if key in ("type", "features"):
+            return
+        self._f.write(f"{_dumps(key)}:{_dumps(value)},")
+
+    def write(self, feature: dict) -> None:
+        if self.count:
+            self._f.write(",\n")
+        self._f.write(_dumps(feature))
+        self.count += 1
+
+    def close(self, members: Optional[dict[str, Any]] = None) -> None:
+        """Finish the document; ``members`` are appended after the features."""
+        self._f.write("\n]")
+        for key, value in (members or {}).items():
+            if key not in ("type", "features"):
+                self._f.write(f",{_dumps(key)}:{_dumps(value)}")
+        self._f.write("}\n")
+        self._f.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        self._f.close()
+        try:
+            os.unlink(self._tmp)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "FeatureCollectionWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+        elif not self._f.closed:
+            self.close()
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
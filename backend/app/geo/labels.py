@@ -0,0 +1,338 @@
+"""Centroids and label points for polygon layers, computed with NumPy.
+
+``centroids`` handles a whole layer at once: all ring vertices are flattened
+into one array and the shoelace sums are reduced per ring and then per
+feature, so the cost is a handful of array operations for any feature count.
+
+``label_points`` finds the pole of inaccessibility - the interior point
+farthest from the boundary - which, unlike the centroid or the bbox centre,
+is always inside the polygon, concave or not. It is the polylabel algorithm
+run for all features together and level by level: polygons are grouped by
+edge count (padded to a power of two with zero-length edges, which change
+neither distances nor crossing parity), every subdivision level of every
+feature in a group is measured in one cells x edges matrix, and cells that
+cannot beat their feature's best distance by more than the precision are
+pruned before splitting. For a MultiPolygon the label goes into its largest
+part.
+
+``layer_labels`` combines both for a list of features and can spread the
+label search over a process pool.
+"""
+
+from __future__ import annotations
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+import numpy as np
+
+Point = tuple[float, float]
+# кольца полигона как массивы (n, 2) без повтора первой точки; первое - внешнее
+Rings = list[np.ndarray]
+
+# Точность поиска - доля от большей стороны рамки полигона.
+DEFAULT_RELATIVE_PRECISION = 1e-2
+MAX_MATRIX_ELEMENTS = 4_000_000
+MIN_BUCKET_EDGES = 16
+# Меньше стольких объектов на процесс пул не окупается.
+MIN_FEATURES_PER_WORKER = 256
+
+_SQRT2 = math.sqrt(2)
+
+
+def _ring_array(ring) -> Optional[np.ndarray]:
+    try:
+        arr = np.asarray(ring, dtype=np.float64)
+    except ValueError:
+        return None
+    if arr.ndim != 2 or arr.shape[0] == 0 or arr.shape[1] < 2:
+        return None
+    arr = arr[:, :2]
+    if len(arr) > 1 and arr[0, 0] == arr[-1, 0] and arr[0, 1] == arr[-1, 1]:
+        arr = arr[:-1]
+    return arr
+
+
+def _polygons(geometry: Optional[dict]) -> list[Rings]:
+    if not geometry:
+        return []
+    gtype = geometry.get("type")
+    coords = geometry.get("coordinates") or []
+    if gtype == "Polygon":
+        parts = [coords]
+    elif gtype == "MultiPolygon":
+        parts = coords
+    elif gtype == "GeometryCollection":
+        return [p for g in geometry.get("geometries") or [] for p in _polygons(g)]
+    else:
+        return []
+    out = []
+    for part in parts:
+        rings = [_ring_array(ring) for ring in part or []]
+        if rings and rings[0] is not None:
+            out.append([r for r in rings if r is not None])
+    return out
+
+
+def _area(ring: np.ndarray) -> float:
+    x, y = ring[:, 0], ring[:, 1]
+    return abs(float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))) / 2
+
+
+def _centroids(polygon_lists: Sequence[list[Rings]]) -> list[Optional[Point]]:
+    rings: list[np.ndarray] = []
+    owner: list[int] = []
+    sign: list[float] = []
+    for i, polygons in enumerate(polygon_lists):
+        for polygon in polygons:
+            for k, ring in enumerate(polygon):
+                rings.append(ring)
+                owner.append(i)
+                sign.append(1.0 if k == 0 else -1.0)
+
+    n = len(polygon_lists)
+    result: list[Optional[Point]] = [None] * n
+    if not rings:
+        return result
+
+    lengths = np.fromiter((len(r) for r in rings), dtype=np.int64, count=len(rings))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    xy = np.concatenate(rings)
+    # суммы считаются от первой вершины кольца: без сокращения больших координат
+    origin = np.repeat(xy[starts], lengths, axis=0)
+    x, y = xy[:, 0] - origin[:, 0], xy[:, 1] - origin[:, 1]
+    nxt = np.arange(1, len(xy) + 1)
+    nxt[starts + lengths - 1] = starts
+    x1, y1 = x[nxt], y[nxt]
+
+    cross = x * y1 - x1 * y
+    area2 = np.add.reduceat(cross, starts)
+    cx6 = np.add.reduceat((x + x1) * cross, starts)
+    cy6 = np.add.reduceat((y + y1) * cross, starts)
+
+    # ориентация колец в GeoJSON не гарантирована: вес = |площадь| со знаком дырки
+    weight = np.asarray(sign) * np.abs(area2) / 2
+    safe = np.where(area2 != 0, area2, 1.0)
+    ring_cx = np.where(area2 != 0, cx6 / (3 * safe), 0.0)
+    ring_cy = np.where(area2 != 0, cy6 / (3 * safe), 0.0)
+    ring_cx += xy[starts, 0]
+    ring_cy += xy[starts, 1]
+
+    owners = np.asarray(owner)
+    total = np.bincount(owners, weights=weight, minlength=n)
+    sum_x = np.bincount(owners, weights=ring_cx * weight, minlength=n)
+    sum_y = np.bincount(owners, weights=ring_cy * weight, minlength=n)
+
+    # запасной вариант для вырожденных - среднее вершин
+    vertex_owner = np.repeat(owners, lengths)
+    count = np.bincount(vertex_owner, minlength=n)
+    mean_x = np.bincount(vertex_owner, weights=xy[:, 0], minlength=n)
+    mean_y = np.bincount(vertex_owner, weights=xy[:, 1], minlength=n)
+
+    for i in np.nonzero(count)[0]:
+        if total[i] > 0:
+            result[i] = (float(sum_x[i] / total[i]), float(sum_y[i] / total[i]))
+        else:
+            result[i] = (float(mean_x[i] / count[i]), float(mean_y[i] / count[i]))
+    return result
+
+
+def centroids(geometries: Sequence[Optional[dict]]) -> list[Optional[Point]]:
+    """Area-weighted centroid of every geometry (holes subtract), None if empty.
+
+    Degenerate (zero-area) geometries fall back to the mean of their vertices.
+    """
+    return _centroids([_polygons(g) for g in geometries])
+
+
+class _Bucket:
+    """Edges of polygons with similar edge counts, padded to one width.
+
+    Coordinates are stored in float32 relative to each polygon's first vertex:
+    that halves the memory traffic of the matrices and still resolves
+    centimetres for polygons the size of a country.
+    """
+
+    def __init__(self, polygons: list[Rings], width: int) -> None:
+        n = len(polygons)
+        ax = np.empty((n, width))
+        ay = np.empty((n, width))
+        bx = np.empty((n, width))
+        by = np.empty((n, width))
+        for i, polygon in enumerate(polygons):
+            a = np.concatenate(polygon)
+            b = np.concatenate([np.roll(r, -1, axis=0) for r in polygon])
+            m = len(a)
+            ax[i, :m], ay[i, :m] = a[:, 0], a[:, 1]
+            bx[i, :m], by[i, :m] = b[:, 0], b[:, 1]
+            # вырожденные рёбра-заглушки в первой вершине: не ближе настоящей границы
+            # и никогда не пересекают луч
+            ax[i, m:] = bx[i, m:] = a[0, 0]
+            ay[i, m:] = by[i, m:] = a[0, 1]
+        self.ox, self.oy = ax[:, 0].copy(), ay[:, 0].copy()
+        ax -= self.ox[:, None]
+        bx -= self.ox[:, None]
+        ay -= self.oy[:, None]
+        by -= self.oy[:, None]
+        dx, dy = bx - ax, by - ay
+        len2 = dx * dx + dy * dy
+        self.ax, self.ay = ax.astype(np.float32), ay.astype(np.float32)
+        self.by = by.astype(np.float32)
+        self.dx, self.dy = dx.astype(np.float32), dy.astype(np.float32)
+        self.inv_len2 = np.where(len2 > 0, 1.0 / np.where(len2 > 0, len2, 1.0), 0.0).astype(np.float32)
+        self.slope = (dx / np.where(dy != 0, dy, 1.0)).astype(np.float32)
+        self.width = width
+
+    def signed_distance(self, owner: np.ndarray, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+        """Distance from each point to the boundary of its polygon, positive inside."""
+        out = np.empty(len(px))
+        step = max(1, MAX_MATRIX_ELEMENTS // self.width)
+        for s in range(0, len(px), step):
+            o = owner[s : s + step]
+            qx = (px[s : s + step] - self.ox[o]).astype(np.float32)[:, None]
+            qy = (py[s : s + step] - self.oy[o]).astype(np.float32)[:, None]
+            ax, ay, dx, dy = self.ax[o], self.ay[o], self.dx[o], self.dy[o]
+            rx, ry = qx - ax, qy - ay
+            t = np.clip((rx * dx + ry * dy) * self.inv_len2[o], 0.0, 1.0)
+            ex, ey = rx - t * dx, ry - t * dy
+            dist = np.sqrt((ex * ex + ey * ey).min(axis=1))
+            # чётность пересечений горизонтального луча
+            crosses = ((ay > qy) != (self.by[o] > qy)) & (rx < ry * self.slope[o])
+            inside = (np.count_nonzero(crosses, axis=1) & 1).astype(bool)
+            out[s : s + step] = np.where(inside, dist, -dist)
+        return out
+
+
+def _best_per_owner(owner: np.ndarray, d: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(owners that have cells, index of their max-distance cell)."""
+    order = np.lexsort((d, owner))
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = owner[order[1:]] != owner[order[:-1]]
+    idx = order[last]
+    return owner[idx], idx
+
+
+def _label_bucket(polygons: list[Rings], seeds: list[Point], width: int, relative_precision: float) -> np.ndarray:
+    bucket = _Bucket(polygons, width)
+    n = len(polygons)
+    outer = [p[0] for p in polygons]
+    x0 = np.array([r[:, 0].min() for r in outer])
+    y0 = np.array([r[:, 1].min() for r in outer])
+    x1 = np.array([r[:, 0].max() for r in outer])
+    y1 = np.array([r[:, 1].max() for r in outer])
+    width_x, height_y = x1 - x0, y1 - y0
+    size = np.minimum(width_x, height_y)
+    precision = np.maximum(width_x, height_y) * relative_precision
+
+    # Лучшие кандидаты для начала: центроид и центр рамки.
+    mid_x, mid_y = (x0 + x1) / 2, (y0 + y1) / 2
+    seed_x = np.array([s[0] for s in seeds])
+    seed_y = np.array([s[1] for s in seeds])
+    ids = np.arange(n)
+    owner = np.concatenate([ids, ids])
+    px = np.concatenate([seed_x, mid_x])
+    py = np.concatenate([seed_y, mid_y])
+    d = bucket.signed_distance(owner, px, py)
+    use_mid = d[n:] > d[:n]
+    best_x = np.where(use_mid, mid_x, seed_x)
+    best_y = np.where(use_mid, mid_y, seed_y)
+    best_d = np.maximum(d[:n], d[n:])
+
+    # Стартовая сетка: квадраты со стороной min(ширина, высота) по рамке каждого полигона.
+    cells_o, cells_x, cells_y, cells_h = [], [], [], []
+    for i in np.nonzero(size > 0)[0]:
+        h = size[i] / 2
+        gx = np.arange(x0[i], x1[i], size[i]) + h
+        gy = np.arange(y0[i], y1[i], size[i]) + h
+        gxx, gyy = np.meshgrid(gx, gy)
+        cells_o.append(np.full(gxx.size, i))
+        cells_x.append(gxx.ravel())
+        cells_y.append(gyy.ravel())
+        cells_h.append(np.full(gxx.size, h))
+    if not cells_o:
+        return np.column_stack([best_x, best_y])
+    owner = np.concatenate(cells_o)
+    cx, cy, ch = np.concatenate(cells_x), np.concatenate(cells_y), np.concatenate(cells_h)
+
+    while len(owner):
+        d = bucket.signed_distance(owner, cx, cy)
+        who, idx = _best_per_owner(owner, d)
+        better = d[idx] > best_d[who]
+        who, idx = who[better], idx[better]
+        best_x[who], best_y[who], best_d[who] = cx[idx], cy[idx], d[idx]
+
+        # в клетке может найтись точка не дальше d + h*sqrt(2) от границы
+        keep = (d + ch * _SQRT2 > best_d[owner] + precision[owner]) & (ch > precision[owner] / 2)
+        owner, cx, cy, h = owner[keep], cx[keep], cy[keep], ch[keep] / 2
+        owner, ch = np.tile(owner, 4), np.tile(h, 4)
+        cx = np.concatenate([cx - h, cx + h, cx - h, cx + h])
+        cy = np.concatenate([cy - h, cy - h, cy + h, cy + h])
+
+    return np.column_stack([best_x, best_y])
+
+
+def _labels(polygon_lists: Sequence[list[Rings]], relative_precision: float) -> list[Optional[Point]]:
+    result: list[Optional[Point]] = [None] * len(polygon_lists)
+    buckets: dict[int, list[int]] = {}
+    chosen: dict[int, Rings] = {}
+    for i, polygons in enumerate(polygon_lists):
+        polygons = [p for p in polygons if len(p[0]) >= 3]
+        if not polygons:
+            continue
+        largest = max(polygons, key=lambda p: _area(p[0])) if len(polygons) > 1 else polygons[0]
+        chosen[i] = largest
+        edges = sum(len(r) for r in largest)
+        width = max(MIN_BUCKET_EDGES, 1 << (edges - 1).bit_length())
+        buckets.setdefault(width, []).append(i)
+
+    for width, members in buckets.items():
+        polygons = [chosen[i] for i in members]
+        # семя - центроид самой части, в которую ставим подпись
+        part_seeds = _centroids([[p] for p in polygons])
+        points = _label_bucket(
+            polygons,
+            [s if s is not None else tuple(p[0][0]) for s, p in zip(part_seeds, polygons)],
+            width,
+            relative_precision,
+        )
+        for i, (x, y) in zip(members, points.tolist()):
+            result[i] = (x, y)
+    return result
+
+
+def label_points(
+    geometries: Sequence[Optional[dict]],
+    relative_precision: float = DEFAULT_RELATIVE_PRECISION,
+) -> list[Optional[Point]]:
+    """Pole of inaccessibility of every geometry (of its largest polygon), None if none."""
+    return _labels([_polygons(g) for g in geometries], relative_precision)
+
+
+def layer_labels(
+    features: Sequence[dict],
+    workers: int = 0,
+    relative_precision: float = DEFAULT_RELATIVE_PRECISION,
+) -> list[dict]:
+    """``{"centroid": (x, y) | None, "label": (x, y) | None}`` for every feature.
+
+    ``workers > 1`` splits the label search into chunks for a process pool;
+    centroids are a single vectorized pass and stay in this process.
+    """
+    geometries = [f.get("geometry") for f in features]
+    cents = centroids(geometries)
+
+    workers = min(workers, len(geometries) // MIN_FEATURES_PER_WORKER)
+    if workers > 1:
+        chunk = math.ceil(len(geometries) / workers)
+        parts = [geometries[i : i + chunk] for i in range(0, len(geometries), chunk)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            labels = [
+                p
+                for part in pool.map(label_points, parts, [relative_precision] * len(parts))
+                for p in part
+            ]
+    else:
+        labels = label_points(geometries, relative_precision)
+
+    return [{"centroid": c, "label": l} for c, l in zip(cents, labels)]
@@ -0,0 +1,109 @@
+"""Vectorized point-in-polygon assignment for large batches of points.
+
+All rings of all polygons are flattened into edge arrays. A batch is processed
+polygon by polygon: a bbox prefilter selects candidate points, then even-odd
+ray casting is evaluated for the candidates against that polygon's edges in
+one NumPy expression. Holes need no special handling - their edges simply
+flip the parity.
+
+To keep the candidate x edge matrices small, every polygon's edges are also
+split into horizontal bands; a point is only tested against the edges of the
+band its latitude falls into.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+from app.geo.polygons import Polygon
+
+# Сколько горизонтальных полос на полигон и предельный размер матрицы точки x рёбра.
+BANDS_PER_POLYGON = 32
+MAX_MATRIX_ELEMENTS = 4_000_000
+
+
+class _PolygonEdges:
+    __slots__ = ("bbox", "band_y0", "band_h", "bands")
+
+    def __init__(self, polygon: Polygon) -> None:
+        starts = []
+        ends = []
+        for ring in polygon:
+            arr = np.asarray(ring, dtype=np.float64)
+            if len(arr) < 3:
+                continue
+            starts.append(arr)
+            ends.append(np.roll(arr, -1, axis=0))
+        start = np.concatenate(starts) if starts else np.empty((0, 2))
+        end = np.concatenate(ends) if ends else np.empty((0, 2))
+
+        # горизонтальные рёбра никогда не пересекают луч
+        keep = start[:, 1] != end[:, 1]
+        x0, y0 = start[keep, 0], start[keep, 1]
+        x1, y1 = end[keep, 0], end[keep, 1]
+
+        outer = np.asarray(polygon[0], dtype=np.float64)
+        self.bbox = (outer[:, 0].min(), outer[:, 1].min(), outer[:, 0].max(), outer[:, 1].max())
+
+        ymin = np.minimum(y0, y1)
+        ymax = np.maximum(y0, y1)
+        self.band_y0 = self.bbox[1]
+        self.band_h = (self.bbox[3] - self.bbox[1]) / BANDS_PER_POLYGON or 1.0
+        lo = np.clip(((ymin - self.band_y0) / self.band_h).astype(np.int64), 0, BANDS_PER_POLYGON - 1)
+        hi = np.clip(((ymax - self.band_y0) / self.band_h).astype(np.int64), 0, BANDS_PER_POLYGON - 1)
+
+        # (x0, y0, x1 - x0, (y1 - y0)) для каждой полосы - всё, что нужно лучу
+        self.bands = []
+        for b in range(BANDS_PER_POLYGON):
+            m = (lo <= b) & (hi >= b)
+            self.bands.append(
+                (x0[m], y0[m], (x1[m] - x0[m]) / (y1[m] - y0[m]), y1[m])
+            )
+
+    def contains(self, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+        """Boolean mask for points already known to be inside the bbox."""
+        result = np.zeros(len(px), dtype=bool)
+        band = np.clip(((py - self.band_y0) / self.band_h).astype(np.int64), 0, BANDS_PER_POLYGON - 1)
+        for b in np.unique(band):
+            idx = np.nonzero(band == b)[0]
+            ex0, ey0, slope, ey1 = self.bands[b]
+            if len(ex0) == 0:
+                continue
+            step = max(1, MAX_MATRIX_ELEMENTS // len(ex0))
+            for s in range(0, len(idx), step):
+                chunk = idx[s : s + step]
+                qx = px[chunk, None]
+                qy = py[chunk, None]
+                spans = (ey0 > qy) != (ey1 > qy)
+                crosses = spans & (qx < ex0 + slope * (qy - ey0))
+                result[chunk] = (np.count_nonzero(crosses, axis=1) & 1).astype(bool)
+        return result
+
+
+class PolygonArrays:
+    def __init__(self, parts: Sequence[tuple[int, Polygon]]) -> None:
+        self.owners = np.fromiter((fid for fid, _ in parts), dtype=np.int32, count=len(parts))
+        self.polygons = [_PolygonEdges(polygon) for _, polygon in parts]
+        self.bboxes = (
+            np.array([p.bbox for p in self.polygons], dtype=np.float64)
+            if self.polygons
+            else np.empty((0, 4))
+        )
+
+    def assign(self, points: np.ndarray) -> np.ndarray:
+        """Owner id of the polygon containing every point, -1 where none does."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        px = np.ascontiguousarray(points[:, 0])
+        py = np.ascontiguousarray(points[:, 1])
+        result = np.full(len(points), -1, dtype=np.int32)
+
+        for i, poly in enumerate(self.polygons):
+            bx0, by0, bx1, by1 = self.bboxes[i]
+            cand = np.nonzero((result < 0) & (px >= bx0) & (px <= bx1) & (py >= by0) & (py <= by1))[0]
+            if len(cand) == 0:
+                continue
+            inside = poly.contains(px[cand], py[cand])
+            result[cand[inside]] = self.owners[i]
+        return result
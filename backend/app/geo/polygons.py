@@ -0,0 +1,55 @@
+"""Pure-Python polygon helpers: flattening GeoJSON and point-in-polygon tests."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+Ring = list[tuple[float, float]]
+# внешнее кольцо + дырки
+Polygon = list[Ring]
+BBox = tuple[float, float, float, float]
+
+
+def polygons_of(geometry: Optional[dict]) -> list[Polygon]:
+    if not geometry:
+        return []
+    gtype = geometry.get("type")
+    coords = geometry.get("coordinates") or []
+    if gtype == "Polygon":
+        parts = [coords]
+    elif gtype == "MultiPolygon":
+        parts = coords
+    elif gtype == "GeometryCollection":
+        return [p for g in geometry.get("geometries") or [] for p in polygons_of(g)]
+    else:
+        return []
+    return [[[(float(c[0]), float(c[1])) for c in ring] for ring in part] for part in parts if part]
+
+
+def polygon_bbox(polygon: Polygon) -> BBox:
+    xs = [x for x, _ in polygon[0]]
+    ys = [y for _, y in polygon[0]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def ring_contains(ring: Ring, x: float, y: float) -> bool:
+    """Even-odd ray casting; works for closed and unclosed rings."""
+    inside = False
+    n = len(ring)
+    if n < 3:
+        return False
+    px, py = ring[-1]
+    for i in range(n):
+        cx, cy = ring[i]
+        if (cy > y) != (py > y):
+            xint = (px - cx) * (y - cy) / (py - cy) + cx
+            if x < xint:
+                inside = not inside
+        px, py = cx, cy
+    return inside
+
+
+def polygon_contains(polygon: Polygon, x: float, y: float) -> bool:
+    if not ring_contains(polygon[0], x, y):
+        return False
+    return not any(ring_contains(hole, x, y) for hole in polygon[1:])
@@ -0,0 +1,105 @@
+"""Static packed R-tree built with the Sort-Tile-Recursive algorithm.
+
+The tree is built once from a list of bounding boxes and is read-only
+afterwards, which lets all nodes live in flat lists instead of objects.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Iterable, Sequence
+
+BBox = tuple[float, float, float, float]
+
+DEFAULT_NODE_CAPACITY = 16
+
+
+class STRtree:
+    def __init__(self, boxes: Sequence[BBox], node_capacity: int = DEFAULT_NODE_CAPACITY) -> None:
+        self.node_capacity = node_capacity
+        self.size = len(boxes)
+        self._boxes = list(boxes)
+        # Уровни снизу вверх: каждый - список (bbox, дети); дети листа - индексы элементов.
+        self._levels: list[list[tuple[BBox, list[int]]]] = []
+        if boxes:
+            self._build([(box, i) for i, box in enumerate(boxes)])
+
+    def _pack(self, entries: list[tuple[BBox, int]]) -> list[tuple[BBox, list[int]]]:
+        cap = self.node_capacity
+        node_count = math.ceil(len(entries) / cap)
+        slice_count = math.ceil(math.sqrt(node_count))
+        slice_size = slice_count * cap
+
+        entries = sorted(entries, key=lambda e: e[0][0] + e[0][2])
+        nodes: list[tuple[BBox, list[int]]] = []
+        for s in range(0, len(entries), slice_size):
+            vertical = sorted(entries[s : s + slice_size], key=lambda e: e[0][1] + e[0][3])
+            for n in range(0, len(vertical), cap):
+                group = vertical[n : n + cap]
+                nodes.append((_union(b for b, _ in group), [child for _, child in group]))
+        return nodes
+
+    def _build(self, entries: list[tuple[BBox, int]]) -> None:
+        level = self._pack(entries)
+        self._levels.append(level)
+        while len(level) > 1:
+            level = self._pack([(bbox, i) for i, (bbox, _) in enumerate(level)])
+            self._levels.append(level)
+
+    def query_point(self, x: float, y: float) -> list[int]:
+        """Indices of the boxes containing the point."""
+        if not self._levels:
+            return []
+        top = len(self._levels) - 1
+        stack = [(top, i) for i in range(len(self._levels[top]))]
+        result: list[int] = []
+        while stack:
+            depth, idx = stack.pop()
+            (x0, y0, x1, y1), children = self._levels[depth][idx]
+            if x < x0 or x > x1 or y < y0 or y > y1:
+                continue
+            if depth == 0:
+                for item in children:
+                    ix0, iy0, ix1, iy1 = self._boxes[item]
+                    if ix0 <= x <= ix1 and iy0 <= y <= iy1:
+                        result.append(item)
+            else:
+                stack.extend((depth - 1, c) for c in children)
+        return result
+
+    def query_bbox(self, box: BBox) -> list[int]:
+        """Indices of the boxes intersecting ``box``."""
+        if not self._levels:
+            return []
+        qx0, qy0, qx1, qy1 = box
+        top = len(self._levels) - 1
+        stack = [(top, i) for i in range(len(self._levels[top]))]
+        result: list[int] = []
+        while stack:
+            depth, idx = stack.pop()
+            (x0, y0, x1, y1), children = self._levels[depth][idx]
+            if qx1 < x0 or qx0 > x1 or qy1 < y0 or qy0 > y1:
+                continue
+            if depth == 0:
+                for item in children:
+                    ix0, iy0, ix1, iy1 = self._boxes[item]
+                    if not (qx1 < ix0 or qx0 > ix1 or qy1 < iy0 or qy0 > iy1):
+                        result.append(item)
+            else:
+                stack.extend((depth - 1, c) for c in children)
+        return result
+
+
+def _union(boxes: Iterable[BBox]) -> BBox:
+    x0 = y0 = math.inf
+    x1 = y1 = -math.inf
+    for bx0, by0, bx1, by1 in boxes:
+        if bx0 < x0:
+            x0 = bx0
+        if by0 < y0:
+            y0 = by0
+        if bx1 > x1:
+            x1 = bx1
+        if by1 > y1:
+            y1 = by1
+    return x0, y0, x1, y1
@@ -0,0 +1,273 @@
+"""GeoJSON -> TopoJSON conversion with shared arcs and delta-encoded quantization.
+
+Follows the reference topojson pipeline in a compact form:
+
+1. quantize all coordinates to an integer grid (``transform`` in the output);
+2. find junctions - points where lines that pass through them stop running
+   along each other (different unordered neighbour pair);
+3. cut every line/ring at its junctions into arcs;
+4. deduplicate arcs, a reversed arc being referenced as ``~index``;
+5. delta-encode the arcs.
+
+Adjacent polygons therefore store their common border once.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Optional
+
+Point = tuple[int, int]
+
+DEFAULT_QUANTIZATION = 100_000
+
+
+class _Quantizer:
+    def __init__(self, bbox: tuple[float, float, float, float], quantization: int) -> None:
+        x0, y0, x1, y1 = bbox
+        self.x0, self.y0 = x0, y0
+        self.kx = (x1 - x0) / (quantization - 1) if x1 > x0 else 1.0
+        self.ky = (y1 - y0) / (quantization - 1) if y1 > y0 else 1.0
+
+    def line(self, coords: Iterable[Iterable[float]]) -> list[Point]:
+        out: list[Point] = []
+        for c in coords:
+            p = (round((c[0] - self.x0) / self.kx), round((c[1] - self.y0) / self.ky))
+            if not out or out[-1] != p:
+                out.append(p)
+        return out
+
+    def transform(self) -> dict[str, list[float]]:
+        return {"scale": [self.kx, self.ky], "translate": [self.x0, self.y0]}
+
+
+def _iter_positions(geometry: Optional[dict]) -> Iterable[list[float]]:
+    if not geometry:
+        return
+    gtype = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if gtype == "Point":
+        yield coords
+    elif gtype in ("MultiPoint", "LineString"):
+        yield from coords
+    elif gtype in ("MultiLineString", "Polygon"):
+        for line in coords:
+            yield from line
+    elif gtype == "MultiPolygon":
+        for poly in coords:
+            for ring in poly:
+                yield from ring
+    elif gtype == "GeometryCollection":
+        for g in geometry.get("geometries") or []:
+            yield from _iter_positions(g)
+
+
+def compute_bbox(features: Iterable[dict]) -> Optional[tuple[float, float, float, float]]:
+    x0 = y0 = float("inf")
+    x1 = y1 = float("-inf")
+    for feature in features:
+        for c in _iter_positions(feature.get("geometry")):
+            x, y = c[0], c[1]
+            if x < x0:
+                x0 = x
+            if x > x1:
+                x1 = x
+            if y < y0:
+                y0 = y
+            if y > y1:
+                y1 = y
+    if x0 == float("inf"):
+        return None
+    return x0, y0, x1, y1
+
+
+class _Topology:
+    def __init__(self) -> None:
+        # Линии (ломаные и замкнутые кольца) в порядке добавления.
+        self.lines: list[tuple[list[Point], bool]] = []
+        self.arcs: list[list[Point]] = []
+        self._arc_index: dict[tuple[Point, ...], int] = {}
+
+    def add_line(self, points: list[Point], closed: bool) -> int:
+        if closed and len(points) > 1 and points[0] == points[-1]:
+            points = points[:-1]
+        self.lines.append((points, closed))
+        return len(self.lines) - 1
+
+    def find_junctions(self) -> set[Point]:
+        neighbours: dict[Point, frozenset] = {}
+        junctions: set[Point] = set()
+        for points, closed in self.lines:
+            n = len(points)
+            if n == 0:
+                continue
+            if not closed:
+                # концы ломаных - всегда стыки
+                junctions.add(points[0])
+                junctions.add(points[-1])
+            for i, p in enumerate(points):
+                if closed:
+                    prev, nxt = points[i - 1], points[(i + 1) % n]
+                else:
+                    prev = points[i - 1] if i > 0 else None
+                    nxt = points[i + 1] if i + 1 < n else None
+                pair = frozenset((prev, nxt))
+                seen = neighbours.get(p)
+                if seen is None:
+                    neighbours[p] = pair
+                elif seen != pair:
+                    junctions.add(p)
+        return junctions
+
+    def _register(self, arc: list[Point], closed_ring: bool) -> int:
+        if closed_ring:
+            # Кольцо без стыков: канонизируем начальную точку, чтобы совпадающие
+            # кольца с разным началом и направлением склеились.
+            forward = _rotate_to_min(arc)
+            backward = _rotate_to_min(arc[::-1])
+            fkey = tuple(forward + forward[:1])
+            bkey = tuple(backward + backward[:1])
+            if fkey in self._arc_index:
+                return self._arc_index[fkey]
+            if bkey in self._arc_index:
+                return ~self._arc_index[bkey]
+            self._arc_index[fkey] = len(self.arcs)
+            self.arcs.append(list(fkey))
+            return len(self.arcs) - 1
+
+        key = tuple(arc)
+        if key in self._arc_index:
+            return self._arc_index[key]
+        rkey = key[::-1]
+        if rkey in self._arc_index:
+            return ~self._arc_index[rkey]
+        self._arc_index[key] = len(self.arcs)
+        self.arcs.append(arc)
+        return len(self.arcs) - 1
+
+    def cut(self) -> list[list[int]]:
+        """Arc references for every line, in the order lines were added."""
+        junctions = self.find_junctions()
+        result: list[list[int]] = []
+        for points, closed in self.lines:
+            if not points:
+                result.append([])
+                continue
+            cuts = [i for i, p in enumerate(points) if p in junctions]
+            if closed:
+                if not cuts:
+                    result.append([self._register(points, closed_ring=True)])
+                    continue
+                start = cuts[0]
+                ring = points[start:] + points[:start] + [points[start]]
+                cuts = [i - start for i in cuts] + [len(points)]
+            else:
+                ring = points
+                if not cuts or cuts[0] != 0:
+                    cuts = [0] + cuts
+                if cuts[-1] != len(points) - 1:
+                    cuts.append(len(points) - 1)
+            refs = []
+            for a, b in zip(cuts, cuts[1:]):
+                if b > a:
+                    refs.append(self._register(ring[a : b + 1], closed_ring=False))
+            if not refs:
+                refs.append(self._register(ring, closed_ring=False))
+            result.append(refs)
+        return result
+
+
+def _rotate_to_min(points: list[Point]) -> list[Point]:
+    i = points.index(min(points))
+    return points[i:] + points[:i]
+
+
+def _delta_encode(arc: list[Point]) -> list[list[int]]:
+    out = [[arc[0][0], arc[0][1]]]
+    px, py = arc[0]
+    for x, y in arc[1:]:
+        out.append([x - px, y - py])
+        px, py = x, y
+    return out
+
+
+def _collect(topology: _Topology, quantizer: _Quantizer, geometry: Optional[dict]) -> Any:
+    """Replace coordinates by line ids; arcs are resolved after junction detection."""
+    if not geometry:
+        return None
+    gtype = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if gtype == "Point":
+        return {"type": gtype, "coordinates": list(quantizer.line([coords])[0])}
+    if gtype == "MultiPoint":
+        return {"type": gtype, "coordinates": [list(p) for p in quantizer.line(coords)]}
+    if gtype == "LineString":
+        return {"type": gtype, "arcs": topology.add_line(quantizer.line(coords), closed=False)}
+    if gtype == "MultiLineString":
+        return {"type": gtype, "arcs": [topology.add_line(quantizer.line(l), closed=False) for l in coords]}
+    if gtype == "Polygon":
+        return {"type": gtype, "arcs": [topology.add_line(quantizer.line(r), closed=True) for r in coords]}
+    if gtype == "MultiPolygon":
+        return {
+            "type": gtype,
+            "arcs": [[topology.add_line(quantizer.line(r), closed=True) for r in poly] for poly in coords],
+        }
+    if gtype == "GeometryCollection":
+        return {
+            "type": gtype,
+            "geometries": [_collect(topology, quantizer, g) for g in geometry.get("geometries") or []],
+        }
+    raise ValueError(f"Unsupported geometry type: {gtype}")
+
+
+def _resolve(obj: Any, line_arcs: list[list[int]]) -> None:
+    if obj is None:
+        return
+    gtype = obj["type"]
+    if gtype in ("LineString",):
+        obj["arcs"] = line_arcs[obj["arcs"]]
+    elif gtype in ("MultiLineString", "Polygon"):
+        obj["arcs"] = [line_arcs[i] for i in obj["arcs"]]
+    elif gtype == "MultiPolygon":
+        obj["arcs"] = [[line_arcs[i] for i in poly] for poly in obj["arcs"]]
+    elif gtype == "GeometryCollection":
+        for g in obj["geometries"]:
+            _resolve(g, line_arcs)
+
+
+def features_to_topology(
+    objects: dict[str, list[dict]],
+    quantization: int = DEFAULT_QUANTIZATION,
+) -> dict:
+    """Build a TopoJSON topology from named lists of GeoJSON features."""
+    all_features = [f for features in objects.values() for f in features]
+    bbox = compute_bbox(all_features) or (0.0, 0.0, 0.0, 0.0)
+    quantizer = _Quantizer(bbox, quantization)
+    topology = _Topology()
+
+    out_objects: dict[str, dict] = {}
+    for name, features in objects.items():
+        geometries = []
+        for feature in features:
+            geom = _collect(topology, quantizer, feature.get("geometry"))
+            if geom is None:
+                geom = {"type": None}
+            if feature.get("id") is not None:
+                geom["id"] = feature["id"]
+            if feature.get("properties"):
+                geom["properties"] = feature["properties"]
+            geometries.append(geom)
+        out_objects[name] = {"type": "GeometryCollection", "geometries": geometries}
+
+    line_arcs = topology.cut()
+    for collection in out_objects.values():
+        for geom in collection["geometries"]:
+            if geom.get("type") is not None:
+                _resolve(geom, line_arcs)
+
+    return {
+        "type": "Topology",
+        "bbox": list(bbox),
+        "transform": quantizer.transform(),
+        "objects": out_objects,
+        "arcs": [_delta_encode(arc) for arc in topology.arcs],
+    }
@@ -1,4 +1,6 @@
 from pathlib import Path
+import asyncio
+import logging
 import mimetypes
 
 from fastapi import Depends, FastAPI, HTTPException
@@ -8,12 +10,23 @@ from fastapi.staticfiles import StaticFiles
 
 from app.api.v1 import admin_users
 from app.api.v1.admin_settings import router as admin_settings_router
+from app.api.v1.routes.attachments import router as attachments_router
 from app.api.v1.routes.auth import router as auth_router
+from app.api.v1.routes.events import router as events_router
+from app.api.v1.routes.maps import router as map_upload_router
 from app.core.bootstrap import require_bootstrap_completed
+from app.core.config import settings
 from app.routers.users import router as users_router
 from app.api.maps import router as maps_router
+from app.api.map_files import router as map_files_router
 from app.api.regions import router as regions_router
+from app.services.event_partitions import ensure_event_partitions_forever
+from app.services.event_rollup_service import fold_event_rollups_forever
+from app.services.event_stream import create_event_backend, event_broadcaster
+from app.services.region_index import refresh_regions_index, refresh_regions_index_forever
+from app.services.thumbnails import thumbnail_jobs
 
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Zone Monitoring",
@@ -30,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -38,6 +52,81 @@ def ping():
     return {"status": "ok"}
 
 
+@app.on_event("startup")
+def warm_up_region_index() -> None:
+    # Индекс для /api/regions/locate строим заранее; без БД он соберётся при первом запросе.
+    try:
+        refresh_regions_index()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("region index warm-up skipped: %s", exc)
+
+
+@app.on_event("startup")
+async def start_region_index_refresh() -> None:
+    # Запросы читают только память; новая версия регионов подхватывается здесь.
+    if settings.REGION_INDEX_REFRESH_SECONDS > 0:
+        app.state.region_index_task = asyncio.create_task(
+            refresh_regions_index_forever(settings.REGION_INDEX_REFRESH_SECONDS)
+        )
+
+
+@app.on_event("shutdown")
+async def stop_region_index_refresh() -> None:
+    task = getattr(app.state, "region_index_task", None)
+    if task is not None:
+        task.cancel()
+
+
+@app.on_event("startup")
+async def start_event_rollup_folding() -> None:
+    # В каждом воркере; advisory-блокировка оставляет работу одному.
+    if settings.EVENT_ROLLUP_FOLD_SECONDS > 0:
+        app.state.event_rollup_task = asyncio.create_task(
+            fold_event_rollups_forever(settings.EVENT_ROLLUP_FOLD_SECONDS)
+        )
+
+
+@app.on_event("shutdown")
+async def stop_event_rollup_folding() -> None:
+    task = getattr(app.state, "event_rollup_task", None)
+    if task is not None:
+        task.cancel()
+
+
+@app.on_event("startup")
+async def start_event_partitions() -> None:
+    # Секции на текущий и следующие месяцы, чтобы вставки не уходили в events_default.
+    if settings.EVENT_PARTITION_MONTHS_AHEAD > 0:
+        app.state.event_partition_task = asyncio.create_task(
+            ensure_event_partitions_forever(settings.EVENT_PARTITION_MONTHS_AHEAD)
+        )
+
+
+@app.on_event("shutdown")
+async def stop_event_partitions() -> None:
+    task = getattr(app.state, "event_partition_task", None)
+    if task is not None:
+        task.cancel()
+
+
+@app.on_event("startup")
+async def start_event_stream() -> None:
+    # Одно LISTEN-соединение на воркер вместо опроса /events/ каждым экраном.
+    event_broadcaster.queue_size = settings.EVENT_STREAM_QUEUE_SIZE
+    app.state.event_backend = create_event_backend(settings.EVENT_STREAM_BACKEND, event_broadcaster)
+    await app.state.event_backend.start()
+
+
+@app.on_event("shutdown")
+async def stop_event_stream() -> None:
+    await app.state.event_backend.stop()
+
+
+@app.on_event("shutdown")
+async def stop_thumbnail_pool() -> None:
+    thumbnail_jobs.shutdown()
+
+
 # --- API ---
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(
@@ -46,8 +135,12 @@ app.include_router(
     dependencies=[Depends(require_bootstrap_completed)],
 )
 app.include_router(users_router, prefix="/api/v1")
+app.include_router(events_router, prefix="/api/v1")
+app.include_router(attachments_router, prefix="/api/v1")
+app.include_router(map_upload_router, prefix="/api/v1")
 app.include_router(admin_users.router)
 app.include_router(maps_router)
+app.include_router(map_files_router)
 app.include_router(regions_router)
 
 # --- FRONT (Vite build) ---
@@ -56,7 +149,6 @@ BACKEND_DIR = Path(__file__).resolve().parent.parent  # .../backend
 FRONTEND_DIST = PROJECT_ROOT / "frontend" / "dist"
 INDEX_FILE = FRONTEND_DIST / "index.html"
 FRONTEND_ROOT = PROJECT_ROOT / "frontend"
-MAPS_DIR = BACKEND_DIR / "maps"
 
 mimetypes.add_type("application/geo+json", ".geojson")
 mimetypes.add_type("application/json", ".json")
@@ -68,9 +160,7 @@ app.mount(
     name="assets",
 )
 
-# 1.5) GeoJSON maps
-if MAPS_DIR.exists():
-    app.mount("/maps", StaticFiles(directory=str(MAPS_DIR)), name="maps")
+# 1.5) GeoJSON maps: отдаёт map_files_router (готовые .br/.gz, адреса с хэшем, Range)
 
 
 # 2) Vite icon
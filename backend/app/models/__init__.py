@@ -4,6 +4,9 @@ from .user import User
 from .map import Map
 from .zone import Zone
 from .event import Event
+from .event_text import EventText
+from .event_image import EventImage
+from .event_document import EventDocument
 from .system_settings import SystemSettings
 
-__all__ = ["Base", "User", "Map", "Zone", "Event", "SystemSettings"]
+__all__ = ["Base", "User", "Map", "Zone", "Event", "EventText", "EventImage", "EventDocument", "SystemSettings"]
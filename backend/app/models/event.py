@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -8,6 +8,8 @@ from app.core.db import Base
 class Event(Base):
     __tablename__ = "events"
 
+    # В БД таблица секционирована по месяцам created_at (миграция 5bb66f40b107) с ключом
+    # (id, created_at); id по-прежнему выдаёт одна последовательность, так что для ORM он уникален.
     id = Column(Integer, primary_key=True, index=True)
     map_id = Column(Integer, ForeignKey("maps.id", ondelete="CASCADE"), nullable=False)
     zone_id = Column(Integer, ForeignKey("zones.id", ondelete="CASCADE"), nullable=False)
@@ -18,3 +20,16 @@ class Event(Base):
 
     map = relationship("Map", back_populates="events")
     zone = relationship("Zone", back_populates="events")
+    # Внешних ключей в БД нет (секционирование); тексты удаляет триггер, ORM их не загружает.
+    texts = relationship("EventText", back_populates="event", cascade="all, delete-orphan", passive_deletes=True)
+    images = relationship("EventImage", back_populates="event", cascade="all, delete-orphan", passive_deletes=True)
+    documents = relationship("EventDocument", back_populates="event", cascade="all, delete-orphan", passive_deletes=True)
+    # search_vector (tsvector, генерируется БД) в модель не входит: см. app/services/event_search.py
+
+    # Ленты событий с курсором (created_at, id); см. миграцию 42516816ce9a
+    __table_args__ = (
+        Index("ix_events_created_at_id", created_at.desc(), id.desc()),
+        Index("ix_events_map_created_at_id", map_id, created_at.desc(), id.desc()),
+        Index("ix_events_zone_created_at_id", zone_id, created_at.desc(), id.desc()),
+        Index("ix_events_status_created_at_id", status, created_at.desc(), id.desc()),
+    )
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+EventStatus = Literal["ok", "warning", "alert"]
+
+
+class EventIn(BaseModel):
+    """One event of a POST /events/batch body."""
+
+    zone_id: int
+    # карта берётся из зоны; если передана, должна совпадать
+    map_id: Optional[int] = None
+    status: EventStatus
+    title: str = Field(min_length=1, max_length=255)
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+    # повтор с тем же ключом не создаёт второе событие
+    idempotency_key: Optional[str] = Field(None, min_length=1, max_length=200)
+
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra={
+            "example": {
+                "zone_id": 12,
+                "status": "alert",
+                "title": "Превышение порога",
+                "idempotency_key": "sensor-7:2026-10-18T12:00:00Z",
+            }
+        },
+    )
+
+
+class EventBatchResult(BaseModel):
+    inserted: int
+    duplicates: int
+    # id события для каждого элемента запроса, в том же порядке
+    ids: List[int]
@@ -0,0 +1,72 @@
+"""Event images and documents: rows pointing into the content store."""
+
+from typing import Literal, Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.event import Event
+from app.models.event_document import EventDocument
+from app.models.event_image import EventImage
+from app.services.content_store import StoredBlob
+
+AttachmentKind = Literal["images", "documents"]
+Attachment = Union[EventImage, EventDocument]
+
+MODELS = {"images": EventImage, "documents": EventDocument}
+
+
+def event_exists(db: Session, event_id: int) -> bool:
+    return db.execute(select(Event.id).where(Event.id == event_id).limit(1)).first() is not None
+
+
+def add_attachment(
+    db: Session,
+    kind: AttachmentKind,
+    event_id: int,
+    name: str,
+    blob: StoredBlob,
+    content_type: Optional[str],
+) -> Attachment:
+    row = MODELS[kind](
+        event_id=event_id,
+        name=name,
+        file_path=blob.relative,
+        sha256=blob.sha256,
+        size=blob.size,
+        content_type=content_type,
+    )
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    return row
+
+
+def get_attachment(db: Session, kind: AttachmentKind, attachment_id: int) -> Optional[Attachment]:
+    return db.get(MODELS[kind], attachment_id)
+
+
+def list_attachments(db: Session, kind: AttachmentKind, event_id: int) -> list[Attachment]:
+    model = MODELS[kind]
+    return list(db.execute(select(model).where(model.event_id == event_id).order_by(model.id)).scalars())
+
+
+def attachment_url(kind: AttachmentKind, attachment_id: int) -> str:
+    return f"/api/v1/attachments/{kind}/{attachment_id}"
+
+
+def attachment_out(kind: AttachmentKind, row: Attachment) -> dict:
+    out = {
+        "id": row.id,
+        "event_id": row.event_id,
+        "name": row.name,
+        "sha256": row.sha256,
+        "size": row.size,
+        "content_type": row.content_type,
+        "created_at": row.created_at,
+        "url": attachment_url(kind, row.id),
+    }
+    if kind == "images":
+        # размер и формат - параметрами ?size=160|480|1280&format=webp|jpeg
+        out["thumbnail_url"] = f"{attachment_url(kind, row.id)}/thumbnail"
+    return out
@@ -0,0 +1,137 @@
+"""Content-addressed file storage for uploads.
+
+An upload is streamed into a temporary file under ``<root>/.tmp``. Incoming
+chunks are re-buffered to ``CHUNK_SIZE``, so memory per upload is bounded by
+one chunk whatever the file size. Each chunk is hashed and written in a
+worker thread; the event loop never blocks on disk. The finished file is
+fsynced and renamed to ``<root>/ab/cd/<sha256>``. A file whose digest is
+already stored is discarded, so identical photos uploaded by several people
+take the space of one.
+
+Stored files never change, which makes them safe to cache forever and to
+serve with sendfile (directly or through the front proxy).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"upload is larger than {limit} bytes")
+        self.limit = limit
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    sha256: str
+    size: int
+    path: Path
+    # False, если такой файл уже был и новая копия выброшена
+    created: bool
+
+    @property
+    def relative(self) -> str:
+        return relative_path(self.sha256)
+
+
+def relative_path(sha256: str) -> str:
+    """``ab/cd/abcd…`` - two directory levels keep directories small."""
+    if not _SHA256.match(sha256):
+        raise ValueError("invalid sha256")
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+class ContentStore:
+    def __init__(self, root: Path | str) -> None:
+        self.root = Path(root).resolve()
+        self.tmp_dir = self.root / ".tmp"
+
+    def path_for(self, sha256: str) -> Path:
+        return self.root / relative_path(sha256)
+
+    def exists(self, sha256: str) -> bool:
+        return self.path_for(sha256).is_file()
+
+    async def save(self, chunks: AsyncIterator[bytes], max_bytes: Optional[int] = None) -> StoredBlob:
+        """Stream ``chunks`` into the store; UploadTooLarge past ``max_bytes`` (nothing is kept)."""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir)
+        tmp = Path(tmp_name)
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise UploadTooLarge(max_bytes)
+                    buffer += chunk
+                    if len(buffer) >= CHUNK_SIZE:
+                        await run_in_threadpool(_write_chunk, f, digest, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await run_in_threadpool(_write_chunk, f, digest, bytes(buffer))
+                await run_in_threadpool(_sync, f)
+            return await run_in_threadpool(self._commit, tmp, digest.hexdigest(), size)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def _commit(self, tmp: Path, sha256: str, size: int) -> StoredBlob:
+        target = self.path_for(sha256)
+        if target.is_file():
+            tmp.unlink()
+            return StoredBlob(sha256=sha256, size=size, path=target, created=False)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(tmp, 0o644)
+        # атомарно: параллельная загрузка того же файла просто перезапишет те же байты
+        os.replace(tmp, target)
+        return StoredBlob(sha256=sha256, size=size, path=target, created=True)
+
+
+def _write_chunk(f: BinaryIO, digest, chunk: bytes) -> None:
+    # hashlib отпускает GIL на больших буферах: хэш и запись идут вне цикла событий
+    digest.update(chunk)
+    f.write(chunk)
+
+
+def _sync(f: BinaryIO) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+
+
+async def request_chunks(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    async for chunk in stream:
+        if chunk:
+            yield chunk
+
+
+async def upload_file_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+@lru_cache
+def get_content_store() -> ContentStore:
+    return ContentStore(settings.ATTACHMENTS_DIR)
@@ -0,0 +1,69 @@
+"""Monthly partitions of ``events`` (migration 5bb66f40b107).
+
+Partitions are named ``events_pYYYY_MM`` and cover [month, next month) in
+UTC; rows with no matching partition land in ``events_default`` and are
+moved out when their month is created. The app keeps a few months ahead;
+old months are detached and exported by tools/archive_events.py.
+"""
+
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PARTITION_RE = re.compile(r"^events_p(\d{4})_(\d{2})$")
+ARCHIVE_SCHEMA = "events_archive"
+ENSURE_INTERVAL_SECONDS = 6 * 60 * 60
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_month(name: str) -> Optional[date]:
+    m = PARTITION_RE.match(name)
+    return date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def ensure_event_partitions(db: Session, months_ahead: int, today: Optional[date] = None) -> list[str]:
+    """Create partitions for this month and ``months_ahead`` following ones; names of the new ones."""
+    today = today or datetime.now(timezone.utc).date()
+    first = today.replace(day=1)
+    created = []
+    # воркеры стартуют одновременно; CREATE TABLE одной и той же секции не должен столкнуться
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext('ensure_event_partition'))"))
+    for n in range(months_ahead + 1):
+        name = db.execute(
+            text("SELECT ensure_event_partition(:month)"),
+            {"month": add_months(first, n)},
+        ).scalar()
+        if name:
+            created.append(name)
+    db.commit()
+    return created
+
+
+async def ensure_event_partitions_forever(months_ahead: int) -> None:
+    """Background loop started with the app: partitions always exist before they are needed."""
+    def ensure_once() -> list[str]:
+        with SessionLocal() as db:
+            return ensure_event_partitions(db, months_ahead)
+
+    while True:
+        try:
+            created = await run_in_threadpool(ensure_once)
+            if created:
+                logger.info("event partitions created: %s", ", ".join(created))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("event partition check failed: %s", exc)
+        await asyncio.sleep(ENSURE_INTERVAL_SECONDS)
@@ -0,0 +1,154 @@
+"""Event counts per hour/day from the rollup tables.
+
+Every statement that writes ``events`` appends its per-(hour, zone, status)
+counts to ``event_rollup_deltas`` (triggers of migration 0af0867fcc29);
+``fold_event_rollups`` periodically drains those deltas into
+``event_rollup_hourly`` and records the watermark in ``event_rollup_state``.
+Stats read the hourly rollups plus the not-yet-folded deltas, so the answer
+is always exact and costs O(buckets) instead of O(events).
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+StatsInterval = Literal["hour", "day"]
+StatsGroupBy = Literal["none", "map", "zone"]
+STATUSES = ("ok", "warning", "alert")
+
+# Не больше стольких корзин в ответе: защита от запросов "по часам за десять лет".
+MAX_STATS_BUCKETS = 10_000
+# Ключ advisory-блокировки: сворачивает один процесс, остальные пропускают такт.
+FOLD_LOCK_KEY = 0x5E0_0019
+
+FOLD_SQL = text("""
+WITH drained AS (
+  DELETE FROM event_rollup_deltas
+  RETURNING bucket, map_id, zone_id, status, events
+),
+summed AS (
+  SELECT bucket, min(map_id) AS map_id, zone_id, status, sum(events) AS events
+  FROM drained
+  GROUP BY bucket, zone_id, status
+),
+upserted AS (
+  INSERT INTO event_rollup_hourly AS r (bucket, map_id, zone_id, status, events)
+  SELECT bucket, map_id, zone_id, status, events FROM summed
+  ON CONFLICT (bucket, zone_id, status)
+  DO UPDATE SET events = r.events + EXCLUDED.events
+)
+UPDATE event_rollup_state
+SET folded_at = now(), folded_deltas = (SELECT count(*) FROM drained)
+WHERE name = 'events'
+RETURNING folded_deltas
+""")
+
+
+@dataclass(frozen=True)
+class StatsQuery:
+    since: datetime
+    until: datetime
+    interval: StatsInterval = "hour"
+    group_by: StatsGroupBy = "none"
+    map_id: Optional[int] = None
+    zone_id: Optional[int] = None
+    tz: str = "UTC"
+
+
+def fold_event_rollups(db: Session) -> Optional[int]:
+    """Move pending deltas into the hourly rollups; None if another process is folding."""
+    locked = db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": FOLD_LOCK_KEY}).scalar()
+    if not locked:
+        db.rollback()
+        return None
+    folded = db.execute(FOLD_SQL).scalar() or 0
+    # события удалены - строки с нулём больше не нужны
+    db.execute(text("DELETE FROM event_rollup_hourly WHERE events = 0"))
+    db.commit()
+    return int(folded)
+
+
+def stats_sql(q: StatsQuery) -> tuple[str, dict]:
+    params: dict = {"since": q.since, "until": q.until, "tz": q.tz}
+    where = ["bucket >= date_trunc('hour', CAST(:since AS timestamptz))", "bucket < :until"]
+    if q.map_id is not None:
+        where.append("map_id = :map_id")
+        params["map_id"] = q.map_id
+    if q.zone_id is not None:
+        where.append("zone_id = :zone_id")
+        params["zone_id"] = q.zone_id
+    where_sql = " AND ".join(where)
+
+    if q.interval == "day":
+        # дни по часовому поясу дашборда; часовые корзины в него целиком укладываются
+        bucket = "date_trunc('day', bucket AT TIME ZONE :tz) AT TIME ZONE :tz"
+    else:
+        bucket = "bucket"
+    group_col = {"none": None, "map": "map_id", "zone": "zone_id"}[q.group_by]
+    select_group = f", {group_col}" if group_col else ""
+    status_columns = ",\n           ".join(
+        f"sum(events) FILTER (WHERE status = '{status}') AS {status}" for status in STATUSES
+    )
+
+    sql = f"""
+    SELECT {bucket} AS bucket{select_group},
+           {status_columns},
+           sum(events) AS total
+    FROM (
+      SELECT bucket, map_id, zone_id, status, events FROM event_rollup_hourly WHERE {where_sql}
+      UNION ALL
+      SELECT bucket, map_id, zone_id, status, events FROM event_rollup_deltas WHERE {where_sql}
+    ) AS t
+    GROUP BY 1{select_group}
+    HAVING sum(events) <> 0
+    ORDER BY 1{select_group}
+    LIMIT {MAX_STATS_BUCKETS + 1}
+    """
+    return sql, params
+
+
+def event_stats(db: Session, q: StatsQuery) -> dict:
+    """Bucketed counts by status; ``truncated`` if more than MAX_STATS_BUCKETS rows matched."""
+    sql, params = stats_sql(q)
+    rows = db.execute(text(sql), params).mappings().all()
+    watermark = db.execute(text("SELECT folded_at FROM event_rollup_state WHERE name = 'events'")).scalar()
+    buckets = []
+    for row in rows[:MAX_STATS_BUCKETS]:
+        item = dict(row)
+        for status in STATUSES + ("total",):
+            item[status] = int(item[status] or 0)
+        buckets.append(item)
+    return {
+        "interval": q.interval,
+        "group_by": q.group_by,
+        "tz": q.tz,
+        "folded_at": watermark,
+        "truncated": len(rows) > MAX_STATS_BUCKETS,
+        "buckets": buckets,
+    }
+
+
+async def fold_event_rollups_forever(interval_seconds: float) -> None:
+    """Background loop started with the app; errors are logged, the loop goes on."""
+    def fold_once() -> Optional[int]:
+        with SessionLocal() as db:
+            return fold_event_rollups(db)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            folded = await run_in_threadpool(fold_once)
+            if folded:
+                logger.debug("event rollups: folded %s deltas", folded)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("event rollup fold failed: %s", exc)
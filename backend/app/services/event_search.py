@@ -0,0 +1,188 @@
+"""Full-text search over events and their texts (migration c388aa7d190a).
+
+``events.search_vector`` (title weighted above description) and
+``event_texts.search_vector`` (configuration chosen from ``language``) are
+generated columns with GIN indexes. The user's query is parsed with
+``websearch_to_tsquery`` in the russian, english and simple configurations
+and OR-ed into one tsquery, so a single indexed ``@@`` matches documents
+stemmed in any of them.
+
+An event matches if its own vector or any of its texts does; its rank is the
+best of those. Highlights are computed only for the rows of the page.
+"""
+
+import base64
+import html
+import json
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.event_service import EventFilters
+
+SearchOrder = Literal["rank", "recent"]
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+MAX_QUERY_LENGTH = 200
+
+# ts_headline не экранирует HTML: сначала управляющие символы, потом escape и <mark>.
+_START, _STOP = "\x02", "\x03"
+TITLE_HEADLINE = f"StartSel={_START}, StopSel={_STOP}, HighlightAll=true"
+SNIPPET_HEADLINE = f"StartSel={_START}, StopSel={_STOP}, MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter=\" … \""
+
+_ORDER_SQL = {
+    "rank": ("r.rank DESC, e.id DESC", "page.rank DESC, page.id DESC"),
+    "recent": ("e.created_at DESC, e.id DESC", "page.created_at DESC, page.id DESC"),
+}
+# ts_rank возвращает real; курсор сравнивается в том же типе, иначе страницы "плывут".
+_KEYSET_SQL = {
+    "rank": "(r.rank, e.id) < (CAST(:after_key AS real), :after_id)",
+    "recent": "(e.created_at, e.id) < (CAST(:after_key AS timestamptz), :after_id)",
+}
+
+
+@dataclass(frozen=True)
+class SearchCursor:
+    order: SearchOrder
+    key: object  # rank (float) или created_at (ISO-строка)
+    id: int
+
+
+def encode_search_cursor(order: SearchOrder, row: dict) -> str:
+    key = row["rank"] if order == "rank" else row["created_at"].isoformat()
+    raw = json.dumps([order, key, row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_search_cursor(cursor: str, order: SearchOrder) -> SearchCursor:
+    """ValueError if the cursor is malformed or belongs to a different order."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_order, key, event_id = json.loads(raw)
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if cursor_order != order or not isinstance(key, (int, float, str)) or isinstance(key, bool):
+        raise ValueError("invalid cursor")
+    return SearchCursor(order=order, key=key, id=int(event_id))
+
+
+def _filter_sql(filters: EventFilters, params: dict) -> list[str]:
+    where = []
+    if filters.map_id is not None:
+        where.append("e.map_id = :map_id")
+        params["map_id"] = filters.map_id
+    if filters.zone_id is not None:
+        where.append("e.zone_id = :zone_id")
+        params["zone_id"] = filters.zone_id
+    if filters.statuses:
+        where.append("e.status = ANY(:statuses)")
+        params["statuses"] = list(filters.statuses)
+    if filters.since is not None:
+        where.append("e.created_at >= :since")
+        params["since"] = filters.since
+    if filters.until is not None:
+        where.append("e.created_at < :until")
+        params["until"] = filters.until
+    return where
+
+
+def search_sql(
+    query: str,
+    filters: EventFilters,
+    order: SearchOrder = "rank",
+    after: Optional[SearchCursor] = None,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+) -> tuple[str, dict]:
+    params: dict = {
+        "q": query,
+        "limit": limit,
+        "title_headline": TITLE_HEADLINE,
+        "snippet_headline": SNIPPET_HEADLINE,
+    }
+    event_where = _filter_sql(filters, params)
+    page_where = list(event_where)
+    if after is not None:
+        page_where.append(_KEYSET_SQL[order])
+        params["after_key"] = after.key
+        params["after_id"] = after.id
+    inner_order, outer_order = _ORDER_SQL[order]
+    hits_where = " AND ".join(["e.search_vector @@ q.query"] + event_where)
+    page_where_sql = " AND ".join(page_where) or "TRUE"
+
+    sql = f"""
+    WITH q AS (
+      SELECT websearch_to_tsquery('russian', :q)
+          || websearch_to_tsquery('english', :q)
+          || websearch_to_tsquery('simple', :q) AS query
+    ),
+    hits AS (
+      SELECT e.id AS event_id, ts_rank(e.search_vector, q.query, 1) AS rank, NULL::text AS body
+      FROM events e, q
+      WHERE {hits_where}
+      UNION ALL
+      SELECT t.event_id, ts_rank(t.search_vector, q.query, 1), t.text
+      FROM event_texts t, q
+      WHERE t.search_vector @@ q.query
+    ),
+    ranked AS (
+      SELECT event_id,
+             max(rank) AS rank,
+             (array_agg(body ORDER BY rank DESC) FILTER (WHERE body IS NOT NULL))[1] AS matched_text
+      FROM hits
+      GROUP BY event_id
+    ),
+    page AS (
+      SELECT e.id, e.map_id, e.zone_id, m.name AS map_name, z.name AS zone_name,
+             e.status, e.title, coalesce(e.description, '') AS description, e.created_at,
+             r.rank, r.matched_text
+      FROM ranked r
+      JOIN events e ON e.id = r.event_id
+      JOIN maps m ON m.id = e.map_id
+      JOIN zones z ON z.id = e.zone_id
+      WHERE {page_where_sql}
+      ORDER BY {inner_order}
+      LIMIT :limit
+    )
+    SELECT page.id, page.map_id, page.zone_id, page.map_name, page.zone_name,
+           page.status, page.title, page.description, page.created_at, page.rank,
+           ts_headline('russian', page.title, q.query, :title_headline) AS title_highlight,
+           ts_headline(
+             'russian',
+             concat_ws(' … ', nullif(page.description, ''), page.matched_text),
+             q.query,
+             :snippet_headline
+           ) AS snippet
+    FROM page, q
+    ORDER BY {outer_order}
+    """
+    return sql, params
+
+
+def highlight_html(value: Optional[str]) -> str:
+    """Escape ts_headline output and turn its markers into <mark> tags."""
+    escaped = html.escape(value or "", quote=False)
+    return escaped.replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def search_events(
+    db: Session,
+    query: str,
+    filters: EventFilters,
+    order: SearchOrder = "rank",
+    after: Optional[SearchCursor] = None,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+) -> tuple[list[dict], Optional[str]]:
+    """One page of matches and the cursor of the next page (None at the end)."""
+    sql, params = search_sql(query, filters, order, after, limit + 1)
+    rows = db.execute(text(sql), params).mappings().all()
+    page = []
+    for row in rows[:limit]:
+        item = dict(row)
+        item["title_highlight"] = highlight_html(item["title_highlight"])
+        item["snippet"] = highlight_html(item["snippet"])
+        page.append(item)
+    next_cursor = encode_search_cursor(order, page[-1]) if len(rows) > limit else None
+    return page, next_cursor
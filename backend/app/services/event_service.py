@@ -0,0 +1,302 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Sequence
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Select, func, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.core import fast_json
+from app.models.event import Event
+from app.models.map import Map
+from app.models.zone import Zone
+from app.schemas.event import EventBatchResult, EventIn
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Ограничения POST /events/batch
+MAX_BATCH_EVENTS = 50_000
+MAX_BATCH_BYTES = 32 * 1024 * 1024
+
+# Позиция в ленте: (created_at, id) последнего отданного события.
+Cursor = tuple[datetime, int]
+
+
+@dataclass(frozen=True)
+class EventFilters:
+    map_id: Optional[int] = None
+    zone_id: Optional[int] = None
+    statuses: Sequence[str] = ()
+    since: Optional[datetime] = None  # включительно
+    until: Optional[datetime] = None  # не включительно
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Aware datetime in UTC; a value without an offset is taken as UTC."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def encode_cursor(created_at: datetime, event_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), event_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverse of ``encode_cursor``; ValueError for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, event_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(event_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def event_conditions(filters: EventFilters, after: Optional[Cursor] = None) -> List[Any]:
+    """WHERE terms of the feed: filters plus the keyset position.
+
+    The row comparison ``(created_at, id) < (:c, :id)`` is a single range
+    condition on the (…, created_at DESC, id DESC) indexes, so a page deep in
+    history costs the same index descent as the first one - no OFFSET scan.
+    """
+    conditions: List[Any] = []
+    if filters.map_id is not None:
+        conditions.append(Event.map_id == filters.map_id)
+    if filters.zone_id is not None:
+        conditions.append(Event.zone_id == filters.zone_id)
+    if filters.statuses:
+        conditions.append(Event.status.in_(list(filters.statuses)))
+    if filters.since is not None:
+        conditions.append(Event.created_at >= filters.since)
+    if filters.until is not None:
+        conditions.append(Event.created_at < filters.until)
+    if after is not None:
+        conditions.append(tuple_(Event.created_at, Event.id) < tuple_(*after))
+    return conditions
+
+
+# Только то, что уходит клиенту: без ORM-объектов и identity map.
+FEED_COLUMNS = (
+    Event.id,
+    Event.map_id,
+    Event.zone_id,
+    Map.name.label("map_name"),
+    Zone.name.label("zone_name"),
+    Event.status,
+    Event.title,
+    func.coalesce(Event.description, "").label("description"),
+    Event.created_at,
+)
+
+
+def feed_query(filters: EventFilters, after: Optional[Cursor] = None) -> Select:
+    """Core select of the feed columns, newest first."""
+    return (
+        select(*FEED_COLUMNS)
+        .join(Map, Event.map_id == Map.id)
+        .join(Zone, Event.zone_id == Zone.id)
+        .where(*event_conditions(filters, after))
+        .order_by(Event.created_at.desc(), Event.id.desc())
+    )
+
+
+def feed_rows_by_ids(db: Session, ids: Sequence[int]) -> list[dict]:
+    """Feed rows of the given events, oldest first (the live stream fetches new ids this way)."""
+    rows = db.execute(
+        select(*FEED_COLUMNS)
+        .join(Map, Event.map_id == Map.id)
+        .join(Zone, Event.zone_id == Zone.id)
+        .where(Event.id.in_(list(ids)))
+        .order_by(Event.created_at, Event.id)
+    ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def feed_rows_after_id(db: Session, after_id: int, limit: int) -> list[dict]:
+    """Feed rows of events with id above ``after_id``, lowest id first (the stream catches up this way)."""
+    rows = db.execute(
+        select(*FEED_COLUMNS)
+        .join(Map, Event.map_id == Map.id)
+        .join(Zone, Event.zone_id == Zone.id)
+        .where(Event.id > after_id)
+        .order_by(Event.id)
+        .limit(limit)
+    ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def max_event_id(db: Session) -> int:
+    return db.execute(select(func.coalesce(func.max(Event.id), 0))).scalar_one()
+
+
+def list_events_page(
+    db: Session,
+    filters: EventFilters,
+    after: Optional[Cursor] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> tuple[list[dict], Optional[str]]:
+    """One page of the feed as plain dicts and the cursor of the next page (None at the end)."""
+    rows = db.execute(feed_query(filters, after).limit(limit + 1)).mappings().all()
+    if len(rows) <= limit:
+        return [dict(r) for r in rows], None
+    page = [dict(r) for r in rows[:limit]]
+    last = page[-1]
+    return page, encode_cursor(last["created_at"], last["id"])
+
+
+# --- bulk ingestion ---
+
+_batch_adapter = TypeAdapter(List[EventIn])
+
+
+class EventBatchError(ValueError):
+    """Invalid batch; ``errors`` are in the FastAPI validation error format."""
+
+    def __init__(self, errors: List[dict]) -> None:
+        super().__init__(f"{len(errors)} invalid event(s)")
+        self.errors = errors
+
+
+def parse_event_batch(body: bytes, ndjson: bool) -> List[EventIn]:
+    """JSON array or NDJSON (one object per line) -> validated events, all errors at once."""
+    try:
+        if ndjson:
+            items = [fast_json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = fast_json.loads(body)
+    except ValueError as exc:
+        raise EventBatchError([{"loc": ["body"], "msg": f"Некорректный JSON: {exc}", "type": "json_invalid"}]) from None
+    if not isinstance(items, list):
+        raise EventBatchError([{"loc": ["body"], "msg": "Ожидается массив событий", "type": "list_type"}])
+    if len(items) > MAX_BATCH_EVENTS:
+        raise EventBatchError([{
+            "loc": ["body"],
+            "msg": f"Не больше {MAX_BATCH_EVENTS} событий за запрос",
+            "type": "too_long",
+        }])
+    try:
+        return _batch_adapter.validate_python(items)
+    except ValidationError as exc:
+        raise EventBatchError([
+            {"loc": ["body", *err["loc"]], "msg": err["msg"], "type": err["type"]} for err in exc.errors()
+        ]) from None
+
+
+def _check_zones(db: Session, events: List[EventIn]) -> List[int]:
+    """map_id of every event from its zone; unknown zones and map mismatches are errors."""
+    zone_ids = sorted({e.zone_id for e in events})
+    zone_maps = dict(db.execute(
+        text("SELECT id, map_id FROM zones WHERE id = ANY(:ids)"),
+        {"ids": zone_ids},
+    ).all())
+    errors = []
+    map_ids = []
+    for i, e in enumerate(events):
+        map_id = zone_maps.get(e.zone_id)
+        if map_id is None:
+            errors.append({"loc": ["body", i, "zone_id"], "msg": "Зона не найдена", "type": "zone_not_found"})
+        elif e.map_id is not None and e.map_id != map_id:
+            errors.append({"loc": ["body", i, "map_id"], "msg": "Зона относится к другой карте", "type": "map_mismatch"})
+        map_ids.append(map_id)
+    if errors:
+        raise EventBatchError(errors)
+    return map_ids
+
+
+ALLOCATE_IDS_SQL = text("""
+SELECT nextval(pg_get_serial_sequence('events', 'id'))
+FROM generate_series(1, :n)
+""")
+
+# Ключ занимается раньше, чем пишется событие (FK отложенный): при гонке двух
+# повторов второй ждёт коммита первого на ON CONFLICT и получает его id.
+CLAIM_KEYS_SQL = text("""
+INSERT INTO event_idempotency_keys (key, event_id)
+SELECT * FROM unnest(CAST(:keys AS text[]), CAST(:ids AS integer[]))
+ON CONFLICT (key) DO NOTHING
+RETURNING key
+""")
+
+EXISTING_KEYS_SQL = text("""
+SELECT key, event_id FROM event_idempotency_keys WHERE key = ANY(CAST(:keys AS text[]))
+""")
+
+# Одна многострочная вставка: столбцы передаются массивами, unnest собирает строки.
+INSERT_EVENTS_SQL = text("""
+INSERT INTO events (id, map_id, zone_id, status, title, description, created_at)
+SELECT id, map_id, zone_id, status, title, description, COALESCE(created_at, now())
+FROM unnest(
+  CAST(:ids AS integer[]),
+  CAST(:map_ids AS integer[]),
+  CAST(:zone_ids AS integer[]),
+  CAST(:statuses AS text[]),
+  CAST(:titles AS text[]),
+  CAST(:descriptions AS text[]),
+  CAST(:created_at AS timestamptz[])
+) AS t(id, map_id, zone_id, status, title, description, created_at)
+""")
+
+
+def insert_event_batch(db: Session, events: List[EventIn]) -> EventBatchResult:
+    """Insert a validated batch in one transaction with a constant number of statements.
+
+    Events with an idempotency key that is already stored (or repeated earlier
+    in the same batch) are not inserted again; their existing id is returned.
+    """
+    if not events:
+        return EventBatchResult(inserted=0, duplicates=0, ids=[])
+    map_ids = _check_zones(db, events)
+
+    # кандидаты на вставку: все без ключа и первое вхождение каждого ключа
+    first_by_key: dict[str, int] = {}
+    candidates: List[int] = []
+    for i, e in enumerate(events):
+        key = e.idempotency_key
+        if key is None:
+            candidates.append(i)
+        elif key not in first_by_key:
+            first_by_key[key] = i
+            candidates.append(i)
+
+    new_ids = [row[0] for row in db.execute(ALLOCATE_IDS_SQL, {"n": len(candidates)})]
+    id_of = dict(zip(candidates, new_ids))
+
+    key_ids: dict[str, int] = {}
+    if first_by_key:
+        keys = list(first_by_key)
+        claimed = set(db.execute(
+            CLAIM_KEYS_SQL,
+            {"keys": keys, "ids": [id_of[first_by_key[k]] for k in keys]},
+        ).scalars())
+        taken = [k for k in keys if k not in claimed]
+        if taken:
+            key_ids.update(db.execute(EXISTING_KEYS_SQL, {"keys": taken}).all())
+            for k in taken:
+                del id_of[first_by_key[k]]
+        for k in claimed:
+            key_ids[k] = id_of[first_by_key[k]]
+
+    rows = [(id_of[i], map_ids[i], events[i]) for i in candidates if i in id_of]
+    if rows:
+        db.execute(INSERT_EVENTS_SQL, {
+            "ids": [r[0] for r in rows],
+            "map_ids": [r[1] for r in rows],
+            "zone_ids": [r[2].zone_id for r in rows],
+            "statuses": [r[2].status for r in rows],
+            "titles": [r[2].title for r in rows],
+            "descriptions": [r[2].description for r in rows],
+            "created_at": [r[2].created_at for r in rows],
+        })
+    db.commit()
+
+    ids = [
+        key_ids[e.idempotency_key] if e.idempotency_key is not None else id_of[i]
+        for i, e in enumerate(events)
+    ]
+    return EventBatchResult(inserted=len(rows), duplicates=len(events) - len(rows), ids=ids)
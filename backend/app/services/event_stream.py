@@ -0,0 +1,288 @@
+"""Live fan-out of new events to SSE/WebSocket subscribers.
+
+One backend per worker produces batches of new events and hands them to the
+in-process ``EventBroadcaster``, which serializes each event once and offers
+it to every matching subscriber's bounded queue. A subscriber whose queue is
+full is dropped rather than slowing everyone else down or growing memory;
+the client reconnects and catches up through the paginated feed.
+
+- ``PostgresEventBackend``: a single LISTEN connection per worker. The
+  ``events_notify`` trigger (migration 82d69f9fca49) sends the ids of every
+  insert statement on commit; the listener loads those rows with one query
+  and publishes them. Notifications sent while it is reconnecting are lost,
+  so after each re-LISTEN it loads events with ids above the last one seen.
+- ``MemoryEventBackend``: ``publish()`` straight into the broadcaster, for
+  tests and for running without a database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import fast_json
+from app.db.session import SessionLocal, engine
+from app.services.event_service import feed_rows_after_id, feed_rows_by_ids, max_event_id
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "events_new"
+DEFAULT_QUEUE_SIZE = 256
+RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+# Сколько пропущенных за переподключение событий догружается; остальное - через ленту
+CATCH_UP_LIMIT = 1000
+
+
+class SlowConsumer(Exception):
+    """The subscriber fell behind by more than its queue and was dropped."""
+
+
+# Событие в очереди подписчика: (сам объект для фильтров, готовый JSON).
+Message = tuple[dict, bytes]
+_DROPPED = object()
+
+
+@dataclass(eq=False)
+class Subscription:
+    queue: asyncio.Queue
+    map_id: Optional[int] = None
+    zone_id: Optional[int] = None
+    statuses: frozenset = field(default_factory=frozenset)
+    dropped: bool = False
+
+    def matches(self, event: dict) -> bool:
+        return (
+            (self.map_id is None or event.get("map_id") == self.map_id)
+            and (self.zone_id is None or event.get("zone_id") == self.zone_id)
+            and (not self.statuses or event.get("status") in self.statuses)
+        )
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Message]:
+        """Next message; None on timeout (time for a heartbeat), SlowConsumer if dropped."""
+        try:
+            item = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if item is _DROPPED:
+            raise SlowConsumer()
+        return item
+
+
+class EventBroadcaster:
+    """In-process fan-out; all methods run on the event loop thread."""
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        self.queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(
+        self,
+        map_id: Optional[int] = None,
+        zone_id: Optional[int] = None,
+        statuses: Sequence[str] = (),
+        queue_size: Optional[int] = None,
+    ) -> Subscription:
+        sub = Subscription(
+            queue=asyncio.Queue(queue_size or self.queue_size),
+            map_id=map_id,
+            zone_id=zone_id,
+            statuses=frozenset(statuses),
+        )
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def publish(self, events: Sequence[dict]) -> None:
+        for event in events:
+            message = (event, fast_json.dumps(event))
+            self.published += 1
+            for sub in list(self._subscribers):
+                if not sub.matches(event):
+                    continue
+                try:
+                    sub.queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    self._drop(sub)
+
+    def _drop(self, sub: Subscription) -> None:
+        # очередь освобождается, чтобы метка сброса дошла до читателя сразу
+        self._subscribers.discard(sub)
+        sub.dropped = True
+        self.dropped += 1
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(_DROPPED)
+
+
+class MemoryEventBackend:
+    """No database: events come from ``publish``; for tests and local runs."""
+
+    def __init__(self, broadcaster: EventBroadcaster) -> None:
+        self.broadcaster = broadcaster
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def publish(self, events: Sequence[dict]) -> None:
+        self.broadcaster.publish(events)
+
+
+class PostgresEventBackend:
+    """One LISTEN connection per worker; reconnects with backoff when it is lost."""
+
+    def __init__(self, broadcaster: EventBroadcaster) -> None:
+        self.broadcaster = broadcaster
+        self._task: Optional[asyncio.Task] = None
+        self._pending: asyncio.Queue = asyncio.Queue()
+        # наибольший известный id; None - ещё ни разу не подключались
+        self._last_id: Optional[int] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        attempt = 0
+
+        def listening() -> None:
+            # _listen возвращается только исключением: счётчик сбрасывает успешный LISTEN
+            nonlocal attempt
+            attempt = 0
+
+        while True:
+            try:
+                await self._listen(listening)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                delay = RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)]
+                attempt += 1
+                logger.warning("event listener: %s; reconnecting in %ss", exc, delay)
+                await asyncio.sleep(delay)
+
+    async def _listen(self, on_listening: Callable[[], None]) -> None:
+        loop = asyncio.get_running_loop()
+        raw = await run_in_threadpool(engine.raw_connection)
+        raw.detach()  # своё соединение на всё время жизни воркера, вне пула
+        conn = raw.driver_connection
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        lost: asyncio.Future = loop.create_future()
+
+        def on_readable() -> None:
+            try:
+                conn.poll()
+            except Exception as exc:  # noqa: BLE001
+                if not lost.done():
+                    lost.set_exception(exc)
+                return
+            while conn.notifies:
+                self._pending.put_nowait(conn.notifies.pop(0).payload)
+
+        loop.add_reader(conn.fileno(), on_readable)
+        fetcher: Optional[asyncio.Task] = None
+        try:
+            # LISTEN уже действует: всё, что закоммитят после догрузки, придёт уведомлением
+            caught_up = await self._catch_up()
+            fetcher = asyncio.create_task(self._fetch_loop(caught_up))
+            on_listening()
+            logger.info("event listener: LISTEN %s", NOTIFY_CHANNEL)
+            await lost
+        finally:
+            loop.remove_reader(conn.fileno())
+            if fetcher is not None:
+                fetcher.cancel()
+            conn.close()
+
+    async def _catch_up(self) -> frozenset:
+        """Publish events committed while nobody listened; returns their ids.
+
+        On the first connect there is nothing to catch up: it only remembers
+        the current highest id.
+        """
+        if self._last_id is None:
+            self._last_id = await run_in_threadpool(self._max_id)
+            return frozenset()
+        events = await run_in_threadpool(self._load_after, self._last_id)
+        if not events:
+            return frozenset()
+        if len(events) >= CATCH_UP_LIMIT:
+            logger.warning("event listener: over %d events missed while reconnecting", CATCH_UP_LIMIT)
+        self._last_id = max(self._last_id, max(e["id"] for e in events))
+        self.broadcaster.publish(sorted(events, key=lambda e: (e["created_at"], e["id"])))
+        return frozenset(e["id"] for e in events)
+
+    async def _fetch_loop(self, skip: frozenset = frozenset()) -> None:
+        while True:
+            ids = self._ids(await self._pending.get())
+            # уведомления, пришедшие за время запроса, забираются одним следующим запросом
+            while not self._pending.empty():
+                ids.extend(self._ids(self._pending.get_nowait()))
+            # уже отданные догрузкой после переподключения
+            ids = [i for i in ids if i not in skip]
+            if ids:
+                self._last_id = max(self._last_id or 0, *ids)
+            if not ids or not self.broadcaster.subscriber_count:
+                continue
+            try:
+                events = await run_in_threadpool(self._load, ids)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("event listener: failed to load %d events: %s", len(ids), exc)
+                continue
+            self.broadcaster.publish(events)
+
+    @staticmethod
+    def _ids(payload: str) -> list[int]:
+        try:
+            return [int(i) for i in fast_json.loads(payload)]
+        except (TypeError, ValueError):
+            logger.warning("event listener: bad payload %r", payload[:100])
+            return []
+
+    @staticmethod
+    def _load(ids: list[int]) -> list[dict]:
+        with SessionLocal() as db:
+            return feed_rows_by_ids(db, ids)
+
+    @staticmethod
+    def _load_after(after_id: int) -> list[dict]:
+        with SessionLocal() as db:
+            return feed_rows_after_id(db, after_id, CATCH_UP_LIMIT)
+
+    @staticmethod
+    def _max_id() -> int:
+        with SessionLocal() as db:
+            return max_event_id(db)
+
+
+# Один на воркер; бэкенд выбирается при старте приложения (EVENT_STREAM_BACKEND).
+event_broadcaster = EventBroadcaster()
+
+
+def create_event_backend(kind: str, broadcaster: EventBroadcaster = event_broadcaster):
+    if kind == "memory":
+        return MemoryEventBackend(broadcaster)
+    if kind == "postgres":
+        return PostgresEventBackend(broadcaster)
+    raise ValueError(f"unknown event stream backend: {kind!r}")
@@ -1,16 +1,39 @@
 from typing import Optional
 
 from fastapi import UploadFile
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app.core.config import settings
+from app.models.map import Map as MapModel
 from app.schemas.map import Map
+from app.services.content_store import get_content_store, upload_file_chunks
 
 
 class MapService:
-    def upload_map(self, file: UploadFile) -> Map:
-        # TODO: Save file to storage and store metadata in DB
-        return Map(id=1, filename=file.filename, bounds={"type": "FeatureCollection"})
+    async def upload_map(self, db: Session, file: UploadFile) -> Map:
+        """Store the file in the content store (in chunks) and record it as a new map."""
+        blob = await get_content_store().save(upload_file_chunks(file), settings.ATTACHMENT_MAX_BYTES)
+        filename = file.filename or blob.sha256
 
-    def get_current_map(self) -> Optional[Map]:
-        # TODO: Retrieve latest uploaded map
-        return Map(id=1, filename="current-map.png", bounds={"type": "FeatureCollection"})
+        def save() -> MapModel:
+            row = MapModel(name=filename, image_path=blob.relative)
+            db.add(row)
+            db.commit()
+            db.refresh(row)
+            return row
 
+        row = await run_in_threadpool(save)
+        return Map(id=row.id, filename=filename, bounds=None)
+
+    def get_current_map(self, db: Session) -> Optional[Map]:
+        row = db.execute(
+            select(MapModel)
+            .where(MapModel.image_path.is_not(None))
+            .order_by(MapModel.created_at.desc(), MapModel.id.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+        if row is None:
+            return None
+        return Map(id=row.id, filename=row.name, bounds=None)
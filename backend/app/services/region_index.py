@@ -0,0 +1,193 @@
+"""In-memory reverse geocoding: which region / district contains a point.
+
+Polygons are kept in an STR-packed R-tree; a lookup is a bbox descent plus
+exact point-in-polygon tests on the few candidates, without touching the DB.
+Indexes are rebuilt when their source changes: the ``data_versions`` counter
+for regions, file mtime/size for static layers under MAPS_DIR. The regions
+counter is polled by a background task (``refresh_regions_index_forever``),
+so a lookup itself never waits on the database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.geo.geojson import as_features
+from app.geo.pip_numpy import PolygonArrays
+from app.geo.polygons import Polygon, polygon_bbox, polygon_contains, polygons_of
+from app.geo.strtree import STRtree
+from app.services.region_lod import FULL_LEVEL
+from app.services.region_service import get_regions_version, load_region_features
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureIndex:
+    def __init__(self, features: list[dict]) -> None:
+        self.properties: list[dict] = []
+        # Каждая часть мультиполигона индексируется отдельно: (номер объекта, полигон).
+        self.parts: list[tuple[int, Polygon]] = []
+        for feature in features:
+            polygons = polygons_of(feature.get("geometry"))
+            if not polygons:
+                continue
+            fid = len(self.properties)
+            self.properties.append(dict(feature.get("properties") or {}))
+            self.parts.extend((fid, polygon) for polygon in polygons)
+        self.tree = STRtree([polygon_bbox(polygon) for _, polygon in self.parts])
+        self._arrays: Optional[PolygonArrays] = None
+        self._arrays_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+    def locate_id(self, lon: float, lat: float) -> Optional[int]:
+        for part in self.tree.query_point(lon, lat):
+            fid, polygon = self.parts[part]
+            if polygon_contains(polygon, lon, lat):
+                return fid
+        return None
+
+    def locate(self, lon: float, lat: float) -> Optional[dict]:
+        fid = self.locate_id(lon, lat)
+        return None if fid is None else self.properties[fid]
+
+    @property
+    def arrays(self) -> PolygonArrays:
+        # Плоские массивы рёбер нужны только пакетному режиму - строим при первом запросе.
+        if self._arrays is None:
+            with self._arrays_lock:
+                if self._arrays is None:
+                    self._arrays = PolygonArrays(self.parts)
+        return self._arrays
+
+    def assign(self, points: np.ndarray) -> np.ndarray:
+        """Feature number for each (lon, lat) row, -1 if the point is outside all features."""
+        return self.arrays.assign(points)
+
+
+class VersionedIndex:
+    """Holds the latest FeatureIndex and rebuilds it once per source version."""
+
+    def __init__(self) -> None:
+        self._version: Any = None
+        self._index: Optional[FeatureIndex] = None
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> Optional[FeatureIndex]:
+        return self._index
+
+    def get(self, version: Hashable, load: Callable[[], list[dict]]) -> FeatureIndex:
+        index = self._index
+        if index is not None and self._version == version:
+            return index
+        with self._lock:
+            if self._index is None or self._version != version:
+                self._index = FeatureIndex(load())
+                self._version = version
+            return self._index
+
+
+_regions_index = VersionedIndex()
+_layer_indexes: dict[str, VersionedIndex] = {}
+_layer_guard = threading.Lock()
+
+
+def get_regions_index(db: Session) -> FeatureIndex:
+    """Check the version in the DB and rebuild if it changed; used by the refresh task."""
+    return _regions_index.get(
+        get_regions_version(db),
+        lambda: load_region_features(db, FULL_LEVEL),
+    )
+
+
+def refresh_regions_index() -> FeatureIndex:
+    with SessionLocal() as db:
+        return get_regions_index(db)
+
+
+def regions_index() -> FeatureIndex:
+    """Index held in memory; the DB is read only if nothing has been loaded yet."""
+    index = _regions_index.current
+    return index if index is not None else refresh_regions_index()
+
+
+async def refresh_regions_index_forever(interval_seconds: float) -> None:
+    """Background loop: picks up a new data_versions.regions within ``interval_seconds``."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(refresh_regions_index)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("region index refresh failed: %s", exc)
+
+
+def _load_layer(path: Path) -> list[dict]:
+    with path.open("r", encoding="utf-8") as f:
+        return as_features(json.load(f))
+
+
+def get_layer_index(code: str) -> Optional[FeatureIndex]:
+    """Index of a static layer, e.g. ``66/districts`` -> MAPS_DIR/66/districts.geojson."""
+    root = Path(settings.MAPS_DIR).resolve()
+    path = (root / f"{code}.geojson").resolve()
+    if root not in path.parents:
+        return None
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    with _layer_guard:
+        holder = _layer_indexes.setdefault(code, VersionedIndex())
+    return holder.get((st.st_mtime_ns, st.st_size), lambda: _load_layer(path))
+
+
+REGIONS_LAYER = "regions"
+
+
+def get_index(layer: str) -> Optional[FeatureIndex]:
+    if layer == REGIONS_LAYER:
+        return regions_index()
+    return get_layer_index(layer)
+
+
+def assign_points(layer: str, points: np.ndarray) -> Optional[dict]:
+    index = get_index(layer)
+    if index is None:
+        return None
+    assignments = index.assign(points)
+    return {
+        "layer": layer,
+        "count": int(len(assignments)),
+        "matched": int(np.count_nonzero(assignments >= 0)),
+        "features": index.properties,
+        "assignments": assignments.tolist(),
+    }
+
+
+def locate_point(lon: float, lat: float) -> dict:
+    district = None
+    for code in settings.DISTRICT_LAYERS:
+        index = get_layer_index(code)
+        found = index.locate(lon, lat) if index is not None else None
+        if found is not None:
+            district = {"layer": code, **found}
+            break
+    return {
+        "lon": lon,
+        "lat": lat,
+        "region": regions_index().locate(lon, lat),
+        "district": district,
+    }
@@ -0,0 +1,72 @@
+"""Level-of-detail scheme for region geometries.
+
+Every level is a separate geometry column of ``regions`` filled at import time
+(see ``tools/import_regions.py``). Levels are ordered from the coarsest to the
+full-resolution ``geom``. This module has no app dependencies so that the
+import tools can share it.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class LodLevel:
+    column: str
+    # Допуск ST_SimplifyPreserveTopology в градусах; None — исходная геометрия.
+    tolerance: Optional[float]
+    # Наибольший зум карты, для которого уровня достаточно; None — без ограничения.
+    max_zoom: Optional[int]
+
+
+LOD_LEVELS: tuple[LodLevel, ...] = (
+    LodLevel("geom_z3", 0.2, 3),
+    LodLevel("geom_simplified", 0.05, 5),
+    LodLevel("geom_z7", 0.01, 7),
+    LodLevel("geom_z9", 0.002, 9),
+    LodLevel("geom", None, None),
+)
+
+DEFAULT_LEVEL = LOD_LEVELS[1]
+FULL_LEVEL = LOD_LEVELS[-1]
+SIMPLIFIED_LEVELS = LOD_LEVELS[:-1]
+
+
+def level_for_zoom(zoom: int) -> LodLevel:
+    for level in LOD_LEVELS:
+        if level.max_zoom is None or zoom <= level.max_zoom:
+            return level
+    return FULL_LEVEL
+
+
+def level_for_tolerance(tolerance: float) -> LodLevel:
+    """Coarsest level that is at least as accurate as the requested tolerance."""
+    for level in LOD_LEVELS:
+        if level.tolerance is None or level.tolerance <= tolerance:
+            return level
+    return FULL_LEVEL
+
+
+def pick_level(zoom: Optional[int] = None, tolerance: Optional[float] = None) -> LodLevel:
+    if tolerance is not None:
+        return level_for_tolerance(tolerance)
+    if zoom is not None:
+        return level_for_zoom(zoom)
+    return DEFAULT_LEVEL
+
+
+def geometry_expr(level: LodLevel, alias: str = "") -> str:
+    """SQL expression for the level, falling back to ``geom`` for rows not yet backfilled."""
+    prefix = f"{alias}." if alias else ""
+    if level.tolerance is None:
+        return f"{prefix}geom"
+    return f"COALESCE({prefix}{level.column}, {prefix}geom)"
+
+
+def simplify_sql(level: LodLevel, source: str = "geom") -> str:
+    return (
+        f"ST_Multi(ST_CollectionExtract("
+        f"ST_SimplifyPreserveTopology({source}, {level.tolerance!r}), 3))"
+    )
@@ -0,0 +1,165 @@
+import json
+from typing import Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.http_cache import CachedPayload, PayloadCache
+from app.db.session import engine
+from app.geo.formats import encode_features
+from app.geo.topojson import features_to_topology
+from app.services.region_lod import DEFAULT_LEVEL, LodLevel, geometry_expr
+
+REGIONS_DATA_NAME = "regions"
+
+# minx, miny, maxx, maxy в EPSG:4326
+Bbox = tuple[float, float, float, float]
+
+# Сколько строк забирать с серверного курсора и сколько байт копить перед отправкой чанка.
+STREAM_FETCH_ROWS = 64
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Все воркеры держат свою копию; согласованность обеспечивает счётчик в data_versions.
+regions_cache = PayloadCache()
+
+
+def get_data_version(db: Session, name: str) -> int:
+    """Current value of the change counter maintained by triggers in ``data_versions``."""
+    version = db.execute(
+        text("SELECT version FROM data_versions WHERE name = :name"),
+        {"name": name},
+    ).scalar()
+    return int(version or 0)
+
+
+def get_regions_version(db: Session) -> int:
+    return get_data_version(db, REGIONS_DATA_NAME)
+
+
+def bbox_filter(bbox: Optional[Bbox], column: str = "bbox") -> tuple[str, dict]:
+    """WHERE clause for a GiST-indexed ``&&`` test against a viewport envelope."""
+    if bbox is None:
+        return "", {}
+    minx, miny, maxx, maxy = bbox
+    clause = f"WHERE {column} && ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326)"
+    return clause, {"minx": minx, "miny": miny, "maxx": maxx, "maxy": maxy}
+
+
+def render_regions_geojson(
+    db: Session,
+    level: LodLevel = DEFAULT_LEVEL,
+    bbox: Optional[Bbox] = None,
+) -> bytes:
+    """Whole FeatureCollection rendered by Postgres straight into JSON text."""
+    where, params = bbox_filter(bbox)
+    q = text(f"""
+    SELECT json_build_object(
+      'type','FeatureCollection',
+      'features', COALESCE(json_agg(
+        json_build_object(
+          'type','Feature',
+          'properties', json_build_object(
+            'id', id,
+            'name', name
+          ),
+          'geometry', ST_AsGeoJSON({geometry_expr(level)})::json
+        )
+      ), '[]'::json)
+    )::text AS fc
+    FROM regions
+    {where};
+    """)
+    return db.execute(q, params).scalar_one().encode("utf-8")
+
+
+def load_region_features(db: Session, level: LodLevel = DEFAULT_LEVEL) -> list[dict]:
+    q = text(f"SELECT id, name, ST_AsGeoJSON({geometry_expr(level)}) FROM regions ORDER BY name")
+    return [
+        {
+            "type": "Feature",
+            "properties": {"id": row[0], "name": row[1]},
+            "geometry": json.loads(row[2]) if row[2] else None,
+        }
+        for row in db.execute(q)
+    ]
+
+
+def render_regions_topojson(db: Session, level: LodLevel = DEFAULT_LEVEL) -> bytes:
+    topology = features_to_topology({"regions": load_region_features(db, level)})
+    return json.dumps(topology, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def get_regions_topojson_payload(db: Session, level: LodLevel = DEFAULT_LEVEL) -> CachedPayload:
+    version = get_regions_version(db)
+    return regions_cache.get(
+        ("topojson", level.column),
+        version,
+        lambda: render_regions_topojson(db, level),
+    )
+
+
+def render_regions_binary(db: Session, fmt: str, level: LodLevel = DEFAULT_LEVEL) -> bytes:
+    features = load_region_features(db, level)
+    for feature in features:
+        # в бинарных форматах id - строка или целое, как в GeoJSON-выдаче
+        rid = feature["properties"]["id"]
+        if not isinstance(rid, (int, str)):
+            feature["properties"]["id"] = str(rid)
+    return encode_features(features, fmt, name="regions")
+
+
+def get_regions_binary_payload(db: Session, fmt: str, level: LodLevel = DEFAULT_LEVEL) -> CachedPayload:
+    version = get_regions_version(db)
+    return regions_cache.get(
+        (fmt, level.column),
+        version,
+        lambda: render_regions_binary(db, fmt, level),
+    )
+
+
+def get_regions_payload(db: Session, level: LodLevel = DEFAULT_LEVEL) -> CachedPayload:
+    version = get_regions_version(db)
+    return regions_cache.get(
+        ("geojson", level.column),
+        version,
+        lambda: render_regions_geojson(db, level),
+    )
+
+
+def iter_regions_geojson(
+    level: LodLevel = DEFAULT_LEVEL,
+    bbox: Optional[Bbox] = None,
+) -> Iterator[bytes]:
+    """FeatureCollection as a stream of byte chunks read through a server-side cursor.
+
+    Each row is rendered to Feature JSON text by Postgres and passed through as is,
+    so memory use does not depend on the number of regions. The generator owns its
+    connection: it outlives the request-scoped session of a StreamingResponse.
+    """
+    where, params = bbox_filter(bbox)
+    q = text(f"""
+    SELECT '{{"type":"Feature","properties":'
+           || json_build_object('id', id, 'name', name)::text
+           || ',"geometry":'
+           || COALESCE(ST_AsGeoJSON({geometry_expr(level)}), 'null')
+           || '}}'
+    FROM regions
+    {where}
+    """)
+
+    yield b'{"type":"FeatureCollection","features":['
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=STREAM_FETCH_ROWS).execute(q, params)
+        buf = bytearray()
+        first = True
+        for (feature,) in result:
+            if not first:
+                buf += b","
+            first = False
+            buf += feature.encode("utf-8")
+            if len(buf) >= STREAM_CHUNK_BYTES:
+                yield bytes(buf)
+                buf.clear()
+        if buf:
+            yield bytes(buf)
+    yield b"]}"
@@ -0,0 +1,172 @@
+"""Thumbnails of event images, rendered in a process pool.
+
+Derivatives live next to the content-addressed original:
+``ab/cd/<sha256>.<size>.<ext>``. The original never changes, so a derivative
+that exists is always current, and identical photos share thumbnails too.
+
+``ThumbnailJobs.submit`` is called once an image is attached and renders
+every size in the background. ``ThumbnailJobs.ensure`` renders one on
+demand for a request that arrives first. Both wait on the same future, so a
+file is never rendered twice at once. Decoding and resizing run in worker
+processes; the event loop only awaits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import os
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Literal, Optional, Sequence
+
+from app.core.config import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+ThumbnailFormat = Literal["webp", "jpeg"]
+
+# Длинная сторона, px: сетка галереи, карточка, просмотр на весь экран
+SIZES = (160, 480, 1280)
+DEFAULT_SIZE = 480
+FORMATS: tuple[ThumbnailFormat, ...] = ("webp", "jpeg")
+QUALITY = {"webp": 80, "jpeg": 82}
+MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+# Защита от "фото" на 20 000 x 20 000 пикселей
+MAX_SOURCE_PIXELS = 100_000_000
+
+
+def thumbnails_available() -> bool:
+    return Image is not None
+
+
+def thumbnail_path(original: Path, size: int, fmt: ThumbnailFormat) -> Path:
+    return original.with_name(f"{original.name}.{size}.{EXTENSIONS[fmt]}")
+
+
+def render_thumbnails(
+    original: str,
+    sizes: Sequence[int] = SIZES,
+    formats: Sequence[ThumbnailFormat] = FORMATS,
+) -> list[str]:
+    """Write missing derivatives of ``original``; returns the paths written.
+
+    Runs in a worker process. JPEG sources are decoded with DCT scaling
+    (``draft``) straight to about the largest requested size, which is most
+    of the saving for camera photos.
+    """
+    source = Path(original)
+    wanted = [
+        (size, fmt) for size in sorted(sizes, reverse=True) for fmt in formats
+        if not thumbnail_path(source, size, fmt).exists()
+    ]
+    if not wanted:
+        return []
+    Image.MAX_IMAGE_PIXELS = MAX_SOURCE_PIXELS
+    written = []
+    with Image.open(source) as im:
+        largest = wanted[0][0]
+        im.draft("RGB", (largest, largest))
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info or im.mode == "LA" else "RGB")
+        current = im
+        for size in sorted({size for size, _ in wanted}, reverse=True):
+            # каждый следующий размер уменьшается из предыдущего, а не из оригинала
+            if max(current.size) > size:
+                current = current.copy()
+                current.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            for fmt in formats:
+                if (size, fmt) not in wanted:
+                    continue
+                target = thumbnail_path(source, size, fmt)
+                image = current
+                if fmt == "jpeg" and image.mode != "RGB":
+                    image = _flatten(image)
+                buffer = io.BytesIO()
+                image.save(buffer, "WEBP" if fmt == "webp" else "JPEG", quality=QUALITY[fmt],
+                           **({"method": 4} if fmt == "webp" else {"optimize": True, "progressive": True}))
+                tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+                tmp.write_bytes(buffer.getvalue())
+                os.replace(tmp, target)
+                written.append(str(target))
+    return written
+
+
+def _flatten(image):
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A") if "A" in image.getbands() else None)
+    return background
+
+
+class ThumbnailJobs:
+    """Per-worker queue of thumbnail renders over a lazily started process pool."""
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._pool: Optional[Executor] = None
+        self._running: dict[tuple, asyncio.Future] = {}
+
+    def _executor(self) -> Optional[Executor]:
+        # 0 воркеров - пул потоков по умолчанию: без лишних процессов в тестах и на слабых машинах
+        if self.workers > 0 and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _run(self, original: Path, sizes: Sequence[int], formats: Sequence[ThumbnailFormat]) -> asyncio.Future:
+        key = (str(original), tuple(sizes), tuple(formats))
+        loop = asyncio.get_running_loop()
+        future = self._running.get(key)
+        if future is None or future.get_loop() is not loop:
+            future = loop.run_in_executor(self._executor(), render_thumbnails, str(original), sizes, formats)
+            self._running[key] = future
+
+            def forget(done: asyncio.Future) -> None:
+                if self._running.get(key) is done:
+                    del self._running[key]
+
+            future.add_done_callback(forget)
+        return future
+
+    def submit(self, original: Path) -> None:
+        """All sizes in the background; errors are logged, the upload has already succeeded."""
+        if not thumbnails_available():
+            return
+
+        def done(future: asyncio.Future) -> None:
+            if not future.cancelled() and future.exception() is not None:
+                logger.warning("thumbnails of %s failed: %s", original.name, future.exception())
+
+        self._run(original, SIZES, FORMATS).add_done_callback(done)
+
+    async def ensure(self, original: Path, size: int, fmt: ThumbnailFormat) -> Path:
+        target = thumbnail_path(original, size, fmt)
+        if target.exists():
+            return target
+        # уже рисуется фоновой задачей после загрузки - ждём её, а не рисуем второй раз
+        loop = asyncio.get_running_loop()
+        for (path, sizes, formats), future in list(self._running.items()):
+            if path == str(original) and size in sizes and fmt in formats and future.get_loop() is loop:
+                await asyncio.shield(future)
+                break
+        if not target.exists():
+            await asyncio.shield(self._run(original, (size,), (fmt,)))
+        return target
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Один на воркер приложения; пул процессов поднимается при первой картинке.
+thumbnail_jobs = ThumbnailJobs(settings.THUMBNAIL_WORKERS)
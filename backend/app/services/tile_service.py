@@ -0,0 +1,174 @@
+"""Mapbox Vector Tiles for the regions layer with a content-addressed disk cache.
+
+Layout of ``TILE_CACHE_DIR``::
+
+    objects/ab/ab12...ef.mvt      tile bytes, file name = sha256 of the content
+    refs/<version>/<z>/<x>/<y>    sha256 of the tile for that regions version
+
+Identical tiles (most notably the empty ones over the sea) are stored once,
+and a new regions version simply starts a new ``refs/<version>`` tree.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.region_lod import geometry_expr, level_for_zoom
+from app.services.region_service import get_regions_version
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+MVT_LAYER_NAME = "regions"
+MVT_EXTENT = 4096
+MVT_BUFFER = 64
+
+_TILE_SQL = """
+WITH bounds AS (
+  SELECT ST_TileEnvelope(:z, :x, :y) AS merc,
+         ST_Transform(ST_TileEnvelope(:z, :x, :y), 4326) AS wgs
+),
+mvtgeom AS (
+  SELECT r.id::text AS id,
+         r.name,
+         ST_AsMVTGeom(
+           ST_Transform({geom_expr}, 3857),
+           bounds.merc, {extent}, {buffer}, true
+         ) AS geom
+  FROM regions r, bounds
+  WHERE r.geom && bounds.wgs
+)
+SELECT ST_AsMVT(mvtgeom, '{layer}', {extent}, 'geom')
+FROM mvtgeom
+WHERE geom IS NOT NULL
+"""
+
+
+@dataclass(frozen=True)
+class Tile:
+    data: bytes
+    digest: str
+
+
+def render_regions_tile(db: Session, z: int, x: int, y: int) -> bytes:
+    q = text(
+        _TILE_SQL.format(
+            geom_expr=geometry_expr(level_for_zoom(z), alias="r"),
+            extent=MVT_EXTENT,
+            buffer=MVT_BUFFER,
+            layer=MVT_LAYER_NAME,
+        )
+    )
+    data = db.execute(q, {"z": z, "x": x, "y": y}).scalar()
+    return bytes(data) if data else b""
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    if not settings.TILE_MIN_ZOOM <= z <= settings.TILE_MAX_ZOOM:
+        return False
+    n = 1 << z
+    return 0 <= x < n and 0 <= y < n
+
+
+def lonlat_to_tile(lon: float, lat: float, z: int) -> tuple[int, int]:
+    n = 1 << z
+    lat = max(min(lat, 85.0511287798), -85.0511287798)
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_bbox(
+    bbox: tuple[float, float, float, float], min_zoom: int, max_zoom: int
+) -> Iterator[tuple[int, int, int]]:
+    minx, miny, maxx, maxy = bbox
+    for z in range(min_zoom, max_zoom + 1):
+        x0, y0 = lonlat_to_tile(minx, maxy, z)
+        x1, y1 = lonlat_to_tile(maxx, miny, z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield z, x, y
+
+
+class TileCache:
+    def __init__(self, root: str | os.PathLike) -> None:
+        self.root = Path(root)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.mvt"
+
+    def _ref_path(self, version: int, z: int, x: int, y: int) -> Path:
+        return self.root / "refs" / str(version) / str(z) / str(x) / str(y)
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def get(self, version: int, z: int, x: int, y: int) -> Optional[Tile]:
+        try:
+            digest = self._ref_path(version, z, x, y).read_text().strip()
+            data = self._object_path(digest).read_bytes()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return Tile(data=data, digest=digest)
+
+    def put(self, version: int, z: int, x: int, y: int, data: bytes) -> Tile:
+        digest = hashlib.sha256(data).hexdigest()
+        obj = self._object_path(digest)
+        if not obj.exists():
+            self._atomic_write(obj, data)
+        self._atomic_write(self._ref_path(version, z, x, y), digest.encode("ascii"))
+        return Tile(data=data, digest=digest)
+
+    def prune(self, keep_version: int) -> int:
+        """Drop refs of other versions and objects no longer referenced. Returns removed objects."""
+        refs_root = self.root / "refs"
+        if refs_root.exists():
+            for child in refs_root.iterdir():
+                if child.name != str(keep_version):
+                    shutil.rmtree(child, ignore_errors=True)
+
+        live: set[str] = set()
+        for ref in (refs_root / str(keep_version)).rglob("*"):
+            if ref.is_file():
+                live.add(ref.read_text().strip())
+
+        removed = 0
+        objects_root = self.root / "objects"
+        if objects_root.exists():
+            for obj in objects_root.rglob("*.mvt"):
+                if obj.stem not in live:
+                    obj.unlink()
+                    removed += 1
+        return removed
+
+
+tile_cache = TileCache(settings.TILE_CACHE_DIR)
+
+
+def get_regions_tile(db: Session, z: int, x: int, y: int, version: Optional[int] = None) -> Tile:
+    if version is None:
+        version = get_regions_version(db)
+    tile = tile_cache.get(version, z, x, y)
+    if tile is None:
+        tile = tile_cache.put(version, z, x, y, render_regions_tile(db, z, x, y))
+    return tile
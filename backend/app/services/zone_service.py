@@ -1,7 +1,12 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core import fast_json
 from app.schemas.zone import Zone
 from app.schemas.zone_state import ZoneState
+from app.services.region_service import Bbox, bbox_filter
 
 
 class ZoneService:
@@ -30,3 +35,85 @@ class ZoneService:
             summary_text="Zone status summary",
         )
 
+
+# Возвращает safe_geom_from_geojson, если её создала миграция 8f174b20275b (только с PostGIS):
+# тогда же появляется и индексируемая колонка zones.bbox.
+ZONES_POSTGIS_SQL = text("SELECT to_regprocedure('safe_geom_from_geojson(text)') IS NOT NULL")
+GEOMETRY_TYPES = {"Point", "MultiPoint", "LineString", "MultiLineString", "Polygon", "MultiPolygon"}
+
+# Проверяется один раз на процесс: PostGIS ставится миграцией, после неё сервис перезапускают.
+_zones_postgis: Optional[bool] = None
+
+
+def zones_postgis_available(db: Session) -> bool:
+    global _zones_postgis
+    if _zones_postgis is None:
+        _zones_postgis = db.get_bind().dialect.name == "postgresql" and bool(db.execute(ZONES_POSTGIS_SQL).scalar())
+    return _zones_postgis
+
+
+def zone_geometry_json(raw: Optional[str]) -> bytes:
+    """GeoJSON geometry from the zones.geometry text; ``null`` for anything that is not one.
+
+    A Feature wrapper is unwrapped, like safe_geom_from_geojson() does in the database.
+    """
+    if not raw or not raw.strip():
+        return b"null"
+    try:
+        doc = fast_json.loads(raw)
+    except ValueError:
+        return b"null"
+    if isinstance(doc, dict) and doc.get("type") == "Feature":
+        doc = doc.get("geometry")
+    if not isinstance(doc, dict):
+        return b"null"
+    if doc.get("type") == "GeometryCollection":
+        if not isinstance(doc.get("geometries"), list):
+            return b"null"
+    elif doc.get("type") not in GEOMETRY_TYPES or not isinstance(doc.get("coordinates"), list):
+        return b"null"
+    return fast_json.dumps(doc)
+
+
+def render_zones_geojson(
+    db: Session,
+    bbox: Optional[Bbox] = None,
+    map_id: Optional[int] = None,
+) -> bytes:
+    """Zones as a FeatureCollection; geometries that do not parse come out as ``null``.
+
+    With PostGIS the document is built by Postgres and ``bbox`` uses the GiST
+    index on zones.bbox. Without it there is no bbox column: geometries are
+    checked in Python and ``bbox`` is ignored (all zones are a superset of
+    any viewport).
+    """
+    postgis = zones_postgis_available(db)
+    where, params = bbox_filter(bbox) if postgis else ("", {})
+    if map_id is not None:
+        where = f"{where} AND map_id = :map_id" if where else "WHERE map_id = :map_id"
+        params["map_id"] = map_id
+
+    if not postgis:
+        q = text(f"SELECT id, map_id, name, geometry FROM zones {where} ORDER BY id")
+        features = b",".join(
+            b'{"type":"Feature","properties":'
+            + fast_json.dumps({"id": zone_id, "map_id": zone_map_id, "name": name})
+            + b',"geometry":'
+            + zone_geometry_json(geometry)
+            + b"}"
+            for zone_id, zone_map_id, name, geometry in db.execute(q, params)
+        )
+        return b'{"type":"FeatureCollection","features":[' + features + b"]}"
+
+    q = text(f"""
+    SELECT '{{"type":"Feature","properties":'
+           || json_build_object('id', id, 'map_id', map_id, 'name', name)::text
+           || ',"geometry":'
+           || COALESCE(ST_AsGeoJSON(safe_geom_from_geojson(geometry)), 'null')
+           || '}}'
+    FROM zones
+    {where}
+    ORDER BY id
+    """)
+    features = b",".join(row[0].encode("utf-8") for row in db.execute(q, params))
+    return b'{"type":"FeatureCollection","features":[' + features + b"]}"
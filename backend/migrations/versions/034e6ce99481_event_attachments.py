@@ -0,0 +1,68 @@
+"""event images and documents in content-addressed storage
+
+Revision ID: 034e6ce99481
+Revises: c388aa7d190a
+Create Date: 2026-10-18 20:31:44.127530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '034e6ce99481'
+down_revision: Union[str, Sequence[str], None] = 'c388aa7d190a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("event_images", "event_documents")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        # Модели были, таблиц в миграциях не было; внешнего ключа на секционированный events нет.
+        op.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+          id bigserial PRIMARY KEY,
+          event_id bigint NOT NULL,
+          name text NOT NULL,
+          file_path text NOT NULL,
+          created_at timestamptz NOT NULL DEFAULT now()
+        )
+        """)
+        # file_path - путь в хранилище (ab/cd/<sha256>); один файл может принадлежать многим строкам
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS sha256 char(64)")
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS size bigint")
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS content_type varchar(255)")
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_event_id ON {table} (event_id)")
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_sha256 ON {table} (sha256)")
+
+    op.execute("""
+    CREATE OR REPLACE FUNCTION events_delete_attachments() RETURNS trigger AS $$
+    BEGIN
+      DELETE FROM event_images WHERE event_id IN (SELECT id FROM old_rows);
+      DELETE FROM event_documents WHERE event_id IN (SELECT id FROM old_rows);
+      RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+    CREATE TRIGGER trg_events_delete_attachments
+    AFTER DELETE ON events
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION events_delete_attachments()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_events_delete_attachments ON events")
+    op.execute("DROP FUNCTION IF EXISTS events_delete_attachments()")
+    for table in TABLES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_sha256")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS content_type")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS size")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS sha256")
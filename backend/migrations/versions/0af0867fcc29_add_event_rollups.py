@@ -0,0 +1,118 @@
+"""add hourly event rollups maintained from trigger-captured deltas
+
+Revision ID: 0af0867fcc29
+Revises: fe6f1c798067
+Create Date: 2026-10-18 16:48:05.230917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0af0867fcc29'
+down_revision: Union[str, Sequence[str], None] = 'fe6f1c798067'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HOUR_BUCKET = "date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Итоги по (час, зона, статус); дневные считаются из часовых.
+    op.execute("""
+    CREATE TABLE event_rollup_hourly (
+      bucket timestamptz NOT NULL,
+      map_id integer NOT NULL,
+      zone_id integer NOT NULL,
+      status varchar(32) NOT NULL,
+      events bigint NOT NULL,
+      PRIMARY KEY (bucket, zone_id, status)
+    )
+    """)
+    op.execute("CREATE INDEX ix_event_rollup_hourly_map_bucket ON event_rollup_hourly (map_id, bucket)")
+    op.execute("CREATE INDEX ix_event_rollup_hourly_zone_bucket ON event_rollup_hourly (zone_id, bucket)")
+
+    # Ещё не свёрнутый хвост: по строке на группу на оператор, только дописывается
+    # (без UPDATE горячих строк итогов при вставке). events < 0 - удаления.
+    op.execute("""
+    CREATE TABLE event_rollup_deltas (
+      bucket timestamptz NOT NULL,
+      map_id integer NOT NULL,
+      zone_id integer NOT NULL,
+      status varchar(32) NOT NULL,
+      events bigint NOT NULL
+    )
+    """)
+    op.execute("CREATE INDEX ix_event_rollup_deltas_bucket ON event_rollup_deltas (bucket)")
+
+    # Водяной знак: когда и сколько дельт свёрнуто в последний раз.
+    op.execute("""
+    CREATE TABLE event_rollup_state (
+      name text PRIMARY KEY,
+      folded_at timestamptz NOT NULL DEFAULT now(),
+      folded_deltas bigint NOT NULL DEFAULT 0
+    )
+    """)
+    op.execute("INSERT INTO event_rollup_state (name) VALUES ('events')")
+
+    op.execute(f"""
+    CREATE OR REPLACE FUNCTION event_rollup_capture() RETURNS trigger AS $$
+    BEGIN
+      IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO event_rollup_deltas (bucket, map_id, zone_id, status, events)
+        SELECT {HOUR_BUCKET}, map_id, zone_id, status, count(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4;
+      END IF;
+      IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO event_rollup_deltas (bucket, map_id, zone_id, status, events)
+        SELECT {HOUR_BUCKET}, map_id, zone_id, status, -count(*)
+        FROM old_rows
+        GROUP BY 1, 2, 3, 4;
+      END IF;
+      RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+    # Запись в events ждёт, пока итоги заполнятся и появятся триггеры - ничего не теряется.
+    op.execute("LOCK TABLE events IN SHARE MODE")
+    op.execute(f"""
+    INSERT INTO event_rollup_hourly (bucket, map_id, zone_id, status, events)
+    SELECT {HOUR_BUCKET}, min(map_id), zone_id, status, count(*)
+    FROM events
+    GROUP BY 1, zone_id, status
+    """)
+    op.execute("""
+    CREATE TRIGGER trg_events_rollup_insert
+    AFTER INSERT ON events
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION event_rollup_capture()
+    """)
+    op.execute("""
+    CREATE TRIGGER trg_events_rollup_update
+    AFTER UPDATE ON events
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION event_rollup_capture()
+    """)
+    op.execute("""
+    CREATE TRIGGER trg_events_rollup_delete
+    AFTER DELETE ON events
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION event_rollup_capture()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_events_rollup_delete ON events")
+    op.execute("DROP TRIGGER IF EXISTS trg_events_rollup_update ON events")
+    op.execute("DROP TRIGGER IF EXISTS trg_events_rollup_insert ON events")
+    op.execute("DROP FUNCTION IF EXISTS event_rollup_capture()")
+    op.execute("DROP TABLE IF EXISTS event_rollup_state")
+    op.execute("DROP TABLE IF EXISTS event_rollup_deltas")
+    op.execute("DROP TABLE IF EXISTS event_rollup_hourly")
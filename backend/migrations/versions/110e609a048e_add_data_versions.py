@@ -0,0 +1,79 @@
+"""add data_versions change counters
+
+Revision ID: 110e609a048e
+Revises: 2a68057de53b
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '110e609a048e'
+down_revision: Union[str, Sequence[str], None] = '2a68057de53b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "data_versions",
+        sa.Column("name", sa.Text(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+    op.execute("INSERT INTO data_versions (name) VALUES ('regions')")
+
+    # Счётчик увеличивается один раз на оператор, поэтому массовый импорт
+    # стоит одного UPDATE, а не одного на строку.
+    op.execute("""
+    CREATE FUNCTION bump_data_version() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+      INSERT INTO data_versions (name, version, updated_at)
+      VALUES (TG_ARGV[0], 1, now())
+      ON CONFLICT (name) DO UPDATE
+        SET version = data_versions.version + 1,
+            updated_at = now();
+      RETURN NULL;
+    END;
+    $$;
+    """)
+
+    # Таблица regions создаётся вне alembic (PostGIS + tools/import_regions.py);
+    # если её ещё нет, триггер создаст import_regions.py перед загрузкой.
+    op.execute("""
+    DO $$
+    BEGIN
+      IF to_regclass('public.regions') IS NOT NULL THEN
+        CREATE TRIGGER regions_bump_version
+          AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON regions
+          FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('regions');
+      END IF;
+    END;
+    $$;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+    DO $$
+    BEGIN
+      IF to_regclass('public.regions') IS NOT NULL THEN
+        DROP TRIGGER IF EXISTS regions_bump_version ON regions;
+      END IF;
+    END;
+    $$;
+    """)
+    op.execute("DROP FUNCTION IF EXISTS bump_data_version()")
+    op.drop_table("data_versions")
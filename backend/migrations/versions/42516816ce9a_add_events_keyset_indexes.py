@@ -0,0 +1,41 @@
+"""add composite indexes for the keyset-paginated events feed
+
+Revision ID: 42516816ce9a
+Revises: 8f174b20275b
+Create Date: 2026-10-18 15:20:11.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '42516816ce9a'
+down_revision: Union[str, Sequence[str], None] = '8f174b20275b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Порядок ленты - (created_at DESC, id DESC); фильтр по равенству идёт первой колонкой.
+INDEXES = {
+    "ix_events_created_at_id": "created_at DESC, id DESC",
+    "ix_events_map_created_at_id": "map_id, created_at DESC, id DESC",
+    "ix_events_zone_created_at_id": "zone_id, created_at DESC, id DESC",
+    "ix_events_status_created_at_id": "status, created_at DESC, id DESC",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY - таблица событий большая, запись во время сборки не блокируем
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON events ({columns})")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
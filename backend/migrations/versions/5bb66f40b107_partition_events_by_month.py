@@ -0,0 +1,176 @@
+"""partition events by month on created_at
+
+Revision ID: 5bb66f40b107
+Revises: 82d69f9fca49
+Create Date: 2026-10-18 18:20:57.664203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5bb66f40b107'
+down_revision: Union[str, Sequence[str], None] = '82d69f9fca49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+KEYSET_INDEXES = {
+    "ix_events_created_at_id": "created_at DESC, id DESC",
+    "ix_events_map_created_at_id": "map_id, created_at DESC, id DESC",
+    "ix_events_zone_created_at_id": "zone_id, created_at DESC, id DESC",
+    "ix_events_status_created_at_id": "status, created_at DESC, id DESC",
+}
+
+TRIGGERS = """
+CREATE TRIGGER trg_events_rollup_insert
+AFTER INSERT ON events
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION event_rollup_capture();
+
+CREATE TRIGGER trg_events_rollup_update
+AFTER UPDATE ON events
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION event_rollup_capture();
+
+CREATE TRIGGER trg_events_rollup_delete
+AFTER DELETE ON events
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION event_rollup_capture();
+
+CREATE TRIGGER trg_events_notify
+AFTER INSERT ON events
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION events_notify();
+"""
+
+# Месячная секция [month, month + 1); строки из events_default этого диапазона
+# переносятся в неё (иначе ATTACH/CREATE не пройдёт).
+ENSURE_PARTITION_FN = """
+CREATE OR REPLACE FUNCTION ensure_event_partition(month date) RETURNS text AS $$
+DECLARE
+  start_ts timestamptz := date_trunc('month', month::timestamp) AT TIME ZONE 'UTC';
+  end_ts timestamptz := (date_trunc('month', month::timestamp) + interval '1 month') AT TIME ZONE 'UTC';
+  part text := 'events_p' || to_char(month, 'YYYY_MM');
+BEGIN
+  IF to_regclass(part) IS NOT NULL THEN
+    RETURN NULL;
+  END IF;
+  IF EXISTS (SELECT 1 FROM events_default WHERE created_at >= start_ts AND created_at < end_ts) THEN
+    EXECUTE format('CREATE TABLE %I (LIKE events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part);
+    EXECUTE format(
+      'WITH moved AS (DELETE FROM events_default WHERE created_at >= $1 AND created_at < $2 RETURNING *)
+       INSERT INTO %I SELECT * FROM moved', part)
+      USING start_ts, end_ts;
+    EXECUTE format('ALTER TABLE events ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', part, start_ts, end_ts);
+  ELSE
+    EXECUTE format('CREATE TABLE %I PARTITION OF events FOR VALUES FROM (%L) TO (%L)', part, start_ts, end_ts);
+  END IF;
+  RETURN part;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Внешние ключи на events.id (ключи идемпотентности, event_texts/images/documents):
+    # у секционированной таблицы id уникален только вместе с created_at.
+    op.execute("""
+    DO $$
+    DECLARE
+      fk record;
+    BEGIN
+      FOR fk IN
+        SELECT conrelid::regclass AS tbl, conname
+        FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = 'public.events'::regclass
+      LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', fk.tbl, fk.conname);
+      END LOOP;
+    END;
+    $$;
+    """)
+
+    op.execute("LOCK TABLE events IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER TABLE events RENAME TO events_unpartitioned")
+    op.execute("ALTER TABLE events_unpartitioned RENAME CONSTRAINT events_pkey TO events_unpartitioned_pkey")
+    for name in KEYSET_INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_old")
+    op.execute("""
+    CREATE TABLE events (
+      id integer NOT NULL DEFAULT nextval('events_id_seq'),
+      map_id integer NOT NULL REFERENCES maps (id) ON DELETE CASCADE,
+      zone_id integer NOT NULL REFERENCES zones (id) ON DELETE CASCADE,
+      status varchar(32) NOT NULL,
+      title varchar(255) NOT NULL,
+      description text,
+      created_at timestamptz NOT NULL DEFAULT now(),
+      PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE events_id_seq OWNED BY events.id")
+    # всё, для чего ещё нет месячной секции; ensure_event_partition перекладывает строки
+    op.execute("CREATE TABLE events_default PARTITION OF events DEFAULT")
+    for name, columns in KEYSET_INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON events ({columns})")
+    op.execute(ENSURE_PARTITION_FN)
+
+    # секции от самого старого события до MONTHS_AHEAD месяцев вперёд
+    op.execute(f"""
+    SELECT ensure_event_partition(m::date)
+    FROM generate_series(
+      date_trunc('month', COALESCE((SELECT min(created_at) FROM events_unpartitioned), now()) AT TIME ZONE 'UTC'),
+      date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{MONTHS_AHEAD} months',
+      interval '1 month'
+    ) AS m
+    """)
+    # Перенос без триггеров: итоги по этим событиям уже посчитаны.
+    op.execute("""
+    INSERT INTO events (id, map_id, zone_id, status, title, description, created_at)
+    SELECT id, map_id, zone_id, status, title, description, created_at
+    FROM events_unpartitioned
+    """)
+    op.execute("DROP TABLE events_unpartitioned")
+    op.execute(TRIGGERS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("LOCK TABLE events IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER TABLE events RENAME TO events_partitioned")
+    op.execute("ALTER TABLE events_partitioned RENAME CONSTRAINT events_pkey TO events_partitioned_pkey")
+    for name in KEYSET_INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_old")
+    op.execute("""
+    CREATE TABLE events (
+      id integer PRIMARY KEY DEFAULT nextval('events_id_seq'),
+      map_id integer NOT NULL REFERENCES maps (id) ON DELETE CASCADE,
+      zone_id integer NOT NULL REFERENCES zones (id) ON DELETE CASCADE,
+      status varchar(32) NOT NULL,
+      title varchar(255) NOT NULL,
+      description text,
+      created_at timestamptz NOT NULL DEFAULT now()
+    )
+    """)
+    op.execute("ALTER SEQUENCE events_id_seq OWNED BY events.id")
+    op.execute("""
+    INSERT INTO events (id, map_id, zone_id, status, title, description, created_at)
+    SELECT id, map_id, zone_id, status, title, description, created_at
+    FROM events_partitioned
+    """)
+    op.execute("DROP TABLE events_partitioned CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS ensure_event_partition(date)")
+    op.execute("CREATE INDEX ix_events_id ON events (id)")
+    for name, columns in KEYSET_INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON events ({columns})")
+    op.execute(TRIGGERS)
+    op.execute("""
+    ALTER TABLE event_idempotency_keys
+      ADD CONSTRAINT event_idempotency_keys_event_id_fkey
+      FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED
+    """)
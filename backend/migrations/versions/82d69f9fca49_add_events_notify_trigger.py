@@ -0,0 +1,52 @@
+"""notify listeners about inserted events
+
+Revision ID: 82d69f9fca49
+Revises: 0af0867fcc29
+Create Date: 2026-10-18 17:31:44.086120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '82d69f9fca49'
+down_revision: Union[str, Sequence[str], None] = '0af0867fcc29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # По уведомлению на оператор (пачками по 500 id - payload NOTIFY ограничен 8000 байт);
+    # доставляются при коммите, строки слушатель дочитывает сам.
+    op.execute("""
+    CREATE OR REPLACE FUNCTION events_notify() RETURNS trigger AS $$
+    DECLARE
+      ids text;
+    BEGIN
+      FOR ids IN
+        SELECT json_agg(id ORDER BY id)::text
+        FROM (SELECT id, (row_number() OVER (ORDER BY id) - 1) / 500 AS chunk FROM new_rows) AS t
+        GROUP BY chunk
+      LOOP
+        PERFORM pg_notify('events_new', ids);
+      END LOOP;
+      RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+    CREATE TRIGGER trg_events_notify
+    AFTER INSERT ON events
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION events_notify()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_events_notify ON events")
+    op.execute("DROP FUNCTION IF EXISTS events_notify()")
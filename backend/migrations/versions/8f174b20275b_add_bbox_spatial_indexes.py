@@ -0,0 +1,88 @@
+"""add GiST indexes for viewport (bbox) queries
+
+Revision ID: 8f174b20275b
+Revises: a3792482b5d1
+Create Date: 2026-10-18 13:05:52.410377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f174b20275b'
+down_revision: Union[str, Sequence[str], None] = 'a3792482b5d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # regions.bbox заполняет tools/import_regions.py (ST_Envelope)
+    op.execute("""
+    DO $$
+    BEGIN
+      IF to_regclass('public.regions') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS ix_regions_bbox ON regions USING gist (bbox);
+      END IF;
+    END;
+    $$;
+    """)
+
+    # zones.bbox - только при PostGIS: без него остальная схема zones обходится
+    has_postgis = op.get_bind().execute(sa.text("SELECT to_regtype('geometry') IS NOT NULL")).scalar()
+    if not has_postgis:
+        return
+
+    # zones.geometry - GeoJSON-текст, в том числе Feature или мусор. Ошибку разбора
+    # гасим здесь: такая зона остаётся без рамки, а не ломает миграцию и INSERT/UPDATE.
+    op.execute("""
+    CREATE OR REPLACE FUNCTION safe_geom_from_geojson(doc text) RETURNS geometry
+    LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $$
+    DECLARE
+      j jsonb;
+    BEGIN
+      IF doc IS NULL OR btrim(doc) = '' THEN
+        RETURN NULL;
+      END IF;
+      j := doc::jsonb;
+      IF j->>'type' = 'Feature' THEN
+        j := j->'geometry';
+      END IF;
+      IF j IS NULL OR jsonb_typeof(j) <> 'object' THEN
+        RETURN NULL;
+      END IF;
+      RETURN ST_SetSRID(ST_GeomFromGeoJSON(j::text), 4326);
+    EXCEPTION WHEN others THEN
+      RETURN NULL;
+    END;
+    $$;
+    """)
+    op.execute("ALTER TABLE zones ADD COLUMN IF NOT EXISTS bbox geometry(Geometry, 4326)")
+    op.execute("""
+    CREATE OR REPLACE FUNCTION zones_set_bbox() RETURNS trigger AS $$
+    BEGIN
+      NEW.bbox := ST_Envelope(safe_geom_from_geojson(NEW.geometry));
+      RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+    op.execute("UPDATE zones SET bbox = ST_Envelope(safe_geom_from_geojson(geometry))")
+    op.execute("""
+    CREATE TRIGGER trg_zones_set_bbox
+    BEFORE INSERT OR UPDATE OF geometry ON zones
+    FOR EACH ROW EXECUTE FUNCTION zones_set_bbox()
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_zones_bbox ON zones USING gist (bbox)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_zones_bbox")
+    op.execute("DROP TRIGGER IF EXISTS trg_zones_set_bbox ON zones")
+    op.execute("DROP FUNCTION IF EXISTS zones_set_bbox()")
+    op.execute("ALTER TABLE zones DROP COLUMN IF EXISTS bbox")
+    op.execute("DROP FUNCTION IF EXISTS safe_geom_from_geojson(text)")
+    op.execute("DROP INDEX IF EXISTS ix_regions_bbox")
@@ -0,0 +1,64 @@
+"""add region level-of-detail geometry columns
+
+Revision ID: a3792482b5d1
+Revises: 110e609a048e
+Create Date: 2026-10-18 11:40:05.918233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3792482b5d1'
+down_revision: Union[str, Sequence[str], None] = '110e609a048e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Снимок app.services.region_lod.LOD_LEVELS на момент миграции.
+NEW_LEVELS = (
+    ("geom_z3", 0.2),
+    ("geom_z7", 0.01),
+    ("geom_z9", 0.002),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    add_columns = "\n".join(
+        f"ALTER TABLE regions ADD COLUMN IF NOT EXISTS {column} geometry(MultiPolygon, 4326);"
+        for column, _ in NEW_LEVELS
+    )
+    backfill = ",\n".join(
+        f"{column} = ST_Multi(ST_CollectionExtract(ST_SimplifyPreserveTopology(geom, {tolerance!r}), 3))"
+        for column, tolerance in NEW_LEVELS
+    )
+    op.execute(f"""
+    DO $$
+    BEGIN
+      IF to_regclass('public.regions') IS NOT NULL THEN
+        {add_columns}
+        UPDATE regions SET
+        {backfill};
+      END IF;
+    END;
+    $$;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_columns = "\n".join(
+        f"ALTER TABLE regions DROP COLUMN IF EXISTS {column};" for column, _ in NEW_LEVELS
+    )
+    op.execute(f"""
+    DO $$
+    BEGIN
+      IF to_regclass('public.regions') IS NOT NULL THEN
+        {drop_columns}
+      END IF;
+    END;
+    $$;
+    """)
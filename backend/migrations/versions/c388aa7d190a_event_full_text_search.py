@@ -0,0 +1,120 @@
+"""full-text search over events and event_texts
+
+Revision ID: c388aa7d190a
+Revises: 5bb66f40b107
+Create Date: 2026-10-18 19:42:13.508816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c388aa7d190a'
+down_revision: Union[str, Sequence[str], None] = '5bb66f40b107'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Конфигурация по языку текста: ru - russian, en - english, без языка - russian
+# (он же стеммит латиницу английским стеммером), прочие - simple без стемминга.
+TEXT_CONFIG_FN = """
+CREATE OR REPLACE FUNCTION event_text_config(language text) RETURNS regconfig
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT CASE
+    WHEN language IS NULL OR lower(language) LIKE 'ru%' THEN 'russian'::regconfig
+    WHEN lower(language) LIKE 'en%' THEN 'english'::regconfig
+    ELSE 'simple'::regconfig
+  END
+$$;
+"""
+
+# Новые секции копируют и генерируемый столбец; строки переносятся без него.
+ENSURE_PARTITION_FN = """
+CREATE OR REPLACE FUNCTION ensure_event_partition(month date) RETURNS text AS $$
+DECLARE
+  start_ts timestamptz := date_trunc('month', month::timestamp) AT TIME ZONE 'UTC';
+  end_ts timestamptz := (date_trunc('month', month::timestamp) + interval '1 month') AT TIME ZONE 'UTC';
+  part text := 'events_p' || to_char(month, 'YYYY_MM');
+BEGIN
+  IF to_regclass(part) IS NOT NULL THEN
+    RETURN NULL;
+  END IF;
+  IF EXISTS (SELECT 1 FROM events_default WHERE created_at >= start_ts AND created_at < end_ts) THEN
+    EXECUTE format(
+      'CREATE TABLE %I (LIKE events INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)', part);
+    EXECUTE format(
+      'WITH moved AS (DELETE FROM events_default WHERE created_at >= $1 AND created_at < $2 RETURNING *)
+       INSERT INTO %I (id, map_id, zone_id, status, title, description, created_at)
+       SELECT id, map_id, zone_id, status, title, description, created_at FROM moved', part)
+      USING start_ts, end_ts;
+    EXECUTE format('ALTER TABLE events ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', part, start_ts, end_ts);
+  ELSE
+    EXECUTE format('CREATE TABLE %I PARTITION OF events FOR VALUES FROM (%L) TO (%L)', part, start_ts, end_ts);
+  END IF;
+  RETURN part;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Модель EventText была, таблицы в миграциях не было. Внешнего ключа на events нет:
+    # после секционирования id уникален только вместе с created_at.
+    op.execute("""
+    CREATE TABLE IF NOT EXISTS event_texts (
+      id bigserial PRIMARY KEY,
+      event_id bigint NOT NULL,
+      text text NOT NULL,
+      language varchar(5),
+      created_at timestamptz NOT NULL DEFAULT now()
+    )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_event_texts_event_id ON event_texts (event_id)")
+    op.execute(TEXT_CONFIG_FN)
+    op.execute(ENSURE_PARTITION_FN)
+
+    # Заголовок весит больше описания (A/B) - это учитывает ранжирование.
+    op.execute("""
+    ALTER TABLE events ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+      setweight(to_tsvector('russian'::regconfig, coalesce(title, '')), 'A') ||
+      setweight(to_tsvector('russian'::regconfig, coalesce(description, '')), 'B')
+    ) STORED
+    """)
+    op.execute("""
+    ALTER TABLE event_texts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+      to_tsvector(event_text_config(language), text)
+    ) STORED
+    """)
+    op.execute("CREATE INDEX ix_events_search_vector ON events USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_event_texts_search_vector ON event_texts USING gin (search_vector)")
+
+    # Вместо ON DELETE CASCADE, которого без внешнего ключа нет.
+    op.execute("""
+    CREATE OR REPLACE FUNCTION events_delete_texts() RETURNS trigger AS $$
+    BEGIN
+      DELETE FROM event_texts WHERE event_id IN (SELECT id FROM old_rows);
+      RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+    CREATE TRIGGER trg_events_delete_texts
+    AFTER DELETE ON events
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION events_delete_texts()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_events_delete_texts ON events")
+    op.execute("DROP FUNCTION IF EXISTS events_delete_texts()")
+    op.execute("DROP INDEX IF EXISTS ix_event_texts_search_vector")
+    op.execute("DROP INDEX IF EXISTS ix_events_search_vector")
+    op.execute("ALTER TABLE event_texts DROP COLUMN IF EXISTS search_vector")
+    op.execute("ALTER TABLE events DROP COLUMN IF EXISTS search_vector")
+    op.execute("DROP FUNCTION IF EXISTS event_text_config(text)")
+    # ensure_event_partition остаётся новой версии: она работает и без генерируемого столбца
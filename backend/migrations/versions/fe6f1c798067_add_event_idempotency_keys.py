@@ -0,0 +1,37 @@
+"""add idempotency keys for batch event ingestion
+
+Revision ID: fe6f1c798067
+Revises: 42516816ce9a
+Create Date: 2026-10-18 16:02:37.518840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fe6f1c798067'
+down_revision: Union[str, Sequence[str], None] = '42516816ce9a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # POST /api/v1/events/batch занимает ключ до вставки события, поэтому FK отложенный
+    op.execute("""
+    CREATE TABLE event_idempotency_keys (
+      key text PRIMARY KEY,
+      event_id integer NOT NULL
+        REFERENCES events (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+      created_at timestamptz NOT NULL DEFAULT now()
+    )
+    """)
+    op.execute("CREATE INDEX ix_event_idempotency_keys_event_id ON event_idempotency_keys (event_id)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE IF EXISTS event_idempotency_keys")
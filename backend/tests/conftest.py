@@ -0,0 +1,29 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.security import get_current_user  # noqa: E402
+from app.db.session import get_db  # noqa: E402
+
+
+@pytest.fixture
+def make_client():
+    """TestClient for one router, with a logged-in admin and no database session.
+
+    Services that would touch the database are monkeypatched by the tests.
+    """
+
+    def make(router, prefix: str = "/api/v1", db=None) -> TestClient:
+        app = FastAPI()
+        app.include_router(router, prefix=prefix)
+        app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, email="admin@example.com", role="admin")
+        app.dependency_overrides[get_db] = lambda: db
+        return TestClient(app)
+
+    return make
@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+
+from app.services.event_export import export_window
+from app.services.event_service import EventFilters
+
+
+def test_export_window_normalises_naive_since():
+    filters = export_window(EventFilters(since=datetime(2026, 10, 1)))
+
+    assert filters.since == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert filters.until.tzinfo is not None
+    assert filters.since < filters.until
+
+
+def test_export_window_keeps_explicit_until():
+    until = datetime(2026, 10, 2, 3, 0)
+    filters = export_window(EventFilters(map_id=3, until=until))
+
+    assert filters.until == datetime(2026, 10, 2, 3, 0, tzinfo=timezone.utc)
+    assert filters.map_id == 3
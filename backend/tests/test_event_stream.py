@@ -0,0 +1,132 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import event_stream
+from app.services.event_stream import (
+    EventBroadcaster,
+    MemoryEventBackend,
+    PostgresEventBackend,
+    SlowConsumer,
+)
+
+
+def event(event_id: int, map_id: int = 1, status: str = "ok") -> dict:
+    return {
+        "id": event_id,
+        "map_id": map_id,
+        "zone_id": 10,
+        "status": status,
+        "created_at": datetime(2026, 10, 1, tzinfo=timezone.utc),
+    }
+
+
+def test_fan_out_to_every_matching_subscriber():
+    async def scenario():
+        broadcaster = EventBroadcaster()
+        backend = MemoryEventBackend(broadcaster)
+        everyone = [broadcaster.subscribe() for _ in range(3)]
+        map_two = broadcaster.subscribe(map_id=2)
+        alerts = broadcaster.subscribe(statuses=["alert"])
+
+        backend.publish([event(1), event(2, map_id=2, status="alert")])
+
+        for sub in everyone:
+            assert [(await sub.get(0.1))[0]["id"] for _ in range(2)] == [1, 2]
+        assert (await map_two.get(0.1))[0]["id"] == 2
+        assert (await alerts.get(0.1))[0]["id"] == 2
+        assert await map_two.get(0.01) is None
+        assert broadcaster.published == 2
+
+    asyncio.run(scenario())
+
+
+def test_message_is_serialized_once():
+    async def scenario():
+        broadcaster = EventBroadcaster()
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+        broadcaster.publish([event(1)])
+        assert (await first.get(0.1))[1] is (await second.get(0.1))[1]
+
+    asyncio.run(scenario())
+
+
+def test_slow_consumer_is_dropped_without_blocking_others():
+    async def scenario():
+        broadcaster = EventBroadcaster(queue_size=2)
+        slow = broadcaster.subscribe()
+        fast = broadcaster.subscribe(queue_size=10)
+
+        broadcaster.publish([event(i) for i in range(1, 4)])
+
+        assert slow.dropped
+        assert broadcaster.dropped == 1
+        assert broadcaster.subscriber_count == 1
+        # метка сброса приходит сразу, не после устаревших событий
+        with pytest.raises(SlowConsumer):
+            await slow.get(0.1)
+        assert [(await fast.get(0.1))[0]["id"] for _ in range(3)] == [1, 2, 3]
+
+        broadcaster.publish([event(4)])
+        assert slow.queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_delay_resets_after_successful_listen(monkeypatch):
+    delays = []
+    outcomes = iter(["fail", "fail", "listen", "fail", "stop"])
+
+    async def fake_listen(self, on_listening):
+        outcome = next(outcomes)
+        if outcome == "stop":
+            raise asyncio.CancelledError()
+        if outcome == "listen":
+            on_listening()
+        raise ConnectionError(outcome)
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(PostgresEventBackend, "_listen", fake_listen)
+    monkeypatch.setattr(event_stream.asyncio, "sleep", fake_sleep)
+
+    async def scenario():
+        with pytest.raises(asyncio.CancelledError):
+            await PostgresEventBackend(EventBroadcaster())._run()
+
+    asyncio.run(scenario())
+    delays_table = event_stream.RECONNECT_DELAYS
+    assert delays == [delays_table[0], delays_table[1], delays_table[0], delays_table[1]]
+
+
+def test_catch_up_publishes_missed_events_once(monkeypatch):
+    monkeypatch.setattr(PostgresEventBackend, "_max_id", staticmethod(lambda: 5))
+    monkeypatch.setattr(PostgresEventBackend, "_load_after", staticmethod(lambda after_id: [event(6), event(7)]))
+
+    async def scenario():
+        broadcaster = EventBroadcaster()
+        backend = PostgresEventBackend(broadcaster)
+        sub = broadcaster.subscribe()
+
+        # первое подключение только запоминает последний id
+        assert await backend._catch_up() == frozenset()
+        assert backend._last_id == 5
+        assert await sub.get(0.01) is None
+
+        skip = await backend._catch_up()
+        assert skip == {6, 7}
+        assert backend._last_id == 7
+        assert [(await sub.get(0.1))[0]["id"] for _ in range(2)] == [6, 7]
+
+        loaded = []
+        monkeypatch.setattr(PostgresEventBackend, "_load", staticmethod(lambda ids: loaded.append(ids) or []))
+        fetcher = asyncio.create_task(backend._fetch_loop(skip))
+        backend._pending.put_nowait("[7, 8]")
+        await asyncio.sleep(0.05)
+        fetcher.cancel()
+        assert loaded == [[8]]
+        assert backend._last_id == 8
+
+    asyncio.run(scenario())
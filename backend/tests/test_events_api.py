@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api.v1.routes import events as events_routes
+from app.services.event_service import as_utc
+
+
+@pytest.fixture
+def events_client(make_client):
+    return make_client(events_routes.router)
+
+
+@pytest.fixture
+def captured_stats(monkeypatch):
+    queries = []
+
+    def fake_event_stats(db, q):
+        queries.append(q)
+        return {"buckets": []}
+
+    monkeypatch.setattr(events_routes, "event_stats", fake_event_stats)
+    return queries
+
+
+def test_as_utc():
+    naive = datetime(2026, 10, 1, 0, 0)
+    assert as_utc(naive) == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    moscow = datetime(2026, 10, 1, 3, 0, tzinfo=timezone(timedelta(hours=3)))
+    assert as_utc(moscow) == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert as_utc(moscow).tzinfo is timezone.utc
+    assert as_utc(None) is None
+
+
+def test_stats_accepts_naive_since(events_client, captured_stats):
+    response = events_client.get("/api/v1/events/stats", params={"since": "2026-10-01T00:00:00"})
+
+    assert response.status_code == 200
+    (q,) = captured_stats
+    assert q.since == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert q.until.tzinfo is not None
+
+
+def test_stats_mixes_naive_and_aware(events_client, captured_stats):
+    response = events_client.get(
+        "/api/v1/events/stats",
+        params={"since": "2026-10-01T00:00:00", "until": "2026-10-02T00:00:00+03:00"},
+    )
+
+    assert response.status_code == 200
+    (q,) = captured_stats
+    assert q.until == datetime(2026, 10, 1, 21, 0, tzinfo=timezone.utc)
+
+
+def test_stats_rejects_empty_window(events_client, captured_stats):
+    response = events_client.get(
+        "/api/v1/events/stats",
+        params={"since": "2026-10-02T00:00:00", "until": "2026-10-01T00:00:00Z"},
+    )
+
+    assert response.status_code == 400
+    assert captured_stats == []
+
+
+@pytest.fixture
+def captured_export(monkeypatch):
+    calls = []
+
+    def fake_export_events(filters, fmt):
+        calls.append(filters)
+        return iter([b"id\n"])
+
+    monkeypatch.setattr(events_routes, "export_events", fake_export_events)
+    return calls
+
+
+def test_export_mixes_naive_and_aware(events_client, captured_export):
+    response = events_client.get(
+        "/api/v1/events/export",
+        params={"since": "2026-10-01T00:00:00", "until": "2026-10-02T00:00:00Z"},
+    )
+
+    assert response.status_code == 200
+    (filters,) = captured_export
+    assert filters.since == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert filters.until == datetime(2026, 10, 2, tzinfo=timezone.utc)
+
+
+def test_export_naive_since_with_default_until(events_client, captured_export):
+    response = events_client.get("/api/v1/events/export", params={"since": "2026-10-01T00:00:00"})
+
+    assert response.status_code == 200
+    (filters,) = captured_export
+    assert filters.since.tzinfo is not None
+    assert filters.until.tzinfo is not None
+
+
+def test_export_rejects_empty_window(events_client, captured_export):
+    response = events_client.get(
+        "/api/v1/events/export",
+        params={"since": "2026-10-02T00:00:00", "until": "2026-10-01T00:00:00Z"},
+    )
+
+    assert response.status_code == 400
+    assert captured_export == []
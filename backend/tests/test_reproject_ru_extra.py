@@ -0,0 +1,64 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "tools"))
+
+import reproject_ru_extra as rx  # noqa: E402
+
+
+def mercator_polygon(center_lon: float, center_lat: float, points: int) -> dict:
+    angles = np.linspace(0, 2 * np.pi, points, endpoint=False)
+    lon = center_lon + np.cos(angles)
+    lat = center_lat + 0.5 * np.sin(angles)
+    x = np.radians(lon) * rx.R
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * rx.R
+    ring = np.column_stack([x, y]).tolist()
+    return {"type": "Polygon", "coordinates": [ring + [ring[0]]]}
+
+
+@pytest.fixture
+def extra_dir(tmp_path):
+    """Every file of EXTRA_FILES: bare Mercator geometries, a wrapped one and one already in WGS84."""
+    for i, filename in enumerate(rx.EXTRA_FILES):
+        geometry = mercator_polygon(33.0 + i, 45.0 + i / 2, 2_000 + i * 500)
+        if i == 1:
+            doc = {"type": "FeatureCollection", "features": [{"type": "Feature", "properties": {}, "geometry": geometry}]}
+        elif i == 2:
+            doc = {"type": "Polygon", "coordinates": [[[35.0, 46.0], [36.0, 46.0], [36.0, 47.0], [35.0, 46.0]]]}
+        else:
+            doc = geometry
+        (tmp_path / filename).write_text(json.dumps(doc), encoding="utf-8")
+    return tmp_path
+
+
+def test_control_points():
+    got = rx.mercator_to_wgs84(np.array([xy for xy, _ in rx.CONTROL_POINTS]))
+    expected = np.array([lonlat for _, lonlat in rx.CONTROL_POINTS])
+    assert np.abs(got - expected).max() <= rx.CONTROL_TOLERANCE
+
+
+def test_parallel_output_matches_serial(extra_dir):
+    filenames = list(rx.EXTRA_FILES)
+
+    serial = {name: (data, crs, n) for name, data, crs, n, _ in rx.run_jobs(filenames, 1, extra_dir)}
+    parallel = {name: (data, crs, n) for name, data, crs, n, _ in rx.run_jobs(filenames, 3, extra_dir)}
+
+    assert parallel == serial
+    assert [serial[name][1] for name in filenames] == ["3857", "3857", "4326", "3857", "3857"]
+
+
+def test_output_is_wgs84_feature(extra_dir):
+    filename = next(iter(rx.EXTRA_FILES))
+    data, crs, positions = rx.build_output(filename, extra_dir)
+
+    feature = json.loads(data)
+    ring = np.array(feature["geometry"]["coordinates"][0])
+    assert crs == "3857"
+    assert positions == len(ring)
+    assert feature["properties"]["name"] == rx.EXTRA_FILES[filename]
+    assert np.abs(ring[:, 0] - 33.0).max() <= 1.0 + 1e-9
+    assert np.abs(ring[:, 1] - 45.0).max() <= 0.5 + 1e-9
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - registers every mapper used by the relationships
+from app.api import maps as maps_routes
+from app.core.db import Base
+from app.models.map import Map
+from app.models.zone import Zone
+from app.services import zone_service
+from app.services.zone_service import render_zones_geojson, zone_geometry_json
+
+POLYGON = {"type": "Polygon", "coordinates": [[[56.0, 54.0], [57.0, 54.0], [57.0, 55.0], [56.0, 54.0]]]}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # SQLite - как база без PostGIS: колонки zones.bbox нет
+    monkeypatch.setattr(zone_service, "_zones_postgis", None)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[Map.__table__, Zone.__table__])
+    session = sessionmaker(bind=engine)()
+    session.add(Map(id=1, name="Карта"))
+    session.add_all([
+        Zone(id=1, map_id=1, name="bare", geometry=json.dumps(POLYGON)),
+        Zone(id=2, map_id=1, name="feature", geometry=json.dumps({"type": "Feature", "properties": {}, "geometry": POLYGON})),
+        Zone(id=3, map_id=1, name="collection", geometry=json.dumps({"type": "FeatureCollection", "features": []})),
+        Zone(id=4, map_id=1, name="empty", geometry=""),
+        Zone(id=5, map_id=1, name="garbage", geometry="{not json"),
+        Zone(id=6, map_id=1, name="missing", geometry=None),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_zone_geometry_json():
+    assert json.loads(zone_geometry_json(json.dumps(POLYGON))) == POLYGON
+    assert json.loads(zone_geometry_json(json.dumps({"type": "Feature", "geometry": POLYGON}))) == POLYGON
+    assert zone_geometry_json(json.dumps({"type": "Feature", "geometry": None})) == b"null"
+    assert zone_geometry_json('{"type": "Polygon"}') == b"null"
+    assert zone_geometry_json("[1, 2]") == b"null"
+    assert zone_geometry_json("   ") == b"null"
+
+
+def test_render_zones_is_valid_json_for_bad_geometries(db):
+    doc = json.loads(render_zones_geojson(db))
+
+    geometries = {f["properties"]["name"]: f["geometry"] for f in doc["features"]}
+    assert geometries == {
+        "bare": POLYGON,
+        "feature": POLYGON,
+        "collection": None,
+        "empty": None,
+        "garbage": None,
+        "missing": None,
+    }
+
+
+def test_zones_bbox_without_postgis_is_ignored(make_client, db):
+    client = make_client(maps_routes.router, prefix="", db=db)
+
+    response = client.get("/maps/ru/zones.geojson", params={"bbox": "0,0,1,1", "map_id": 1})
+
+    assert response.status_code == 200
+    assert len(response.json()["features"]) == 6
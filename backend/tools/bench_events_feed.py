@@ -0,0 +1,155 @@
+"""Rows/s of the events feed: the old ORM path against the lean Core + orjson one.
+
+Usage (from backend/):
+    python tools/bench_events_feed.py [--rows 10000 100000] [--repeat 3] [--url sqlite://]
+
+Seeds a throwaway database (in-memory SQLite by default; pass --url to point
+at an empty PostgreSQL database) and times building the response body for
+the given numbers of rows:
+
+- orm:  Event objects + lazy map/zone, EventOut per row with strftime, then
+        the response_model validation and jsonable_encoder of FastAPI;
+- lean: Core select of the joined columns, dicts straight to JSON bytes
+        (orjson when installed, reported as lean/json without it).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import BaseModel, TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.core import fast_json  # noqa: E402
+from app.core.db import Base  # noqa: E402
+from app.models.event import Event  # noqa: E402
+from app.models.map import Map  # noqa: E402
+from app.models.zone import Zone  # noqa: E402
+from app.services.event_service import EventFilters, feed_query  # noqa: E402
+
+STATUSES = ("ok", "warning", "alert")
+
+
+class OrmEventOut(BaseModel):
+    """EventOut as it was before the lean path."""
+
+    id: int
+    map_name: str
+    zone_name: str
+    status: str
+    title: str
+    description: str
+    created_at: str
+
+    class Config:
+        from_attributes = True
+
+
+def seed(engine, rows: int) -> None:
+    Base.metadata.create_all(engine, tables=[Map.__table__, Zone.__table__, Event.__table__])
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(Map), [{"id": i, "name": f"Карта {i}"} for i in range(1, 6)])
+        conn.execute(insert(Zone), [{"id": i, "map_id": i % 5 + 1, "name": f"Зона {i}"} for i in range(1, 201)])
+        batch = []
+        for i in range(1, rows + 1):
+            zone_id = i % 200 + 1
+            batch.append({
+                "id": i,
+                "map_id": zone_id % 5 + 1,
+                "zone_id": zone_id,
+                "status": STATUSES[i % 3],
+                "title": f"Событие {i}",
+                "description": None if i % 7 == 0 else f"Описание события {i} в зоне {zone_id}",
+                "created_at": start + timedelta(seconds=i),
+            })
+            if len(batch) == 10_000:
+                conn.execute(insert(Event), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Event), batch)
+
+
+def orm_body(engine, limit: int) -> bytes:
+    with Session(engine) as db:
+        events = (
+            db.query(Event)
+            .join(Event.map)
+            .join(Event.zone)
+            .order_by(Event.created_at.desc())
+            .limit(limit)
+            .all()
+        )
+        result: List[OrmEventOut] = []
+        for ev in events:
+            result.append(
+                OrmEventOut(
+                    id=ev.id,
+                    map_name=ev.map.name if ev.map else "",
+                    zone_name=ev.zone.name if ev.zone else "",
+                    status=ev.status,
+                    title=ev.title,
+                    description=ev.description or "",
+                    created_at=ev.created_at.strftime("%Y-%m-%d %H:%M"),
+                )
+            )
+        # то, что делает FastAPI с response_model
+        validated = TypeAdapter(List[OrmEventOut]).validate_python(result, from_attributes=True)
+        return JSONResponse(jsonable_encoder(validated)).body
+
+
+def lean_body(engine, limit: int) -> bytes:
+    with Session(engine) as db:
+        rows = db.execute(feed_query(EventFilters()).limit(limit)).mappings().all()
+        return fast_json.dumps([dict(r) for r in rows])
+
+
+def best_time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--url", default="sqlite://", help="empty database to seed (default: in-memory SQLite)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    seed(engine, max(args.rows))
+
+    orjson = fast_json.orjson
+    paths = {"orm": orm_body, "lean": lean_body}
+    print(f"{'rows':>8} {'path':<10} {'seconds':>8} {'rows/s':>10} {'bytes':>10}")
+    for rows in args.rows:
+        for name, fn in paths.items():
+            t = best_time(lambda: fn(engine, rows), args.repeat)
+            size = len(fn(engine, rows))
+            label = name if name != "lean" or orjson is not None else "lean/json"
+            print(f"{rows:>8} {label:<10} {t:>8.3f} {rows / t:>10.0f} {size:>10}")
+        if orjson is not None:
+            fast_json.orjson = None
+            try:
+                t = best_time(lambda: lean_body(engine, rows), args.repeat)
+            finally:
+                fast_json.orjson = orjson
+            print(f"{rows:>8} {'lean/json':<10} {t:>8.3f} {rows / t:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
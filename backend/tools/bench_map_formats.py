@@ -0,0 +1,79 @@
+"""Compare GeoJSON, TopoJSON, Geobuf and FlatGeobuf on the map layers.
+
+Usage (from backend/):
+    python tools/bench_map_formats.py [files...] [--repeat 5]
+
+Without arguments every *.geojson under MAPS_DIR is used, merged into one
+layer. Reports raw / gzip / brotli sizes and encode / decode time per format.
+Decode times are for the Python readers in app.geo; browser decoders
+(flatgeobuf, geobuf JS packages) are faster, but the ratios hold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings  # noqa: E402
+from app.core.http_cache import brotli  # noqa: E402
+from app.geo import flatgeobuf, geobuf  # noqa: E402
+from app.geo.geojson import as_features  # noqa: E402
+from app.geo.topojson import features_to_topology  # noqa: E402
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+FORMATS = {
+    "geojson": (lambda fs: _dumps({"type": "FeatureCollection", "features": fs}), json.loads),
+    "topojson": (lambda fs: _dumps(features_to_topology({"layer": fs})), json.loads),
+    "geobuf": (geobuf.encode, geobuf.decode),
+    "flatgeobuf": (flatgeobuf.encode, flatgeobuf.decode),
+}
+
+
+def best_time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    files = args.files or sorted(Path(settings.MAPS_DIR).rglob("*.geojson"))
+    features = []
+    for path in files:
+        with path.open("r", encoding="utf-8") as f:
+            features.extend(as_features(json.load(f)))
+    print(f"{len(features)} features from {len(files)} files\n")
+
+    print(f"{'format':<11} {'raw KB':>9} {'gzip KB':>9} {'br KB':>9} {'encode ms':>10} {'decode ms':>10}")
+    for name, (encode, decode) in FORMATS.items():
+        data = encode(features)
+        enc = best_time(lambda: encode(features), args.repeat)
+        dec = best_time(lambda: decode(data), args.repeat)
+        gz = len(gzip.compress(data, 9))
+        br = f"{len(brotli.compress(data, quality=11)) / 1024:9.1f}" if brotli is not None else f"{'-':>9}"
+        print(
+            f"{name:<11} {len(data) / 1024:9.1f} {gz / 1024:9.1f} {br} "
+            f"{enc * 1000:10.1f} {dec * 1000:10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
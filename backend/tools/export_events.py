@@ -0,0 +1,65 @@
+"""Export events to CSV or Parquet from the command line.
+
+Usage (from backend/):
+    python tools/export_events.py --format parquet --since 2026-01-01 --until 2026-07-01 \\
+        [--map-id 3] [--zone-id 12] [--status alert --status warning] [--out events.parquet]
+
+Same stream as GET /api/v1/events/export: keyset batches in short
+transactions, one CSV chunk / Parquet row group per batch, bounded memory.
+Without --out the data goes to stdout.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.event_export import EXPORT_BATCH_ROWS, export_events, parquet_available  # noqa: E402
+from app.services.event_service import EventFilters, as_utc  # noqa: E402
+
+
+def parse_time(value: str) -> datetime:
+    return as_utc(datetime.fromisoformat(value))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export events to CSV or Parquet")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--since", type=parse_time, help="ISO time, inclusive (UTC if no offset)")
+    parser.add_argument("--until", type=parse_time, help="ISO time, exclusive; default now")
+    parser.add_argument("--map-id", type=int)
+    parser.add_argument("--zone-id", type=int)
+    parser.add_argument("--status", action="append", default=[])
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_ROWS)
+    parser.add_argument("--out", help="output file; stdout if omitted")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and not parquet_available():
+        sys.exit("pyarrow is required for --format parquet")
+
+    filters = EventFilters(
+        map_id=args.map_id,
+        zone_id=args.zone_id,
+        statuses=tuple(args.status),
+        since=args.since,
+        until=args.until,
+    )
+    started = time.perf_counter()
+    written = 0
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    try:
+        for chunk in export_events(filters, args.format, args.batch_size):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.out:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print(f"{written / 1e6:.1f} MB in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Fold pending event deltas into the hourly rollups once (for cron).
+
+Usage (from backend/):
+    python tools/fold_event_rollups.py
+
+The app does the same every EVENT_ROLLUP_FOLD_SECONDS; use this when that is
+set to 0. Concurrent runs are safe: only one holds the advisory lock.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal  # noqa: E402
+from app.services.event_rollup_service import fold_event_rollups  # noqa: E402
+
+
+def main() -> None:
+    with SessionLocal() as db:
+        folded = fold_event_rollups(db)
+    if folded is None:
+        print("another fold is running, skipped")
+    else:
+        print(f"folded deltas: {folded}")
+
+
+if __name__ == "__main__":
+    main()
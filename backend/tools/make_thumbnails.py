@@ -0,0 +1,80 @@
+"""Render missing thumbnails of all event images (backfill / after adding a size).
+
+Usage (from backend/):
+    python tools/make_thumbnails.py [--workers 4]
+    python tools/make_thumbnails.py --files photo1.jpg photo2.jpg [--out /tmp/thumbs]
+
+The app renders thumbnails itself when an image is attached; this picks up
+images stored before that, or ones whose background job was lost with a
+restart. ``--files`` renders arbitrary files (copied into ``--out``) and
+reports original vs thumbnail sizes, without a database.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.thumbnails import FORMATS, SIZES, render_thumbnails, thumbnail_path  # noqa: E402
+
+
+def stored_images() -> list[Path]:
+    from sqlalchemy import select
+
+    from app.db.session import SessionLocal
+    from app.models.event_image import EventImage
+    from app.services.content_store import get_content_store
+
+    store = get_content_store()
+    with SessionLocal() as db:
+        digests = db.execute(select(EventImage.sha256).where(EventImage.sha256.is_not(None)).distinct()).scalars()
+        return [p for p in (store.path_for(d) for d in digests) if p.is_file()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render missing thumbnails of event images")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--files", nargs="+", help="render these files instead of the stored images")
+    parser.add_argument("--out", default="thumbnails_out", help="where --files are copied and rendered")
+    args = parser.parse_args()
+
+    if args.files:
+        out = Path(args.out)
+        out.mkdir(parents=True, exist_ok=True)
+        originals = []
+        for name in args.files:
+            target = out / Path(name).name
+            shutil.copyfile(name, target)
+            originals.append(target)
+    else:
+        originals = stored_images()
+
+    started = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(render_thumbnails, str(p)): p for p in originals}
+        for future, original in futures.items():
+            try:
+                future.result()
+            except Exception as exc:  # noqa: BLE001
+                failed += 1
+                print(f"{original.name}: {exc}")
+    elapsed = time.perf_counter() - started
+
+    source_bytes = sum(p.stat().st_size for p in originals)
+    print(f"images: {len(originals)}, failed: {failed}, {elapsed:.2f}s with {args.workers} workers")
+    print(f"originals: {source_bytes / 1e6:.1f} MB")
+    for size in SIZES:
+        for fmt in FORMATS:
+            paths = [thumbnail_path(p, size, fmt) for p in originals]
+            total = sum(t.stat().st_size for t in paths if t.exists())
+            print(f"  {size:>5} {fmt:<5} {total / 1e6:8.2f} MB  ({total / max(len(originals), 1) / 1e3:.0f} KB/image)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Write .br/.gz sidecars next to the files in MAPS_DIR and print the manifest.
+
+Usage (from backend/):
+    python tools/precompress_maps.py [--force] [--min-size 1024]
+
+Run after the map files change (import, merge, reprojection). The server
+picks a sidecar only while it is newer than its source, so stale ones are
+harmless, just unused. Files that do not shrink get no sidecar.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings  # noqa: E402
+from app.core.http_cache import brotli  # noqa: E402
+from app.core.static_assets import SIDECARS, StaticAssets  # noqa: E402
+
+COMPRESSIBLE = {".geojson", ".json", ".topojson", ".svg", ".txt", ".csv"}
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="rewrite sidecars that are up to date")
+    parser.add_argument("--min-size", type=int, default=1024, help="skip smaller files")
+    args = parser.parse_args()
+
+    assets = StaticAssets(settings.MAPS_DIR)
+    encodings = [enc for enc in SIDECARS if enc != "br" or brotli is not None]
+    written = 0
+    for path in assets.files():
+        if path.suffix not in COMPRESSIBLE or path.stat().st_size < args.min_size:
+            continue
+        data = None
+        for encoding in encodings:
+            if not args.force and assets.sidecar(path, encoding) is not None:
+                continue
+            data = data if data is not None else path.read_bytes()
+            packed = compress(data, encoding)
+            sidecar = path.with_name(path.name + SIDECARS[encoding])
+            if len(packed) >= len(data):
+                sidecar.unlink(missing_ok=True)
+                continue
+            write_atomic(sidecar, packed)
+            written += 1
+            print(f"{sidecar.relative_to(assets.root)}: {len(data)} -> {len(packed)} bytes")
+
+    print(f"{written} sidecars written", file=sys.stderr)
+    print(json.dumps(assets.manifest(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Pre-render regions vector tiles into the on-disk tile cache.
+
+Usage (from backend/):
+    python tools/seed_tiles.py --min-zoom 0 --max-zoom 6 [--prune]
+
+Covers the extent of the regions table for every zoom in the range, so that
+the first visitors of /maps/ru/tiles/... are served straight from disk.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.services.region_service import get_regions_version  # noqa: E402
+from app.services.tile_service import get_regions_tile, tile_cache, tiles_for_bbox  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-zoom", type=int, default=settings.TILE_MIN_ZOOM)
+    parser.add_argument("--max-zoom", type=int, default=min(settings.TILE_MAX_ZOOM, 6))
+    parser.add_argument("--prune", action="store_true", help="remove tiles of older regions versions")
+    args = parser.parse_args()
+
+    min_zoom = max(args.min_zoom, settings.TILE_MIN_ZOOM)
+    max_zoom = min(args.max_zoom, settings.TILE_MAX_ZOOM)
+
+    with SessionLocal() as db:
+        version = get_regions_version(db)
+        extent = db.execute(
+            text("SELECT ST_XMin(e), ST_YMin(e), ST_XMax(e), ST_YMax(e) FROM (SELECT ST_Extent(geom) AS e FROM regions) s")
+        ).one()
+        if extent[0] is None:
+            raise SystemExit("regions table is empty")
+
+        started = time.perf_counter()
+        count = 0
+        for z, x, y in tiles_for_bbox(tuple(extent), min_zoom, max_zoom):
+            get_regions_tile(db, z, x, y, version=version)
+            count += 1
+            if count % 500 == 0:
+                print(f"  {count} tiles (z={z})")
+        elapsed = time.perf_counter() - started
+
+    print(f"version {version}: {count} tiles, zoom {min_zoom}..{max_zoom}, {elapsed:.1f}s")
+
+    if args.prune:
+        removed = tile_cache.prune(version)
+        print(f"pruned {removed} stale objects")
+
+
+if __name__ == "__main__":
+    main()
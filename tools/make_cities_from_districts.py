@@ -1,51 +1,53 @@
-import json
+import argparse
+import sys
+from itertools import islice
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from app.geo.geojson_stream import FeatureCollectionWriter, iter_features  # noqa: E402
+from app.geo.labels import layer_labels  # noqa: E402
+
 districts_path = Path("frontend/public/maps/66/districts.geojson")
 cities_path = Path("frontend/public/maps/66/cities.geojson")
 
-data = json.loads(districts_path.read_text(encoding="utf-8"))
-
-
-def iter_coords(geom):
-  t = geom["type"]
-  if t == "Polygon":
-    for ring in geom["coordinates"]:
-      for lng, lat in ring:
-        yield lng, lat
-  elif t == "MultiPolygon":
-    for poly in geom["coordinates"]:
-      for ring in poly:
-        for lng, lat in ring:
-          yield lng, lat
-
-
-features = []
-for f in data["features"]:
-  props = f.get("properties") or {}
-  district_id = str(props.get("id") or props.get("osm_id") or props.get("name") or "unknown")
-  name = str(props.get("name") or props.get("name:ru") or "Район")
-
-  coords = list(iter_coords(f["geometry"]))
-  if not coords:
-    continue
-
-  lngs = [c[0] for c in coords]
-  lats = [c[1] for c in coords]
-  lng = (min(lngs) + max(lngs)) / 2.0
-  lat = (min(lats) + max(lats)) / 2.0
-
-  features.append({
-      "type": "Feature",
-      "properties": {
-          "name": f"Центр: {name}",
-          "district_id": district_id,
-          "is_center": True
-      },
-      "geometry": {"type": "Point", "coordinates": [lng, lat]}
-  })
-
-out = {"type": "FeatureCollection", "features": features}
-cities_path.write_text(json.dumps(out, ensure_ascii=False), encoding="utf-8")
+parser = argparse.ArgumentParser(description="Label points (district centres) from district polygons")
+parser.add_argument("--workers", type=int, default=0, help="processes for the label search (0 - this process)")
+parser.add_argument("--batch", type=int, default=5000, help="features per vectorized batch")
+args = parser.parse_args()
+
+
+def batches(features, size):
+  it = iter(features)
+  while True:
+    batch = list(islice(it, size))
+    if not batch:
+      return
+    yield batch
+
+
+# районы читаются пачками: точки считаются векторно на пачку, файл целиком в памяти не нужен
+with FeatureCollectionWriter(cities_path) as out:
+  for batch in batches((f for f in iter_features(districts_path) if f.get("geometry")), args.batch):
+    for f, point in zip(batch, layer_labels(batch, workers=args.workers)):
+      if point["label"] is None:
+        continue
+      props = f.get("properties") or {}
+      district_id = str(props.get("id") or props.get("osm_id") or props.get("name") or "unknown")
+      name = str(props.get("name") or props.get("name:ru") or "Район")
+
+      # полюс недоступности всегда внутри района, в отличие от центра рамки
+      lng, lat = point["label"]
+
+      out.write({
+          "type": "Feature",
+          "properties": {
+              "name": f"Центр: {name}",
+              "district_id": district_id,
+              "is_center": True
+          },
+          "geometry": {"type": "Point", "coordinates": [lng, lat]}
+      })
 
 print("OK ->", cities_path)
@@ -1,21 +1,41 @@
 """Merge additional Russian region polygons into the main regions GeoJSON.
 
 Usage:
-    python tools/merge_ru_regions.py
+    python tools/merge_ru_regions.py [--force]
 
-Reads backend/maps/ru/regions.geojson and appends polygons from
-backend/maps/ru/extra/*.geojson if they are not already present (by properties.name).
+Reads backend/maps/ru/regions.geojson and merges polygons from
+backend/maps/ru/extra/*.geojson into it (matched by properties.name).
+Both files are streamed feature by feature, so memory use does not grow with
+the size of the main file.
+
+The merge is incremental. backend/maps/ru/.regions.merge.json stores the
+SHA-256 of every extra source, of the feature built from it and of the merged
+main file. On a re-run:
+
+- nothing changed -> exit right after hashing the (small) sources;
+- a source changed, or its merged feature was edited by hand -> only that
+  feature is replaced, everything else is copied through unchanged.
 """
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import os
+import sys
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from app.geo.geojson_stream import FeatureCollectionWriter, FeatureReader, iter_features  # noqa: E402
+
 MAIN_PATH = ROOT / "backend" / "maps" / "ru" / "regions.geojson"
 EXTRA_DIR = ROOT / "backend" / "maps" / "ru" / "extra"
+MANIFEST_PATH = MAIN_PATH.with_name(".regions.merge.json")
+MANIFEST_VERSION = 1
 
 EXTRA_FILES = {
     "crimea.geojson": "Республика Крым",
@@ -26,94 +46,182 @@ EXTRA_FILES = {
 }
 
 
-def load_json(path: Path) -> Any:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sha256_feature(feature: Dict[str, Any]) -> str:
+    canonical = json.dumps(feature, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
 
+def file_state(path: Path, digest: Optional[str] = None) -> Dict[str, Any]:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest or sha256_file(path)}
 
-def extract_geometry(data: Any) -> Dict[str, Any]:
-    """Return geometry dict from Feature or FeatureCollection."""
-    if not data:
-        raise ValueError("GeoJSON is empty")
 
-    if isinstance(data, dict) and data.get("type") in {"Polygon", "MultiPolygon"}:
-        return data
+def main_unchanged(state: Optional[Dict[str, Any]]) -> bool:
+    """Cheap stat check first, the content hash only if stat differs."""
+    if not state:
+        return False
+    st = MAIN_PATH.stat()
+    if st.st_size != state.get("size"):
+        return False
+    if st.st_mtime_ns == state.get("mtime_ns"):
+        return True
+    return sha256_file(MAIN_PATH) == state.get("sha256")
 
-    if isinstance(data, dict) and data.get("type") == "FeatureCollection":
-        for feat in data.get("features") or []:
-            geom = feat.get("geometry")
-            if geom and geom.get("type") in {"Polygon", "MultiPolygon"}:
-                return geom
-        raise ValueError("FeatureCollection does not contain Polygon/MultiPolygon geometry")
 
-    if isinstance(data, dict) and data.get("type") == "Feature":
-        geom = data.get("geometry")
+def load_manifest() -> Dict[str, Any]:
+    try:
+        with MANIFEST_PATH.open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return manifest if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def save_manifest(manifest: Dict[str, Any]) -> None:
+    tmp = MANIFEST_PATH.with_name(MANIFEST_PATH.name + ".tmp")
+    with tmp.open("w", encoding="utf-8", newline="\n") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def extract_geometry(path: Path) -> Dict[str, Any]:
+    """Return the first Polygon/MultiPolygon geometry of a GeoJSON file."""
+    for feat in iter_features(path):
+        geom = feat.get("geometry")
         if geom and geom.get("type") in {"Polygon", "MultiPolygon"}:
             return geom
-        raise ValueError("Feature has no Polygon/MultiPolygon geometry")
-
-    raise ValueError("Unsupported GeoJSON structure")
+    raise ValueError(f"{path.name} does not contain Polygon/MultiPolygon geometry")
+
+
+def build_feature(filename: str, region_name: str) -> Dict[str, Any]:
+    return {
+        "type": "Feature",
+        "properties": {
+            "name": region_name,
+            "name_ru": region_name,
+            "name:ru": region_name,
+        },
+        "geometry": extract_geometry(EXTRA_DIR / filename),
+    }
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Merge extra Russian regions into regions.geojson")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and rebuild every extra region")
+    args = parser.parse_args()
+
     if not MAIN_PATH.exists():
         raise SystemExit(f"Main GeoJSON not found: {MAIN_PATH}")
     if not EXTRA_DIR.exists():
         raise SystemExit(f"Extra directory not found: {EXTRA_DIR}")
 
-    main_json = load_json(MAIN_PATH)
-    if main_json.get("type") != "FeatureCollection":
-        raise SystemExit("Main file is not a FeatureCollection")
-
-    features: List[Dict[str, Any]] = list(main_json.get("features") or [])
-    existing_names = {
-        (f.get("properties") or {}).get("name")
-        for f in features
-        if isinstance(f, dict) and isinstance(f.get("properties"), dict)
-    }
-
-    before_count = len(features)
-    added: List[str] = []
-
-    for filename, region_name in EXTRA_FILES.items():
+    for filename in EXTRA_FILES:
         src_path = EXTRA_DIR / filename
         if not src_path.exists():
             raise SystemExit(f"Missing extra file: {src_path}")
 
-        if region_name in existing_names:
-            continue
-
-        data = load_json(src_path)
-        geom = extract_geometry(data)
+    manifest = {} if args.force else load_manifest()
+    old_sources: Dict[str, Any] = manifest.get("sources") or {}
+    source_hashes = {filename: sha256_file(EXTRA_DIR / filename) for filename in EXTRA_FILES}
+
+    if (
+        main_unchanged(manifest.get("main"))
+        and set(old_sources) == set(EXTRA_FILES)
+        and all(
+            old_sources[fn].get("sha256") == source_hashes[fn] and old_sources[fn].get("region") == name
+            for fn, name in EXTRA_FILES.items()
+        )
+    ):
+        print("Nothing changed: regions.geojson is up to date.")
+        return
+
+    # регион -> запись манифеста, если исходник не менялся с прошлого слияния
+    by_region = {name: fn for fn, name in EXTRA_FILES.items()}
+    trusted = {
+        name: old_sources[fn]
+        for fn, name in EXTRA_FILES.items()
+        if fn in old_sources
+        and old_sources[fn].get("sha256") == source_hashes[fn]
+        and old_sources[fn].get("region") == name
+    }
 
-        feature = {
-          "type": "Feature",
-          "properties": {
-              "name": region_name,
-              "name_ru": region_name,
-              "name:ru": region_name,
-          },
-          "geometry": geom,
+    new_sources: Dict[str, Any] = {}
+    before_count = 0
+    kept: List[str] = []
+    replaced: List[str] = []
+    added: List[str] = []
+    written_regions = set()
+
+    def merged(name: str) -> Dict[str, Any]:
+        filename = by_region[name]
+        feature = build_feature(filename, name)
+        new_sources[filename] = {
+            "region": name,
+            "sha256": source_hashes[filename],
+            "feature_sha256": sha256_feature(feature),
         }
-
-        features.append(feature)
-        existing_names.add(region_name)
-        added.append(region_name)
-
-    after_count = len(features)
-    main_json["features"] = features
-
-    with MAIN_PATH.open("w", encoding="utf-8", newline="\n") as f:
-        json.dump(main_json, f, ensure_ascii=False)
+        return feature
+
+    # Новый файл пишется рядом и заменяет старый только после успешного завершения.
+    with MAIN_PATH.open("rb") as src, FeatureCollectionWriter(MAIN_PATH) as out:
+        reader = FeatureReader(src)
+        for feature in reader:
+            before_count += 1
+            props = feature.get("properties")
+            name = props.get("name") if isinstance(props, dict) else None
+            if name not in by_region:
+                out.write(feature)
+                continue
+            if name in written_regions:
+                continue  # дубликат управляемого региона - оставляем один
+
+            written_regions.add(name)
+            entry = trusted.get(name)
+            if entry is not None and entry.get("feature_sha256") == sha256_feature(feature):
+                new_sources[by_region[name]] = entry
+                out.write(feature)
+                kept.append(name)
+            else:
+                out.write(merged(name))
+                replaced.append(name)
+
+        if reader.members.get("type") != "FeatureCollection":
+            raise SystemExit("Main file is not a FeatureCollection")
+
+        for filename, region_name in EXTRA_FILES.items():
+            if region_name in written_regions:
+                continue
+            out.write(merged(region_name))
+            written_regions.add(region_name)
+            added.append(region_name)
+
+        out.close(members=reader.members)
+    after_count = out.count
+
+    save_manifest({
+        "version": MANIFEST_VERSION,
+        "main": file_state(MAIN_PATH),
+        "sources": new_sources,
+    })
 
     print(f"Regions before: {before_count}")
     print(f"Regions after:  {after_count}")
-    if added:
-        print("Added regions:")
-        for name in added:
-            print(f"- {name}")
-    else:
-        print("No regions added (all already present).")
+    print(f"Unchanged extra regions: {len(kept)}")
+    for title, names in (("Replaced regions:", replaced), ("Added regions:", added)):
+        if names:
+            print(title)
+            for name in names:
+                print(f"- {name}")
+    if not replaced and not added:
+        print("No regions added or replaced.")
 
 
 if __name__ == "__main__":
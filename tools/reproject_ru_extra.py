@@ -0,0 +1,352 @@
+"""Build backend/maps/ru/extra_wgs84/ from backend/maps/ru/extra/.
+
+Usage:
+    python tools/reproject_ru_extra.py [--force] [--workers N]
+    python tools/reproject_ru_extra.py --check
+    python tools/reproject_ru_extra.py --bench [--points N]
+
+Every extra source is a bare geometry (or Feature/FeatureCollection) either in
+EPSG:3857 WebMercator metres or already in WGS84 degrees; the CRS is taken
+from a ``crs`` member when there is one and guessed from the coordinate range
+otherwise. The output is the Feature that merge_ru_regions expects, with the
+region name in its properties, pretty-printed like the files in the repo.
+
+All positions of a file are gathered into one NumPy array and transformed in a
+single pass; files are processed in parallel on a process pool. The SHA-256 of
+each source and output is kept in backend/maps/ru/.extra_wgs84.json, so only
+sources that changed (or outputs edited by hand) are rewritten.
+
+``--check`` verifies the transform against known control points and that the
+committed extra_wgs84 files are what the tool would produce; ``--bench``
+measures its throughput against the per-point Python formula.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from app.geo.geojson import as_features  # noqa: E402
+
+RU_DIR = ROOT / "backend" / "maps" / "ru"
+EXTRA_DIR = RU_DIR / "extra"
+OUT_DIR = RU_DIR / "extra_wgs84"
+MANIFEST_PATH = RU_DIR / ".extra_wgs84.json"
+# меняется вместе с алгоритмом преобразования или форматом вывода - тогда всё пересобирается
+TRANSFORM_VERSION = "3857-spherical-1"
+
+# Файл -> регион; тот же список, что в merge_ru_regions.py.
+EXTRA_FILES = {
+    "crimea.geojson": "Республика Крым",
+    "donetsk.geojson": "Донецкая Народная Республика",
+    "luhansk.geojson": "Луганская Народная Республика",
+    "kherson.geojson": "Херсонская область",
+    "zaporizhzhia.geojson": "Запорожская область",
+}
+
+R = 6378137.0
+MERCATOR_CRS = {"EPSG:3857", "EPSG:900913", "EPSG:3785", "EPSG:102100"}
+WGS84_CRS = {"EPSG:4326", "OGC:CRS84", "CRS84"}
+
+# (x, y) в метрах WebMercator -> (lon, lat) в градусах
+CONTROL_POINTS = [
+    ((0.0, 0.0), (0.0, 0.0)),
+    ((20037508.342789244, 0.0), (180.0, 0.0)),
+    ((-20037508.342789244, 0.0), (-180.0, 0.0)),
+    ((0.0, 20037508.342789244), (0.0, 85.05112877980659)),
+    ((0.0, -20037508.342789244), (0.0, -85.05112877980659)),
+    ((4187538.681, 7509955.142), (37.6173, 55.7558)),  # Москва
+    ((3796239.539, 5613983.761), (34.1022, 44.9521)),  # Симферополь
+]
+CONTROL_TOLERANCE = 1e-6  # градусы, ~0.1 м
+
+
+def mercator_to_wgs84(xy: np.ndarray) -> np.ndarray:
+    """Spherical WebMercator metres -> lon/lat degrees for an (n, 2+) array."""
+    out = np.array(xy, dtype=np.float64, copy=True)
+    out[:, 0] = np.degrees(out[:, 0] / R)
+    out[:, 1] = np.degrees(2.0 * np.arctan(np.exp(out[:, 1] / R)) - math.pi / 2)
+    return out
+
+
+def _mercator_to_wgs84_point(x: float, y: float) -> Tuple[float, float]:
+    return math.degrees(x / R), math.degrees(2.0 * math.atan(math.exp(y / R)) - math.pi / 2)
+
+
+# --- geometry walk ---
+
+def _position_lists(coords: Any, out: List[list]) -> None:
+    """Collect every innermost list of positions (ring, line, point list)."""
+    if not coords:
+        return
+    if isinstance(coords[0], (int, float)):
+        out.append([coords])
+    elif isinstance(coords[0][0], (int, float)):
+        out.append(coords)
+    else:
+        for part in coords:
+            _position_lists(part, out)
+
+
+def _geometries(geometry: Optional[dict]) -> List[dict]:
+    if not geometry:
+        return []
+    if geometry.get("type") == "GeometryCollection":
+        return [g for sub in geometry.get("geometries") or [] for g in _geometries(sub)]
+    return [geometry]
+
+
+def collect_positions(features: List[dict]) -> List[list]:
+    lists: List[list] = []
+    for feature in features:
+        for geometry in _geometries(feature.get("geometry")):
+            _position_lists(geometry.get("coordinates"), lists)
+    return lists
+
+
+def detect_crs(doc: dict, positions: List[list]) -> str:
+    """"3857" or "4326": the declared CRS if any, otherwise by coordinate range."""
+    name = str(((doc.get("crs") or {}).get("properties") or {}).get("name") or "")
+    code = name.upper().replace("URN:OGC:DEF:CRS:", "").replace("::", ":")
+    if code in MERCATOR_CRS:
+        return "3857"
+    if code in WGS84_CRS:
+        return "4326"
+    for plist in positions:
+        for pos in plist:
+            if abs(pos[0]) > 180 or abs(pos[1]) > 90:
+                return "3857"
+    return "4326"
+
+
+def reproject_features(features: List[dict], crs: str) -> None:
+    """Transform all positions in place with one vectorized call."""
+    lists = collect_positions(features)
+    if crs != "3857" or not lists:
+        return
+    sizes = [len(p) for p in lists]
+    flat = np.array([pos[:2] for plist in lists for pos in plist], dtype=np.float64)
+    lonlat = mercator_to_wgs84(flat).tolist()
+    i = 0
+    for plist, n in zip(lists, sizes):
+        for pos, new in zip(plist, lonlat[i : i + n]):
+            pos[0], pos[1] = new
+        i += n
+
+
+def build_output(filename: str, extra_dir: Path = EXTRA_DIR) -> Tuple[bytes, str, int]:
+    """(output bytes, detected source CRS, positions) for one extra file."""
+    with (extra_dir / filename).open("r", encoding="utf-8-sig") as f:
+        doc = json.load(f)
+    features = as_features(doc)
+    geometry = next(
+        (f["geometry"] for f in features
+         if (f.get("geometry") or {}).get("type") in {"Polygon", "MultiPolygon"}),
+        None,
+    )
+    if geometry is None:
+        raise ValueError(f"{filename} does not contain Polygon/MultiPolygon geometry")
+    crs = detect_crs(doc, collect_positions(features))
+    feature = {"type": "Feature", "properties": {}, "geometry": geometry}
+    reproject_features([feature], crs)
+    name = EXTRA_FILES[filename]
+    feature["properties"] = {"name": name, "name_ru": name, "name:ru": name}
+    data = json.dumps(feature, ensure_ascii=False, indent=2).encode("utf-8")
+    return data, crs, sum(len(p) for p in collect_positions([feature]))
+
+
+def _job(filename: str, extra_dir: Path = EXTRA_DIR) -> Tuple[str, bytes, str, int, float]:
+    started = time.perf_counter()
+    data, crs, positions = build_output(filename, extra_dir)
+    return filename, data, crs, positions, time.perf_counter() - started
+
+
+# --- files ---
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: Path) -> Optional[str]:
+    try:
+        return sha256_bytes(path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_manifest() -> Dict[str, Any]:
+    try:
+        with MANIFEST_PATH.open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return manifest if manifest.get("version") == TRANSFORM_VERSION else {}
+
+
+def save_manifest(files: Dict[str, Any]) -> None:
+    data = json.dumps({"version": TRANSFORM_VERSION, "files": files}, ensure_ascii=False, indent=2, sort_keys=True)
+    write_atomic(MANIFEST_PATH, data.encode("utf-8"))
+
+
+def run_jobs(filenames: List[str], workers: int, extra_dir: Path = EXTRA_DIR):
+    job = partial(_job, extra_dir=extra_dir)
+    if workers > 1 and len(filenames) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(filenames))) as pool:
+            yield from pool.map(job, filenames)
+    else:
+        yield from map(job, filenames)
+
+
+def reproject(force: bool, workers: int) -> None:
+    for filename in EXTRA_FILES:
+        if not (EXTRA_DIR / filename).exists():
+            raise SystemExit(f"Missing extra file: {EXTRA_DIR / filename}")
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    old = {} if force else (load_manifest().get("files") or {})
+    files: Dict[str, Any] = {}
+    pending: List[str] = []
+    for filename, region in EXTRA_FILES.items():
+        entry = old.get(filename) or {}
+        source_sha = sha256_file(EXTRA_DIR / filename)
+        if (
+            entry.get("source_sha256") == source_sha
+            and entry.get("region") == region
+            and sha256_file(OUT_DIR / filename) == entry.get("output_sha256")
+        ):
+            files[filename] = entry
+        else:
+            pending.append(filename)
+
+    if not pending:
+        print("Nothing changed: extra_wgs84 is up to date.")
+        return
+
+    started = time.perf_counter()
+    total_positions = 0
+    for filename, data, crs, positions, elapsed in run_jobs(pending, workers):
+        write_atomic(OUT_DIR / filename, data)
+        files[filename] = {
+            "region": EXTRA_FILES[filename],
+            "source_crs": f"EPSG:{crs}",
+            "source_sha256": sha256_file(EXTRA_DIR / filename),
+            "output_sha256": sha256_bytes(data),
+        }
+        total_positions += positions
+        print(f"{filename}: EPSG:{crs} -> EPSG:4326, {positions} positions, {elapsed:.3f}s")
+    save_manifest(files)
+
+    total = time.perf_counter() - started
+    print(f"Written: {len(pending)}, unchanged: {len(EXTRA_FILES) - len(pending)}")
+    print(f"{total_positions} positions in {total:.2f}s ({total_positions / max(total, 1e-9):.0f} positions/s)")
+
+
+# --- self-check and benchmark ---
+
+def check() -> None:
+    failures = 0
+    xy = np.array([p for p, _ in CONTROL_POINTS])
+    got = mercator_to_wgs84(xy)
+    for (src, expected), (lon, lat) in zip(CONTROL_POINTS, got):
+        err = max(abs(lon - expected[0]), abs(lat - expected[1]))
+        scalar = _mercator_to_wgs84_point(*src)
+        ok = err <= CONTROL_TOLERANCE and max(abs(scalar[0] - lon), abs(scalar[1] - lat)) < 1e-9
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {src} -> ({lon:.8f}, {lat:.8f}) err={err:.1e}")
+
+    # обёртка в Feature и распознавание CRS
+    merc = {"type": "Polygon", "coordinates": [[[0, 0], [20037508.342789244, 0], [0, 1e6], [0, 0]]]}
+    lonlat = {"type": "Polygon", "coordinates": [[[30.5, 45.1], [31.0, 45.1], [31.0, 46.0], [30.5, 45.1]]]}
+    declared = {"type": "FeatureCollection", "crs": {"type": "name", "properties": {"name": "urn:ogc:def:crs:EPSG::3857"}},
+                "features": [{"type": "Feature", "properties": {}, "geometry": {"type": "Point", "coordinates": [10, 10]}}]}
+    for doc, expected in ((merc, "3857"), (lonlat, "4326"), (declared, "3857")):
+        crs = detect_crs(doc, collect_positions(as_features(doc)))
+        ok = crs == expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} detect {doc['type']}: EPSG:{crs}")
+
+    for filename in EXTRA_FILES:
+        data, crs, _ = build_output(filename)
+        ok = (OUT_DIR / filename).exists() and (OUT_DIR / filename).read_bytes() == data
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} extra_wgs84/{filename} matches a fresh build (source EPSG:{crs})")
+
+    if failures:
+        raise SystemExit(f"{failures} check(s) failed")
+    print("All checks passed.")
+
+
+def bench(points: int) -> None:
+    rng = np.random.default_rng(0)
+    xy = np.column_stack([
+        rng.uniform(-20037508.34, 20037508.34, points),
+        rng.uniform(-20037508.34, 20037508.34, points),
+    ])
+    t0 = time.perf_counter()
+    mercator_to_wgs84(xy)
+    t_vec = time.perf_counter() - t0
+
+    sample = xy[: min(points, 200_000)].tolist()
+    t0 = time.perf_counter()
+    for x, y in sample:
+        _mercator_to_wgs84_point(x, y)
+    t_loop = (time.perf_counter() - t0) * points / len(sample)
+
+    # полный путь: JSON-вложенность -> массив -> обратно, как в reproject_features
+    feature = {"type": "Feature", "properties": {},
+               "geometry": {"type": "Polygon", "coordinates": [[list(p) for p in xy.tolist()]]}}
+    t0 = time.perf_counter()
+    reproject_features([feature], "3857")
+    t_full = time.perf_counter() - t0
+
+    print(f"points: {points}")
+    print(f"numpy transform:     {t_vec:.3f}s ({points / t_vec / 1e6:.1f} M points/s)")
+    print(f"python loop:         {t_loop:.3f}s ({points / t_loop / 1e6:.2f} M points/s)")
+    print(f"geometry round trip: {t_full:.3f}s ({points / t_full / 1e6:.2f} M points/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reproject maps/ru/extra into maps/ru/extra_wgs84")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and rebuild every file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process pool size")
+    parser.add_argument("--check", action="store_true", help="verify control points and the committed outputs")
+    parser.add_argument("--bench", action="store_true", help="measure transform throughput")
+    parser.add_argument("--points", type=int, default=2_000_000, help="points for --bench")
+    args = parser.parse_args()
+
+    if args.check:
+        check()
+    elif args.bench:
+        bench(args.points)
+    else:
+        reproject(args.force, args.workers)
+
+
+if __name__ == "__main__":
+    main()